@@ -0,0 +1,35 @@
+"""keyset pagination indexes
+
+Revision ID: 3f91ff1e6e1b
+Revises: 4cec6f27d883
+Create Date: 2026-10-17 09:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f91ff1e6e1b'
+down_revision: Union[str, None] = '4cec6f27d883'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_clients_auth0_id_name_id', 'clients', ['auth0_id', 'name', 'id'], unique=False)
+    op.create_index('ix_appointments_auth0_id_time_id', 'appointments', ['auth0_id', 'time', 'id'], unique=False)
+    op.create_index(
+        'ix_appointments_auth0_id_client_id_time_id',
+        'appointments',
+        ['auth0_id', 'client_id', 'time', 'id'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_appointments_auth0_id_client_id_time_id', table_name='appointments')
+    op.drop_index('ix_appointments_auth0_id_time_id', table_name='appointments')
+    op.drop_index('ix_clients_auth0_id_name_id', table_name='clients')
@@ -0,0 +1,39 @@
+"""client search trigram indexes
+
+Revision ID: b0fe2a4ad246
+Revises: 3f91ff1e6e1b
+Create Date: 2026-10-17 09:30:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b0fe2a4ad246'
+down_revision: Union[str, None] = '3f91ff1e6e1b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_COLUMNS = ('name', 'email', 'phone')
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for column in SEARCH_COLUMNS:
+        op.create_index(
+            f'ix_clients_{column}_trgm',
+            'clients',
+            [column],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={column: 'gin_trgm_ops'}
+        )
+
+
+def downgrade() -> None:
+    for column in SEARCH_COLUMNS:
+        op.drop_index(f'ix_clients_{column}_trgm', table_name='clients')
+    # pg_trgm is left installed; other objects in the database may depend on it
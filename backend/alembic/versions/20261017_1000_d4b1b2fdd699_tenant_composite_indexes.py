@@ -0,0 +1,49 @@
+"""tenant composite indexes
+
+Replaces the single-column auth0_id indexes, the redundant id indexes and the
+global unique email index with composite indexes led by auth0_id.
+
+Revision ID: d4b1b2fdd699
+Revises: b0fe2a4ad246
+Create Date: 2026-10-17 10:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4b1b2fdd699'
+down_revision: Union[str, None] = 'b0fe2a4ad246'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_clients_auth0_id_email', 'clients', ['auth0_id', 'email'], unique=True)
+    op.create_index(
+        'ix_appointments_auth0_id_status_time_id',
+        'appointments',
+        ['auth0_id', 'status', 'time', 'id'],
+        unique=False
+    )
+
+    # Covered by the primary keys / as prefixes of the composite indexes above
+    op.drop_index('ix_clients_id', table_name='clients')
+    op.drop_index('ix_appointments_id', table_name='appointments')
+    op.drop_index('ix_clients_auth0_id', table_name='clients')
+    op.drop_index('ix_appointments_auth0_id', table_name='appointments')
+    # Emails are unique per tenant, not across the whole platform
+    op.drop_index('ix_clients_email', table_name='clients')
+
+
+def downgrade() -> None:
+    op.create_index('ix_clients_email', 'clients', ['email'], unique=True)
+    op.create_index('ix_appointments_auth0_id', 'appointments', ['auth0_id'], unique=False)
+    op.create_index('ix_clients_auth0_id', 'clients', ['auth0_id'], unique=False)
+    op.create_index('ix_appointments_id', 'appointments', ['id'], unique=False)
+    op.create_index('ix_clients_id', 'clients', ['id'], unique=False)
+    op.drop_index('ix_appointments_auth0_id_status_time_id', table_name='appointments')
+    op.drop_index('ix_clients_auth0_id_email', table_name='clients')
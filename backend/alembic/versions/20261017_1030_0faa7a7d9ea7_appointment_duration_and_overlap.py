@@ -0,0 +1,53 @@
+"""appointment duration and overlap constraint
+
+Adds duration_minutes and end_time (backfilled as time + 60 minutes) and an
+exclusion constraint rejecting overlapping active appointments of a tenant.
+
+The constraint cannot be created while such overlaps exist; list them first with
+
+    SELECT a.id, b.id FROM appointments a JOIN appointments b
+      ON a.auth0_id = b.auth0_id AND a.id < b.id
+     AND a.status <> 'cancelled' AND b.status <> 'cancelled'
+     AND tstzrange(a.time, a.end_time) && tstzrange(b.time, b.end_time);
+
+Revision ID: 0faa7a7d9ea7
+Revises: d4b1b2fdd699
+Create Date: 2026-10-17 10:30:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0faa7a7d9ea7'
+down_revision: Union[str, None] = 'd4b1b2fdd699'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Equality on auth0_id inside a GiST index
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+
+    op.add_column(
+        'appointments',
+        sa.Column('duration_minutes', sa.Integer(), server_default=sa.text('60'), nullable=False)
+    )
+    op.add_column('appointments', sa.Column('end_time', sa.DateTime(timezone=True), nullable=True))
+    op.execute("UPDATE appointments SET end_time = time + make_interval(mins => duration_minutes)")
+    op.alter_column('appointments', 'end_time', nullable=False)
+
+    op.execute(
+        "ALTER TABLE appointments ADD CONSTRAINT ex_appointments_auth0_id_no_overlap "
+        "EXCLUDE USING gist (auth0_id WITH =, tstzrange(time, end_time, '[)') WITH &&) "
+        "WHERE (status <> 'cancelled')"
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('ex_appointments_auth0_id_no_overlap', 'appointments', type_='exclude')
+    op.drop_column('appointments', 'end_time')
+    op.drop_column('appointments', 'duration_minutes')
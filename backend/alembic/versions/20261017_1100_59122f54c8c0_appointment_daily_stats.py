@@ -0,0 +1,41 @@
+"""appointment daily stats
+
+Per-tenant appointment counts by UTC day and status, backfilled from the
+existing appointments and kept current by the service write paths.
+
+Revision ID: 59122f54c8c0
+Revises: 0faa7a7d9ea7
+Create Date: 2026-10-17 11:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '59122f54c8c0'
+down_revision: Union[str, None] = '0faa7a7d9ea7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'appointment_daily_stats',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('auth0_id', sa.String(length=255), nullable=False),
+        sa.PrimaryKeyConstraint('auth0_id', 'day', 'status')
+    )
+    op.execute(
+        "INSERT INTO appointment_daily_stats (auth0_id, day, status, count) "
+        "SELECT auth0_id, (time AT TIME ZONE 'UTC')::date, status, count(*) "
+        "FROM appointments GROUP BY 1, 2, 3"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('appointment_daily_stats')
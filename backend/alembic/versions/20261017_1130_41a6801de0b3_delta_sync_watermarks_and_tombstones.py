@@ -0,0 +1,53 @@
+"""delta sync watermarks and tombstones
+
+Makes updated_at a non-null watermark (defaulting to now() on insert,
+backfilled from created_at), indexes it per tenant, and adds the tombstones
+table recording deletes.
+
+Revision ID: 41a6801de0b3
+Revises: 59122f54c8c0
+Create Date: 2026-10-17 11:30:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '41a6801de0b3'
+down_revision: Union[str, None] = '59122f54c8c0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for table in ('clients', 'appointments'):
+        op.execute(f"UPDATE {table} SET updated_at = COALESCE(created_at, now()) WHERE updated_at IS NULL")
+        op.alter_column(table, 'updated_at', server_default=sa.text('now()'), nullable=False)
+        op.create_index(f'ix_{table}_auth0_id_updated_at_id', table, ['auth0_id', 'updated_at', 'id'], unique=False)
+
+    op.create_table(
+        'tombstones',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('entity', sa.String(), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('auth0_id', sa.String(length=255), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_tombstones_auth0_id_entity_deleted_at_id',
+        'tombstones',
+        ['auth0_id', 'entity', 'deleted_at', 'id'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tombstones_auth0_id_entity_deleted_at_id', table_name='tombstones')
+    op.drop_table('tombstones')
+    for table in ('appointments', 'clients'):
+        op.drop_index(f'ix_{table}_auth0_id_updated_at_id', table_name=table)
+        op.alter_column(table, 'updated_at', server_default=None, nullable=True)
@@ -0,0 +1,68 @@
+"""appointment series
+
+Recurring appointments stored once as an RRULE; appointments gain the series
+and original occurrence start of the occurrences they replace.
+
+Revision ID: 682bbbc7bc06
+Revises: 41a6801de0b3
+Create Date: 2026-10-17 12:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '682bbbc7bc06'
+down_revision: Union[str, None] = '41a6801de0b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'appointment_series',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('client_id', sa.Integer(), nullable=False),
+        sa.Column('start_time', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('time_zone', sa.String(), server_default=sa.text("'UTC'"), nullable=False),
+        sa.Column('rrule', sa.String(), nullable=False),
+        sa.Column('duration_minutes', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('notes', sa.String(), nullable=True),
+        sa.Column('until', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('auth0_id', sa.String(length=255), nullable=False),
+        sa.ForeignKeyConstraint(['client_id'], ['clients.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_appointment_series_auth0_id_start_time',
+        'appointment_series',
+        ['auth0_id', 'start_time'],
+        unique=False
+    )
+
+    op.add_column('appointments', sa.Column('series_id', sa.Integer(), nullable=True))
+    op.add_column('appointments', sa.Column('occurrence_time', sa.DateTime(timezone=True), nullable=True))
+    op.create_foreign_key(
+        'appointments_series_id_fkey', 'appointments', 'appointment_series', ['series_id'], ['id']
+    )
+    op.create_index(
+        'ix_appointments_series_id_occurrence_time',
+        'appointments',
+        ['series_id', 'occurrence_time'],
+        unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_appointments_series_id_occurrence_time', table_name='appointments')
+    op.drop_constraint('appointments_series_id_fkey', 'appointments', type_='foreignkey')
+    op.drop_column('appointments', 'occurrence_time')
+    op.drop_column('appointments', 'series_id')
+    op.drop_index('ix_appointment_series_auth0_id_start_time', table_name='appointment_series')
+    op.drop_table('appointment_series')
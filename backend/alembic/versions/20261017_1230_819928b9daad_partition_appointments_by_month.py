@@ -0,0 +1,128 @@
+"""partition appointments by month
+
+Rebuilds appointments as a table range-partitioned on time: one partition per
+month from the oldest appointment to three months ahead, plus a default
+partition. The primary key becomes (id, time), the overlap exclusion constraint
+moves to each partition (the default one included), and the series occurrence index is no longer unique
+(partitioned unique indexes must include time). Later months are created by
+`python -m app.db.partitions maintain`.
+
+Rows are copied, so run this in a maintenance window on large tables.
+
+Revision ID: 819928b9daad
+Revises: 682bbbc7bc06
+Create Date: 2026-10-17 12:30:00.000000+00:00
+
+"""
+from datetime import date, datetime, time, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '819928b9daad'
+down_revision: Union[str, None] = '682bbbc7bc06'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (
+    "id, client_id, time, duration_minutes, end_time, status, notes, created_at, updated_at, "
+    "series_id, occurrence_time, auth0_id"
+)
+PREMAKE_MONTHS = 3
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _utc(month: date) -> str:
+    return f"'{datetime.combine(month, time.min, timezone.utc).isoformat()}'"
+
+
+def _create_table(partitioned: bool) -> None:
+    op.execute(
+        "CREATE TABLE appointments ("
+        " id integer NOT NULL DEFAULT nextval('appointments_id_seq'),"
+        " client_id integer REFERENCES clients (id),"
+        " time timestamp with time zone NOT NULL,"
+        " duration_minutes integer NOT NULL DEFAULT 60,"
+        " end_time timestamp with time zone NOT NULL,"
+        " status varchar NOT NULL,"
+        " notes varchar,"
+        " created_at timestamp with time zone DEFAULT now(),"
+        " updated_at timestamp with time zone NOT NULL DEFAULT now(),"
+        " series_id integer REFERENCES appointment_series (id),"
+        " occurrence_time timestamp with time zone,"
+        " auth0_id varchar(255) NOT NULL,"
+        + (" PRIMARY KEY (id, time)) PARTITION BY RANGE (time)" if partitioned else " PRIMARY KEY (id))")
+    )
+
+
+def _create_indexes(unique_occurrences: bool) -> None:
+    op.create_index('ix_appointments_auth0_id_time_id', 'appointments', ['auth0_id', 'time', 'id'])
+    op.create_index(
+        'ix_appointments_auth0_id_client_id_time_id', 'appointments', ['auth0_id', 'client_id', 'time', 'id']
+    )
+    op.create_index('ix_appointments_auth0_id_status_time_id', 'appointments', ['auth0_id', 'status', 'time', 'id'])
+    op.create_index('ix_appointments_auth0_id_updated_at_id', 'appointments', ['auth0_id', 'updated_at', 'id'])
+    op.create_index(
+        'ix_appointments_series_id_occurrence_time',
+        'appointments',
+        ['series_id', 'occurrence_time'],
+        unique=unique_occurrences
+    )
+
+
+def _no_overlap(table: str, name: str) -> None:
+    op.execute(
+        f"ALTER TABLE {table} ADD CONSTRAINT {name} EXCLUDE USING gist "
+        "(auth0_id WITH =, tstzrange(time, end_time, '[)') WITH &&) WHERE (status <> 'cancelled')"
+    )
+
+
+def _replace_table(partitioned: bool) -> None:
+    # The old table goes (with its indexes and constraints) once its rows are
+    # copied; the id sequence is kept for the new one
+    op.execute("ALTER TABLE appointments RENAME TO appointments_old")
+    op.execute("ALTER INDEX appointments_pkey RENAME TO appointments_old_pkey")
+    op.execute("ALTER SEQUENCE appointments_id_seq OWNED BY NONE")
+    _create_table(partitioned)
+
+
+def _copy_rows() -> None:
+    op.execute(f"INSERT INTO appointments ({COLUMNS}) SELECT {COLUMNS} FROM appointments_old")
+    op.execute("DROP TABLE appointments_old")
+    op.execute("ALTER SEQUENCE appointments_id_seq OWNED BY appointments.id")
+
+
+def upgrade() -> None:
+    oldest = op.get_bind().execute(sa.text("SELECT min(time) FROM appointments")).scalar()
+    this_month = date.today().replace(day=1)
+    month = min(oldest.astimezone(timezone.utc).date().replace(day=1), this_month) if oldest else this_month
+
+    _replace_table(partitioned=True)
+    op.execute("CREATE TABLE appointments_default PARTITION OF appointments DEFAULT")
+    _no_overlap('appointments_default', 'appointments_default_no_overlap')
+    while month <= _add_months(this_month, PREMAKE_MONTHS):
+        name = f"appointments_{month:%Y_%m}"
+        op.execute(
+            f"CREATE TABLE {name} PARTITION OF appointments "
+            f"FOR VALUES FROM ({_utc(month)}) TO ({_utc(_add_months(month, 1))})"
+        )
+        _no_overlap(name, f"{name}_no_overlap")
+        month = _add_months(month, 1)
+    _copy_rows()
+    _create_indexes(unique_occurrences=False)
+
+
+def downgrade() -> None:
+    # Partitions archived into the archive schema are not part of appointments
+    # any more and are left where they are
+    _replace_table(partitioned=False)
+    _copy_rows()
+    _create_indexes(unique_occurrences=True)
+    _no_overlap('appointments', 'ex_appointments_auth0_id_no_overlap')
@@ -0,0 +1,33 @@
+"""appointment series delta sync
+
+Indexes series per tenant by their (updated_at, id) watermark, so series can be
+synced like clients and appointments.
+
+Revision ID: 757241ec39ba
+Revises: 819928b9daad
+Create Date: 2026-10-17 13:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '757241ec39ba'
+down_revision: Union[str, None] = '819928b9daad'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_appointment_series_auth0_id_updated_at_id',
+        'appointment_series',
+        ['auth0_id', 'updated_at', 'id'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_appointment_series_auth0_id_updated_at_id', table_name='appointment_series')
@@ -0,0 +1,105 @@
+import codecs
+import csv
+import json
+from typing import AsyncIterator, Dict, List, Tuple, Type, TypeVar
+from fastapi import Request
+from pydantic import BaseModel, ValidationError
+from app.core.exceptions import ImportTooLargeException, UnsupportedImportFormatException
+from app.schemas.bulk import BulkRowError
+
+M = TypeVar("M", bound=BaseModel)
+
+JSON_TYPES = {"application/json"}
+NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+CSV_TYPES = {"text/csv", "application/csv"}
+
+
+async def _iter_lines(request: Request) -> AsyncIterator[str]:
+    """Decode the request body incrementally and yield it line by line"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in request.stream():
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def _iter_csv_records(request: Request) -> AsyncIterator[Dict]:
+    header = None
+    record = ""
+    async for line in _iter_lines(request):
+        record = f"{record}\n{line}" if record else line
+        # A quoted field may span lines; a record is complete once its quotes balance
+        if record.count('"') % 2:
+            continue
+        values = next(csv.reader([record]), [])
+        record = ""
+        if not values:
+            continue
+        if header is None:
+            header = [h.strip() for h in values]
+            continue
+        # Empty cells are missing values, not empty strings
+        yield {key: (value if value != "" else None) for key, value in zip(header, values)}
+
+
+async def _iter_raw_rows(request: Request) -> AsyncIterator:
+    content_type = request.headers.get("content-type", "application/json").split(";")[0].strip().lower()
+    if content_type in JSON_TYPES:
+        try:
+            body = await request.json()
+        except json.JSONDecodeError as e:
+            yield e
+            return
+        for row in body if isinstance(body, list) else [body]:
+            yield row
+    elif content_type in NDJSON_TYPES:
+        async for line in _iter_lines(request):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                yield e
+    elif content_type in CSV_TYPES:
+        async for record in _iter_csv_records(request):
+            yield record
+    else:
+        raise UnsupportedImportFormatException(content_type)
+
+
+def _describe(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}" for err in error.errors()
+    )
+
+
+async def read_bulk_rows(
+    request: Request,
+    schema: Type[M],
+    max_rows: int,
+) -> Tuple[List[Tuple[int, M]], List[BulkRowError]]:
+    """Parse a JSON array, NDJSON or CSV body and validate every row against ``schema``.
+
+    Returns the valid rows with their position in the batch, plus per-row errors
+    for the rows that could not be parsed or validated.
+    """
+    rows: List[Tuple[int, M]] = []
+    errors: List[BulkRowError] = []
+    index = 0
+    async for raw in _iter_raw_rows(request):
+        if index >= max_rows:
+            raise ImportTooLargeException(max_rows)
+        if isinstance(raw, Exception):
+            errors.append(BulkRowError(row=index, detail=f"Invalid JSON: {raw}"))
+        else:
+            try:
+                rows.append((index, schema.model_validate(raw)))
+            except ValidationError as e:
+                errors.append(BulkRowError(row=index, detail=_describe(e)))
+        index += 1
+    return rows, errors
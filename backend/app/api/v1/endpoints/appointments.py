@@ -1,34 +1,58 @@
-from typing import List, Optional, Dict
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional, Dict, Union
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db.session import get_db
+from app.api.v1.bulk import read_bulk_rows
+from app.api.v1.events import event_stream
+from app.api.v1.export import stream_export
+from app.core.config import get_settings
+from app.core.response_cache import cached_response
+from app.db.session import get_read_session, get_session
 from app.schemas.appointment import (
     Appointment,
     AppointmentCreate,
     AppointmentUpdate,
     AppointmentWithClient,
-    AppointmentStatus
+    AppointmentSeries,
+    AppointmentSeriesCreate,
+    AppointmentStatus,
+    Availability
 )
-from app.schemas.common import PaginatedResponse
-from app.services.appointment_service import AppointmentService
-from datetime import date
+from app.schemas.bulk import BulkResult
+from app.schemas.stats import AppointmentStats
+from app.schemas.common import PaginatedResponse, CursorPage, ChangesPage, PaginationMode, SearchMode, ExportFormat, CountStrategy
+from app.services.appointment_service import AsyncAppointmentService
+from datetime import date, datetime, time
 from app.core.exceptions import AppointmentException
 from app.core.auth import get_current_user
 
 router = APIRouter()
 
-def get_appointment_service(db: Session = Depends(get_db)) -> AppointmentService:
-    return AppointmentService(db)
+AppointmentList = Union[PaginatedResponse[AppointmentWithClient], CursorPage[AppointmentWithClient]]
 
-@router.get("/", response_model=PaginatedResponse[AppointmentWithClient])
+def get_appointment_service(db: Union[Session, AsyncSession] = Depends(get_session)) -> AsyncAppointmentService:
+    return AsyncAppointmentService(db)
+
+def get_appointment_read_service(db: Union[Session, AsyncSession] = Depends(get_read_session)) -> AsyncAppointmentService:
+    """Service for read-only GETs: queries may go to a read replica"""
+    return AsyncAppointmentService(db)
+
+@router.get("/", response_model=AppointmentList)
 async def get_appointments(
+    request: Request,
     page: int = 1,
     page_size: int = 10,
     search: Optional[str] = None,
+    search_mode: SearchMode = SearchMode.CONTAINS,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     status: Optional[AppointmentStatus] = None,
-    service: AppointmentService = Depends(get_appointment_service),
+    pagination: PaginationMode = PaginationMode.OFFSET,
+    cursor: Optional[str] = None,
+    count: Optional[CountStrategy] = None,
+    include_total: bool = True,
+    fields: Optional[str] = None,
+    service: AsyncAppointmentService = Depends(get_appointment_read_service),
     current_user: Dict = Depends(get_current_user)
 ):
     """
@@ -36,36 +60,283 @@ async def get_appointments(
     - page: Page number (starts from 1)
     - page_size: Number of items per page
     - search: Search in client name
+    - search_mode: "contains" (substring) or "ranked" (fuzzy, best matches first)
     - start_date: Filter appointments from this date (YYYY-MM-DD)
-    - end_date: Filter appointments until this date (YYYY-MM-DD)
+    - end_date: Filter appointments until this date (YYYY-MM-DD); with both
+      dates, occurrences of recurring series are listed too (id null, series_id
+      and occurrence_time set), in time order
     - status: Filter by appointment status
+    - pagination: "offset" (default, with totals) or "cursor" (keyset on time, id)
+    - cursor: next_cursor/prev_cursor from a previous cursor page
+    - count: how offset pages compute total: "exact", "cached" or "estimated"
+    - include_total: false skips the count; total and total_pages are null
+    - fields: comma-separated item fields to return, e.g. "time,status,client.name"
+      ("client" for all client fields; id is always included)
+    """
+    try:
+        return await cached_response(
+            request,
+            current_user['auth0_id'],
+            AppointmentList,
+            lambda: service.get_appointments(
+                auth0_id=current_user['auth0_id'],
+                page=page,
+                page_size=page_size,
+                search=search,
+                search_mode=search_mode,
+                start_date=start_date,
+                end_date=end_date,
+                status=status,
+                pagination=pagination,
+                cursor=cursor,
+                count=count,
+                include_total=include_total,
+                fields=fields
+            ),
+            validate=False
+        )
+    except AppointmentException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/", response_model=Appointment, status_code=201)
+async def create_appointment(
+    appointment: AppointmentCreate,
+    service: AsyncAppointmentService = Depends(get_appointment_service),
+    current_user: Dict = Depends(get_current_user)
+):
+    """
+    Create a new appointment. It must not overlap another active (not cancelled)
+    appointment; a conflict returns 409.
     """
     try:
-        return service.get_appointments(
-            auth0_id=current_user['auth0_id'],
-            page=page,
-            page_size=page_size,
+        return await service.create_appointment(appointment, current_user['auth0_id'])
+    except AppointmentException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/export")
+async def export_appointments(
+    format: ExportFormat = ExportFormat.NDJSON,
+    search: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    status: Optional[AppointmentStatus] = None,
+    service: AsyncAppointmentService = Depends(get_appointment_service),
+    current_user: Dict = Depends(get_current_user)
+):
+    """
+    Stream every matching appointment as NDJSON or CSV, ordered by time.
+    Takes the same filters as the listing; rows are read through a server-side
+    cursor, so memory stays flat regardless of the export size.
+    """
+    try:
+        columns, batches = await service.export_appointments(
+            current_user['auth0_id'],
             search=search,
             start_date=start_date,
             end_date=end_date,
             status=status
         )
+        return stream_export(batches, columns, format, "appointments")
     except AppointmentException as e:
         raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/", response_model=Appointment, status_code=201)
-async def create_appointment(
-    appointment: AppointmentCreate,
-    service: AppointmentService = Depends(get_appointment_service),
+@router.get("/stream")
+async def stream_appointment_events(
+    current_user: Dict = Depends(get_current_user)
+):
+    """
+    Server-sent events for changes to the caller's appointments, from any worker.
+    - event: created | updated | deleted, data: {"type": ..., "ids": [...]}
+      (ids is null when a large batch changed)
+    - event: resync when events may have been missed; refetch the listing
+    Keep-alive comments are sent every EVENTS_HEARTBEAT_INTERVAL seconds. The
+    stream holds no database connection.
+    """
+    return event_stream(current_user['auth0_id'])
+
+@router.get("/availability", response_model=Availability)
+async def get_availability(
+    request: Request,
+    start_date: date,
+    end_date: date,
+    duration_minutes: Optional[int] = None,
+    day_start: Optional[time] = None,
+    day_end: Optional[time] = None,
+    time_zone: str = "UTC",
+    service: AsyncAppointmentService = Depends(get_appointment_service),
+    current_user: Dict = Depends(get_current_user)
+):
+    """
+    Free slots between start_date and end_date (inclusive).
+    - duration_minutes: shortest useful slot (default APPOINTMENT_DEFAULT_DURATION)
+    - day_start / day_end: working hours, HH:MM (default AVAILABILITY_DAY_START/END)
+    - time_zone: IANA zone the dates and working hours are in; slots are returned in it
+    Slots are the gaps between active appointments within working hours, from now on.
+    """
+    try:
+        return await cached_response(
+            request,
+            current_user['auth0_id'],
+            Availability,
+            lambda: service.get_availability(
+                current_user['auth0_id'],
+                start_date=start_date,
+                end_date=end_date,
+                duration_minutes=duration_minutes,
+                day_start=day_start,
+                day_end=day_end,
+                time_zone=time_zone
+            )
+        )
+    except AppointmentException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/stats", response_model=AppointmentStats)
+async def get_appointment_stats(
+    request: Request,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    service: AsyncAppointmentService = Depends(get_appointment_service),
+    current_user: Dict = Depends(get_current_user)
+):
+    """
+    Dashboard summary: appointment counts by status, per UTC day and per week
+    (starting Monday) between start_date and end_date (default: 30 days either
+    side of today), plus today's counts and how many of today's scheduled or
+    confirmed appointments are still upcoming.
+    """
+    try:
+        return await cached_response(
+            request,
+            current_user['auth0_id'],
+            AppointmentStats,
+            lambda: service.get_stats(current_user['auth0_id'], start_date=start_date, end_date=end_date)
+        )
+    except AppointmentException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/changes", response_model=ChangesPage[Appointment])
+async def get_appointment_changes(
+    since: Optional[str] = None,
+    limit: int = 500,
+    service: AsyncAppointmentService = Depends(get_appointment_service),
+    current_user: Dict = Depends(get_current_user)
+):
+    """
+    Delta sync: appointments created or updated, and ids of those deleted, since
+    the `since` token (omit it for a full initial sync).
+    - limit: rows per page (capped at CHANGES_MAX_LIMIT); keep paging with
+      next_token while has_more, then store next_token for the next sync
+    Changes made while an older transaction is still open appear on a later call.
+    """
+    try:
+        return await service.get_changes(current_user['auth0_id'], since=since, limit=limit)
+    except AppointmentException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/series/changes", response_model=ChangesPage[AppointmentSeries])
+async def get_appointment_series_changes(
+    since: Optional[str] = None,
+    limit: int = 500,
+    service: AsyncAppointmentService = Depends(get_appointment_service),
+    current_user: Dict = Depends(get_current_user)
+):
+    """
+    Delta sync: recurring series created or updated since the `since` token, and ids of
+    those deleted. Occurrences that were never changed only exist as their
+    series: expand them from the rrule, skipping the ones /changes returns as
+    appointments (series_id and occurrence_time set).
+    """
+    try:
+        return await service.get_series_changes(current_user['auth0_id'], since=since, limit=limit)
+    except AppointmentException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/series", response_model=AppointmentSeries, status_code=201)
+async def create_appointment_series(
+    series: AppointmentSeriesCreate,
+    service: AsyncAppointmentService = Depends(get_appointment_service),
+    current_user: Dict = Depends(get_current_user)
+):
+    """
+    Create a recurring series from an RFC 5545 RRULE, e.g. FREQ=WEEKLY;BYDAY=MO;COUNT=12.
+    The series is stored once; its occurrences appear in listings with both
+    start_date and end_date. Occurrences in the next SERIES_CONFLICT_HORIZON_DAYS
+    must not overlap other appointments (409).
+    """
+    try:
+        return await service.create_series(series, current_user['auth0_id'])
+    except AppointmentException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/series/{series_id}", response_model=AppointmentSeries)
+async def get_appointment_series(
+    series_id: int,
+    service: AsyncAppointmentService = Depends(get_appointment_service),
+    current_user: Dict = Depends(get_current_user)
+):
+    """
+    Get a recurring series by ID.
+    """
+    try:
+        return await service.get_series(series_id, current_user['auth0_id'])
+    except AppointmentException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.put("/series/{series_id}/occurrences/{occurrence_time}", response_model=Appointment)
+async def update_appointment_occurrence(
+    series_id: int,
+    occurrence_time: datetime,
+    appointment_update: AppointmentUpdate,
+    service: AsyncAppointmentService = Depends(get_appointment_service),
+    current_user: Dict = Depends(get_current_user)
+):
+    """
+    Move, cancel or annotate one occurrence of a series (occurrence_time as listed).
+    The occurrence becomes a regular appointment linked to the series; fields
+    left out keep the series' values.
+    """
+    try:
+        return await service.update_occurrence(
+            series_id,
+            occurrence_time,
+            appointment_update,
+            current_user['auth0_id']
+        )
+    except AppointmentException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/series/{series_id}")
+async def delete_appointment_series(
+    series_id: int,
+    service: AsyncAppointmentService = Depends(get_appointment_service),
     current_user: Dict = Depends(get_current_user)
 ):
     """
-    Create a new appointment.
+    Delete a recurring series, including the appointments of its changed occurrences.
     """
     try:
-        return service.create_appointment(appointment, current_user['auth0_id'])
+        return await service.delete_series(series_id, current_user['auth0_id'])
     except AppointmentException as e:
         raise e
     except Exception as e:
@@ -73,15 +344,24 @@ async def create_appointment(
 
 @router.get("/{appointment_id}", response_model=AppointmentWithClient)
 async def get_appointment(
+    request: Request,
     appointment_id: int,
-    service: AppointmentService = Depends(get_appointment_service),
+    fields: Optional[str] = None,
+    service: AsyncAppointmentService = Depends(get_appointment_service),
     current_user: Dict = Depends(get_current_user)
 ):
     """
     Get a specific appointment by ID.
+    - fields: comma-separated fields to return, as for the listing
     """
     try:
-        return service.get_appointment(appointment_id, current_user['auth0_id'])
+        return await cached_response(
+            request,
+            current_user['auth0_id'],
+            AppointmentWithClient,
+            lambda: service.get_appointment(appointment_id, current_user['auth0_id'], fields=fields),
+            validate=not fields
+        )
     except AppointmentException as e:
         raise e
     except Exception as e:
@@ -91,14 +371,14 @@ async def get_appointment(
 async def update_appointment(
     appointment_id: int,
     appointment_update: AppointmentUpdate,
-    service: AppointmentService = Depends(get_appointment_service),
+    service: AsyncAppointmentService = Depends(get_appointment_service),
     current_user: Dict = Depends(get_current_user)
 ):
     """
     Update an appointment.
     """
     try:
-        return service.update_appointment(
+        return await service.update_appointment(
             appointment_id,
             appointment_update,
             current_user['auth0_id']
@@ -111,15 +391,37 @@ async def update_appointment(
 @router.delete("/{appointment_id}")
 async def delete_appointment(
     appointment_id: int,
-    service: AppointmentService = Depends(get_appointment_service),
+    service: AsyncAppointmentService = Depends(get_appointment_service),
+    current_user: Dict = Depends(get_current_user)
+):
+    """
+    Delete an appointment. A changed occurrence of a series is cancelled instead,
+    so the series does not bring the occurrence back.
+    """
+    try:
+        return await service.delete_appointment(appointment_id, current_user['auth0_id'])
+    except AppointmentException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_create_appointments(
+    request: Request,
+    service: AsyncAppointmentService = Depends(get_appointment_service),
     current_user: Dict = Depends(get_current_user)
 ):
     """
-    Delete an appointment.
+    Create many appointments in one request.
+    - Body: a JSON array, NDJSON (application/x-ndjson) or CSV (text/csv) with
+      columns client_id, time, status, notes and optionally duration_minutes
+    - Every row is validated up front; invalid rows are reported in errors
+      with their 0-based position and the remaining rows are created
     """
     try:
-        return service.delete_appointment(appointment_id, current_user['auth0_id'])
+        rows, errors = await read_bulk_rows(request, AppointmentCreate, get_settings().BULK_MAX_ROWS)
+        return await service.bulk_create_appointments(rows, current_user['auth0_id'], errors=errors)
     except AppointmentException as e:
         raise e
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,24 +1,45 @@
-from typing import List, Optional, Dict
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional, Dict, Union
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db.session import get_db
+from app.api.v1.bulk import read_bulk_rows
+from app.api.v1.export import stream_export
+from app.core.config import get_settings
+from app.core.response_cache import cached_response
+from app.db.session import get_read_session, get_session
 from app.schemas.client import Client, ClientWithAppointments, ClientCreate
-from app.schemas.common import PaginatedResponse
-from app.services.client_service import ClientService
+from app.schemas.appointment import Appointment
+from app.schemas.bulk import BulkResult
+from app.schemas.common import PaginatedResponse, CursorPage, ChangesPage, PaginationMode, SearchMode, ExportFormat, CountStrategy
+from app.services.client_service import AsyncClientService
 from app.core.exceptions import ClientException
 from app.core.auth import get_current_user
 
 router = APIRouter()
 
-def get_client_service(db: Session = Depends(get_db)) -> ClientService:
-    return ClientService(db)
+ClientList = Union[PaginatedResponse[Client], CursorPage[Client]]
+ClientAppointmentList = Union[PaginatedResponse[Appointment], CursorPage[Appointment]]
 
-@router.get("/", response_model=PaginatedResponse[Client])
+def get_client_service(db: Union[Session, AsyncSession] = Depends(get_session)) -> AsyncClientService:
+    return AsyncClientService(db)
+
+def get_client_read_service(db: Union[Session, AsyncSession] = Depends(get_read_session)) -> AsyncClientService:
+    """Service for read-only GETs: queries may go to a read replica"""
+    return AsyncClientService(db)
+
+@router.get("/", response_model=ClientList)
 async def get_clients(
+    request: Request,
     page: int = 1,
     page_size: int = 10,
     search: Optional[str] = None,
-    service: ClientService = Depends(get_client_service),
+    search_mode: SearchMode = SearchMode.CONTAINS,
+    pagination: PaginationMode = PaginationMode.OFFSET,
+    cursor: Optional[str] = None,
+    count: Optional[CountStrategy] = None,
+    include_total: bool = True,
+    fields: Optional[str] = None,
+    service: AsyncClientService = Depends(get_client_read_service),
     current_user: Dict = Depends(get_current_user)
 ):
     """
@@ -26,52 +47,141 @@ async def get_clients(
     - page: Page number (starts from 1)
     - page_size: Number of items per page
     - search: Search in client name, email, and phone
+    - search_mode: "contains" (substring) or "ranked" (fuzzy, best matches first)
+    - pagination: "offset" (default, with totals) or "cursor" (keyset on name, id)
+    - cursor: next_cursor/prev_cursor from a previous cursor page
+    - count: how offset pages compute total: "exact", "cached" or "estimated"
+    - include_total: false skips the count; total and total_pages are null
+    - fields: comma-separated item fields to return (id is always included)
     """
     try:
-        return service.get_clients(
-            auth0_id=current_user['auth0_id'],
-            page=page,
-            page_size=page_size,
-            search=search
+        return await cached_response(
+            request,
+            current_user['auth0_id'],
+            ClientList,
+            lambda: service.get_clients(
+                auth0_id=current_user['auth0_id'],
+                page=page,
+                page_size=page_size,
+                search=search,
+                search_mode=search_mode,
+                pagination=pagination,
+                cursor=cursor,
+                count=count,
+                include_total=include_total,
+                fields=fields
+            ),
+            validate=False
         )
     except ClientException as e:
         raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/export")
+async def export_clients(
+    format: ExportFormat = ExportFormat.NDJSON,
+    search: Optional[str] = None,
+    service: AsyncClientService = Depends(get_client_service),
+    current_user: Dict = Depends(get_current_user)
+):
+    """
+    Stream every matching client as NDJSON or CSV, ordered by name.
+    Rows are read through a server-side cursor, so memory stays flat.
+    """
+    try:
+        columns, batches = await service.export_clients(current_user['auth0_id'], search=search)
+        return stream_export(batches, columns, format, "clients")
+    except ClientException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/changes", response_model=ChangesPage[Client])
+async def get_client_changes(
+    since: Optional[str] = None,
+    limit: int = 500,
+    service: AsyncClientService = Depends(get_client_service),
+    current_user: Dict = Depends(get_current_user)
+):
+    """
+    Delta sync: clients created or updated, and ids of those deleted, since the
+    `since` token (omit it for a full initial sync). Paged like
+    /appointments/changes.
+    """
+    try:
+        return await service.get_changes(current_user['auth0_id'], since=since, limit=limit)
+    except ClientException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/{client_id}", response_model=ClientWithAppointments)
 async def get_client(
+    request: Request,
     client_id: int,
-    service: ClientService = Depends(get_client_service),
+    fields: Optional[str] = None,
+    service: AsyncClientService = Depends(get_client_read_service),
     current_user: Dict = Depends(get_current_user)
 ):
     """
-    Get a specific client by ID.
+    Get a specific client by ID, with a bounded preview of their appointments
+    (upcoming first). Use appointments_url to page through the rest.
+    - fields: comma-separated client fields to return (id is always included);
+      the appointment preview is then left out
     """
     try:
-        return service.get_client(client_id, current_user['auth0_id'])
+        return await cached_response(
+            request,
+            current_user['auth0_id'],
+            ClientWithAppointments,
+            lambda: service.get_client(client_id, current_user['auth0_id'], fields=fields),
+            validate=not fields
+        )
     except ClientException as e:
         raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/{client_id}/appointments", response_model=PaginatedResponse[Client])
+@router.get("/{client_id}/appointments", response_model=ClientAppointmentList)
 async def get_client_appointments(
+    request: Request,
     client_id: int,
     page: int = 1,
     page_size: int = 10,
-    service: ClientService = Depends(get_client_service),
+    pagination: PaginationMode = PaginationMode.OFFSET,
+    cursor: Optional[str] = None,
+    count: Optional[CountStrategy] = None,
+    include_total: bool = True,
+    fields: Optional[str] = None,
+    service: AsyncClientService = Depends(get_client_read_service),
     current_user: Dict = Depends(get_current_user)
 ):
     """
     Get all appointments for a specific client with pagination.
+    - pagination: "offset" (default, with totals) or "cursor" (keyset on time, id)
+    - cursor: next_cursor/prev_cursor from a previous cursor page
+    - count: how offset pages compute total: "exact", "cached" or "estimated"
+    - include_total: false skips the count; total and total_pages are null
+    - fields: comma-separated item fields to return (id is always included)
     """
     try:
-        return service.get_client_appointments(
-            client_id=client_id,
-            auth0_id=current_user['auth0_id'],
-            page=page,
-            page_size=page_size
+        return await cached_response(
+            request,
+            current_user['auth0_id'],
+            ClientAppointmentList,
+            lambda: service.get_client_appointments(
+                client_id=client_id,
+                auth0_id=current_user['auth0_id'],
+                page=page,
+                page_size=page_size,
+                pagination=pagination,
+                cursor=cursor,
+                count=count,
+                include_total=include_total,
+                fields=fields
+            ),
+            validate=False
         )
     except ClientException as e:
         raise e
@@ -81,15 +191,36 @@ async def get_client_appointments(
 @router.post("/", response_model=Client)
 async def create_client(
     client: ClientCreate,
-    service: ClientService = Depends(get_client_service),
+    service: AsyncClientService = Depends(get_client_service),
     current_user: Dict = Depends(get_current_user)
 ):
     """
     Create a new client.
     """
     try:
-        return service.create_client(client, current_user['auth0_id'])
+        return await service.create_client(client, current_user['auth0_id'])
     except ClientException as e:
         raise e
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_create_clients(
+    request: Request,
+    service: AsyncClientService = Depends(get_client_service),
+    current_user: Dict = Depends(get_current_user)
+):
+    """
+    Create many clients in one request.
+    - Body: a JSON array, NDJSON (application/x-ndjson) or CSV (text/csv) with
+      columns name, email, phone
+    - Every row is validated up front; invalid rows are reported in errors
+      with their 0-based position and the remaining rows are created
+    """
+    try:
+        rows, errors = await read_bulk_rows(request, ClientCreate, get_settings().BULK_MAX_ROWS)
+        return await service.bulk_create_clients(rows, current_user['auth0_id'], errors=errors)
+    except ClientException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,36 @@
+import asyncio
+import json
+from typing import AsyncIterator
+from fastapi.responses import StreamingResponse
+from app.core.config import get_settings
+from app.core.events import get_event_broker
+
+# Reconnect delay suggested to EventSource clients (milliseconds)
+RETRY_MS = 5000
+
+
+async def _encode(auth0_id: str, heartbeat: float) -> AsyncIterator[str]:
+    broker = get_event_broker()
+    queue = broker.subscribe(auth0_id)
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                # Comment line: keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {message['type']}\ndata: {json.dumps(message)}\n\n"
+    finally:
+        # Runs when the client disconnects and the response task is cancelled
+        broker.unsubscribe(auth0_id, queue)
+
+
+def event_stream(auth0_id: str) -> StreamingResponse:
+    """Server-sent events of the tenant's appointment changes"""
+    return StreamingResponse(
+        _encode(auth0_id, get_settings().EVENTS_HEARTBEAT_INTERVAL),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,66 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import AsyncIterator, List, Sequence
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Row
+from app.core.timing import SERIALIZATION, timed
+from app.schemas.common import ExportFormat
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+async def _encode(
+    batches: AsyncIterator[List[Row]],
+    columns: Sequence[str],
+    export_format: ExportFormat,
+) -> AsyncIterator[str]:
+    # One chunk per fetched batch keeps memory flat and the number of writes low
+    if export_format == ExportFormat.CSV:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        async for batch in batches:
+            with timed(SERIALIZATION):
+                writer.writerows(
+                    [v.isoformat() if isinstance(v, (datetime, date)) else v for v in row] for row in batch
+                )
+                chunk = buffer.getvalue()
+            yield chunk
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+        return
+
+    async for batch in batches:
+        with timed(SERIALIZATION):
+            chunk = "".join(
+                json.dumps(dict(zip(columns, row)), default=_json_default) + "\n" for row in batch
+            )
+        yield chunk
+
+
+def stream_export(
+    batches: AsyncIterator[List[Row]],
+    columns: Sequence[str],
+    export_format: ExportFormat,
+    filename: str,
+) -> StreamingResponse:
+    """Stream row batches from a server-side cursor as NDJSON or CSV"""
+    extension = "csv" if export_format == ExportFormat.CSV else "ndjson"
+    return StreamingResponse(
+        _encode(batches, columns, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'},
+    )
@@ -3,60 +3,36 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import jwt
 from jwt.exceptions import InvalidTokenError
-import requests
 from functools import lru_cache
-from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicNumbers
-from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives import serialization
-import base64
-import json
+import hashlib
+import time
+from .cache import TTLCache
 from .config import get_settings
+from .jwks import get_jwks_provider
+from .timing import AUTH, timed
 
 security = HTTPBearer()
 
 
-def ensure_bytes(key: str) -> bytes:
-    if isinstance(key, str):
-        key = key.encode("utf-8")
-    return key
-
-
-def decode_value(val: str) -> int:
-    """Decode JWT base64 value to integer"""
-    decoded = base64.urlsafe_b64decode(ensure_bytes(val + "=" * (4 - len(val) % 4)))
-    return int.from_bytes(decoded, "big")
-
-
-def get_public_key(jwk: Dict) -> str:
-    """Convert JWK to PEM format"""
-    e = decode_value(jwk["e"])
-    n = decode_value(jwk["n"])
-
-    # Create RSA public key
-    public_numbers = RSAPublicNumbers(e=e, n=n)
-    public_key = public_numbers.public_key(backend=default_backend())
-
-    # Get PEM
-    pem = public_key.public_bytes(
-        encoding=serialization.Encoding.PEM,
-        format=serialization.PublicFormat.SubjectPublicKeyInfo,
-    )
-
-    return pem.decode("utf-8")
-
-
 @lru_cache()
-def get_auth0_public_key() -> Dict:
-    """Fetch and cache Auth0 public key for JWT validation"""
-    settings = get_settings()
-    jwks_url = f"https://{settings.AUTH0_DOMAIN}/.well-known/jwks.json"
-    response = requests.get(jwks_url)
-    return response.json()
+def get_token_cache() -> TTLCache:
+    """(kid, claims) of already verified tokens, keyed by the token's SHA-256"""
+    return TTLCache(maxsize=get_settings().AUTH_TOKEN_CACHE_SIZE)
 
 
-def decode_jwt_token(token: str) -> Dict:
+async def decode_jwt_token(token: str) -> Dict:
     """Decode and validate JWT token"""
     settings = get_settings()
+    token_cache = get_token_cache()
+    cache_key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    cached = token_cache.get(cache_key)
+    if cached is not None:
+        cached_kid, cached_payload = cached
+        # A key rotated out of the JWKS takes the tokens it signed with it
+        if get_jwks_provider().has_key(cached_kid):
+            return cached_payload
+        token_cache.delete(cache_key)
+
     try:
         # Decode without verification first to get the header
         unverified_header = jwt.get_unverified_header(token)
@@ -67,12 +43,7 @@ def decode_jwt_token(token: str) -> Dict:
             raise InvalidTokenError("No key ID in token header")
 
         # Find the matching public key
-        jwks = get_auth0_public_key()
-        key = None
-        for k in jwks["keys"]:
-            if k["kid"] == kid:
-                key = get_public_key(k)
-                break
+        key = await get_jwks_provider().get_key(kid)
 
         if not key:
             raise InvalidTokenError("No matching public key found")
@@ -87,6 +58,11 @@ def decode_jwt_token(token: str) -> Dict:
             leeway=1296000,  # 15 days in seconds
         )
 
+        # Reuse the verified claims until the token expires
+        ttl = payload.get("exp", 0) - time.time()
+        if ttl > 0:
+            token_cache.set(cache_key, (kid, payload), ttl=ttl)
+
         return payload
 
     except jwt.InvalidTokenError as e:
@@ -96,18 +72,18 @@ def decode_jwt_token(token: str) -> Dict:
         )
 
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
 ) -> Dict:
     """Dependency to get current authenticated user from token"""
     token = credentials.credentials
-    payload = decode_jwt_token(token)
+    with timed(AUTH):
+        payload = await decode_jwt_token(token)
 
     # Extract user info from token
     user = {
         "auth0_id": payload["sub"],  # This is the Auth0 user ID
         "email": payload.get("email"),
     }
-    print(user)
 
     return user
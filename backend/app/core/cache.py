@@ -0,0 +1,204 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Hashable, Optional, Protocol
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a time-to-live.
+
+    Used for in-process caches on the request path; ``maxsize`` bounds memory and
+    the least recently used entry is evicted first.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, deadline = entry
+            if deadline is not None and deadline <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store ``value``; ``ttl`` (seconds) overrides the cache-wide default"""
+        ttl = self.ttl if ttl is None else ttl
+        deadline = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, deadline)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CacheBackend(Protocol):
+    """Shared key/value store behind the response and count caches"""
+
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        ...
+
+    def incr(self, key: str) -> int:
+        ...
+
+
+class InMemoryCacheBackend:
+    """Per-process backend: an LRU/TTL cache plus counters that are never evicted.
+
+    Invalidation only reaches the worker that handled the write, so with several
+    workers other processes may serve entries until their TTL runs out.
+    """
+
+    def __init__(self, maxsize: int):
+        self._entries = TTLCache(maxsize=maxsize)
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        if key in self._counters:
+            return str(self._counters[key]).encode()
+        return self._entries.get(key)
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        self._entries.set(key, value, ttl=ttl)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+
+class RedisCacheBackend:
+    """Backend shared by all workers. ``client`` is anything with redis-py's
+    get/set(ex=)/incr API: redis.Redis, or a local stand-in such as fakeredis."""
+
+    def __init__(self, client, prefix: str = "ruh:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self.client.get(self.prefix + key)
+        return value.encode() if isinstance(value, str) else value
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        self.client.set(self.prefix + key, value, ex=ttl)
+
+    def incr(self, key: str) -> int:
+        return self.client.incr(self.prefix + key)
+
+
+class NullCacheBackend:
+    """Caching disabled: nothing is stored, so every lookup misses"""
+
+    def get(self, key: str) -> Optional[bytes]:
+        return None
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        pass
+
+    def incr(self, key: str) -> int:
+        return 0
+
+
+@lru_cache()
+def get_cache_backend() -> CacheBackend:
+    settings = get_settings()
+    if settings.CACHE_BACKEND == "redis":
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from e
+        return RedisCacheBackend(redis.Redis.from_url(settings.CACHE_REDIS_URL))
+    if settings.CACHE_BACKEND == "memory":
+        return InMemoryCacheBackend(maxsize=settings.CACHE_MAXSIZE)
+    return NullCacheBackend()
+
+
+def get_tenant_generation(auth0_id: str) -> Optional[int]:
+    """Counter bumped on every write by the tenant; cache keys embed it, so a
+    write makes all of the tenant's cached entries unreachable at once. None when
+    the backend can't be reached: callers then bypass the cache."""
+    try:
+        value = get_cache_backend().get(f"gen:{auth0_id}")
+    except Exception:
+        logger.exception("Could not read the tenant's cache generation; bypassing the cache")
+        return None
+    return int(value) if value else 0
+
+
+@lru_cache()
+def get_write_marker_store() -> Optional[CacheBackend]:
+    """Where read-your-writes markers are kept when read replicas are configured:
+    the Redis at CACHE_REDIS_URL, whatever CACHE_BACKEND is, since every worker
+    must see every tenant's writes. None without replicas."""
+    settings = get_settings()
+    if not settings.DATABASE_REPLICA_URLS:
+        return None
+    if not settings.CACHE_REDIS_URL:
+        raise RuntimeError("DATABASE_REPLICA_URLS requires CACHE_REDIS_URL for read-your-writes")
+    try:
+        import redis
+    except ImportError as e:
+        raise RuntimeError("DATABASE_REPLICA_URLS requires the 'redis' package") from e
+    return RedisCacheBackend(redis.Redis.from_url(settings.CACHE_REDIS_URL))
+
+
+def bump_tenant_generation(auth0_id: str) -> None:
+    """Called after each committed write by the tenant. With read replicas this
+    also opens the tenant's read-your-writes window (see ``wrote_recently``).
+
+    Never raises: the write is already committed, so a cache outage must not turn
+    it into an error (and a retried duplicate). Entries cached before the write
+    then stay reachable until their TTL runs out."""
+    try:
+        get_cache_backend().incr(f"gen:{auth0_id}")
+    except Exception:
+        logger.exception("Could not bump the tenant's cache generation; cached entries expire by TTL")
+    store = get_write_marker_store()
+    window = get_settings().READ_YOUR_WRITES_SECONDS
+    if store is not None and window > 0:
+        try:
+            store.set(f"wrote:{auth0_id}", b"1", ttl=window)
+        except Exception:
+            logger.exception("Could not set the read-your-writes marker; the tenant's reads may lag its write")
+
+
+def wrote_recently(auth0_id: str) -> bool:
+    """Whether the tenant wrote within the last READ_YOUR_WRITES_SECONDS, so its
+    reads must not go to a replica that may not have the write yet. Also true when
+    the marker can't be read: the primary is always safe."""
+    store = get_write_marker_store()
+    if store is None:
+        return False
+    try:
+        return store.get(f"wrote:{auth0_id}") is not None
+    except Exception:
+        logger.exception("Could not read the read-your-writes marker; reading from the primary")
+        return True
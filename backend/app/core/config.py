@@ -1,8 +1,23 @@
 from pydantic_settings import BaseSettings
+from datetime import time
 from functools import lru_cache
 from typing import List, Union
 from pydantic import AnyHttpUrl, validator
 
+
+def async_database_url(url: str) -> str:
+    """``url`` with the sync driver swapped for its async counterpart"""
+    url = url.replace("postgres://", "postgresql://")
+    for sync_driver, async_driver in (
+        ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ):
+        if url.startswith(sync_driver):
+            return async_driver + url[len(sync_driver):]
+    return url
+
+
 class Settings(BaseSettings):
     # Core Settings
     APP_NAME: str = "Appointment Management System"
@@ -20,7 +35,111 @@ class Settings(BaseSettings):
         if v:
             return v
         return f"postgresql+psycopg2://{values['DATABASE_USERNAME']}:{values['DATABASE_PASSWORD']}@{values['DATABASE_HOST']}:{values['DATABASE_PORT']}/{values['DATABASE_NAME']}"
+
+    # Run the API on an AsyncEngine (asyncpg) instead of the blocking psycopg2 engine
+    DATABASE_ASYNC: bool = False
+    ASYNC_DATABASE_URL: str | None = None
+
+    @validator("ASYNC_DATABASE_URL", pre=True)
+    def assemble_async_db_url(cls, v: str | None, values: dict) -> str:
+        if v:
+            return v
+        return async_database_url(values["DATABASE_URL"])
+
+    # Read replicas for the list and detail GETs, as a JSON list of URLs (async
+    # URLs are derived like ASYNC_DATABASE_URL). Empty: everything uses the primary.
+    # Needs CACHE_REDIS_URL, where workers share read-your-writes markers
+    DATABASE_REPLICA_URLS: List[str] = []
+    # Seconds between replica health checks, and the replication lag beyond which
+    # a replica is skipped (unset: lag is not checked)
+    REPLICA_HEALTH_CHECK_INTERVAL: float = 5
+    REPLICA_MAX_LAG_SECONDS: float | None = 5
+    # After a write, the tenant's reads stay on the primary for this many seconds;
+    # keep it above REPLICA_MAX_LAG_SECONDS
+    READ_YOUR_WRITES_SECONDS: int = 10
+
+    # Connection pool (applies to both engines). DB_POOL_RECYCLE=-1 never recycles.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    # Ping on every checkout; disable when connections are rarely dropped
+    DB_POOL_PRE_PING: bool = True
+    # Behind PgBouncer (transaction pooling): no app-side pool, no prepared statements
+    DB_PGBOUNCER: bool = False
+
+    # Serve Prometheus metrics at /metrics
+    METRICS_ENABLED: bool = True
+
+    # Log statements slower than this (milliseconds); unset to disable
+    SLOW_QUERY_THRESHOLD_MS: float | None = 500
+    # Requests carrying this header from a token with PROFILER_PERMISSION get a
+    # profile and query timeline back instead of the normal response
+    PROFILER_HEADER: str = "X-Profile"
+    PROFILER_PERMISSION: str = "debug:profile"
     
+    # Appointment length when none is given (minutes)
+    APPOINTMENT_DEFAULT_DURATION: int = 60
+    # Availability: default working hours (in the requested time zone) and the
+    # longest date range one request may cover
+    AVAILABILITY_DAY_START: time = time(9, 0)
+    AVAILABILITY_DAY_END: time = time(17, 0)
+    AVAILABILITY_MAX_DAYS: int = 62
+    # Recurring series: most occurrences a bounded (COUNT/UNTIL) rule may have, and
+    # how far ahead a new series is checked for overlaps
+    SERIES_MAX_OCCURRENCES: int = 1000
+    SERIES_CONFLICT_HORIZON_DAYS: int = 366
+    # Appointment partitions (PostgreSQL, see db/partitions.py): months created ahead
+    # by `maintain`, past months kept attached by `archive`, and an optional
+    # tablespace archived months are moved to
+    PARTITION_PREMAKE_MONTHS: int = 3
+    PARTITION_ARCHIVE_AFTER_MONTHS: int = 24
+    PARTITION_ARCHIVE_TABLESPACE: str | None = None
+    # Dashboard stats: longest date range one request may cover
+    STATS_MAX_DAYS: int = 366
+
+    # Max appointments embedded in GET /clients/{id}; the rest via /clients/{id}/appointments
+    CLIENT_APPOINTMENTS_PREVIEW_LIMIT: int = 10
+
+    # Bulk imports: rows per INSERT/transaction, and max rows per request
+    BULK_CHUNK_SIZE: int = 1000
+    BULK_MAX_ROWS: int = 50000
+
+    # Rows fetched per server-side cursor round-trip when streaming exports
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # Default total for offset listings: "exact", "cached" (until the tenant's next
+    # write; needs a CACHE_BACKEND other than "none") or "estimated" (PostgreSQL
+    # planner, exact below the threshold)
+    COUNT_STRATEGY: str = "exact"
+    COUNT_CACHE_TTL: int = 300
+    COUNT_ESTIMATE_THRESHOLD: int = 10000
+
+    # Appointment change events (GET /appointments/stream): "postgres" fans out
+    # across workers with LISTEN/NOTIFY; "memory" reaches only the writing process
+    # (used automatically on other databases)
+    EVENTS_BACKEND: str = "postgres"
+    EVENTS_CHANNEL: str = "appointment_events"
+    # Direct connection for LISTEN when DATABASE_URL points at PgBouncer
+    EVENTS_LISTEN_URL: str | None = None
+    # Seconds between keep-alive comments, and events buffered per open stream
+    EVENTS_HEARTBEAT_INTERVAL: float = 15
+    EVENTS_QUEUE_SIZE: int = 100
+
+    # Delta sync (GET .../changes): max rows per page. On PostgreSQL changes are
+    # served up to the start of the oldest open transaction; SQLite can't see those,
+    # so there a change is only served once it is CHANGES_SETTLE_SECONDS old
+    CHANGES_MAX_LIMIT: int = 1000
+    CHANGES_SETTLE_SECONDS: float = 5
+
+    # Response cache: "none", "redis" (shared, needs CACHE_REDIS_URL) or "memory".
+    # "memory" is per process, so only use it with a single worker: other workers
+    # would keep serving entries a write has invalidated until RESPONSE_CACHE_TTL
+    CACHE_BACKEND: str = "none"
+    CACHE_REDIS_URL: str | None = None
+    CACHE_MAXSIZE: int = 10000
+    RESPONSE_CACHE_TTL: int = 60
+
     # CORS Settings
     BACKEND_CORS_ORIGINS: List[Union[str, AnyHttpUrl]] = ["*"]  # Allow all origins
     
@@ -32,6 +151,15 @@ class Settings(BaseSettings):
     AUTH0_CLIENT_ID: str
     AUTH0_CLIENT_SECRET: str
     AUTH0_AUDIENCE: str
+    # JWKS source: Auth0's jwks.json unless JWKS_URL or a local JWKS_FILE is given
+    JWKS_URL: str | None = None
+    JWKS_FILE: str | None = None
+    JWKS_FETCH_TIMEOUT: float = 5.0
+    JWKS_REFRESH_INTERVAL: int = 3600
+    # Minimum seconds between refetches triggered by an unknown kid
+    JWKS_MIN_REFETCH_INTERVAL: int = 60
+    # Max number of verified tokens whose claims are kept in memory (0 disables)
+    AUTH_TOKEN_CACHE_SIZE: int = 1024
 
     class Config:
         env_file = ".env"
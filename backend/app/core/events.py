@@ -0,0 +1,192 @@
+import asyncio
+import json
+import logging
+from functools import lru_cache
+from typing import Dict, List, Optional, Set
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from .config import get_settings
+from .metrics import Gauge
+
+logger = logging.getLogger(__name__)
+
+CREATED = "created"
+UPDATED = "updated"
+DELETED = "deleted"
+# The client should refetch: sent to a stream that fell too far behind, and for
+# series changes, which touch occurrences that have no ids
+RESYNC = "resync"
+
+# NOTIFY payloads must stay under 8000 bytes; larger id lists are sent as null
+MAX_PAYLOAD_BYTES = 7500
+
+# Session.info key of the events waiting for the transaction to commit
+_PENDING = "appointment_events"
+
+SUBSCRIBERS = Gauge("events_stream_subscribers", "Open appointment event streams in this process")
+
+
+class EventBroker:
+    """Per-process fan-out of appointment events to the open streams of a tenant.
+
+    Each stream gets a bounded queue; one that falls behind has its backlog
+    replaced by a single RESYNC event instead of growing without limit.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        SUBSCRIBERS.set_function(lambda: sum(len(queues) for queues in self._subscribers.values()))
+
+    def subscribe(self, auth0_id: str) -> asyncio.Queue:
+        self._loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(auth0_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, auth0_id: str, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(auth0_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[auth0_id]
+
+    def dispatch(self, auth0_id: str, payload: Dict) -> None:
+        """Deliver to the tenant's streams; must run on the event loop"""
+        for queue in self._subscribers.get(auth0_id, ()):
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"type": RESYNC, "ids": None})
+
+    def dispatch_all(self, payload: Dict) -> None:
+        for auth0_id in list(self._subscribers):
+            self.dispatch(auth0_id, payload)
+
+    def dispatch_threadsafe(self, auth0_id: str, payload: Dict) -> None:
+        """``dispatch`` from any thread (e.g. a sync service in the threadpool)"""
+        if self._loop is None or self._loop.is_closed() or auth0_id not in self._subscribers:
+            return
+        self._loop.call_soon_threadsafe(self.dispatch, auth0_id, payload)
+
+
+class PostgresEventListener:
+    """LISTENs on the events channel over a dedicated asyncpg connection and
+    dispatches notifications from every worker to this process's streams.
+
+    The connection is re-established after a drop; events sent meanwhile are
+    lost, so streams get a RESYNC when listening resumes.
+    """
+
+    def __init__(self, dsn: str, channel: str, broker: EventBroker, retry_interval: float = 5.0):
+        self.dsn = dsn
+        self.channel = channel
+        self.broker = broker
+        self.retry_interval = retry_interval
+        self._task: Optional[asyncio.Task] = None
+
+    def _on_notification(self, connection, pid, channel, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+            self.broker.dispatch(message.pop("auth0_id"), message)
+        except (ValueError, KeyError):
+            logger.warning("Ignoring malformed event notification %r", payload)
+
+    async def _listen(self) -> None:
+        import asyncpg
+
+        resumed = False
+        while True:
+            try:
+                connection = await asyncpg.connect(self.dsn)
+            except Exception:
+                logger.exception("Event listener could not connect; retrying in %ss", self.retry_interval)
+                await asyncio.sleep(self.retry_interval)
+                continue
+            closed = asyncio.get_running_loop().create_future()
+            connection.add_termination_listener(lambda _: closed.done() or closed.set_result(None))
+            try:
+                await connection.add_listener(self.channel, self._on_notification)
+                if resumed:
+                    self.broker.dispatch_all({"type": RESYNC, "ids": None})
+                resumed = True
+                await closed
+                logger.warning("Event listener connection closed; reconnecting")
+            finally:
+                if not connection.is_closed():
+                    await connection.close()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+@lru_cache()
+def get_event_broker() -> EventBroker:
+    return EventBroker(queue_size=get_settings().EVENTS_QUEUE_SIZE)
+
+
+def _uses_notify(session: Session) -> bool:
+    return get_settings().EVENTS_BACKEND == "postgres" and session.get_bind().dialect.name == "postgresql"
+
+
+def get_event_listener(database_url: str) -> Optional[PostgresEventListener]:
+    """The LISTEN task this process needs, if events go through Postgres"""
+    settings = get_settings()
+    if settings.EVENTS_BACKEND != "postgres" or not database_url.startswith("postgresql"):
+        return None
+    # asyncpg takes a plain libpq URL, without SQLAlchemy's driver suffix
+    dsn = settings.EVENTS_LISTEN_URL or database_url
+    dsn = "postgresql://" + dsn.split("://", 1)[1]
+    return PostgresEventListener(dsn, settings.EVENTS_CHANNEL, get_event_broker())
+
+
+def queue_event(session: Session, auth0_id: str, event_type: str, ids: Optional[List[int]]) -> None:
+    """Announce an appointment change once ``session``'s transaction commits.
+
+    With EVENTS_BACKEND=postgres the event is a NOTIFY issued inside the
+    transaction, which Postgres delivers to every worker's listener on commit;
+    otherwise it is dispatched in this process after the commit. Either way a
+    rolled back change is never announced.
+    """
+    session.info.setdefault(_PENDING, []).append({"auth0_id": auth0_id, "type": event_type, "ids": ids})
+
+
+@event.listens_for(Session, "before_commit")
+def _notify_pending(session: Session) -> None:
+    pending = session.info.get(_PENDING)
+    if not pending or not _uses_notify(session):
+        return
+    channel = get_settings().EVENTS_CHANNEL
+    for message in pending:
+        payload = json.dumps(message)
+        if len(payload.encode("utf-8")) > MAX_PAYLOAD_BYTES:
+            payload = json.dumps({**message, "ids": None})
+        session.execute(select(func.pg_notify(channel, payload)))
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_pending(session: Session) -> None:
+    pending = session.info.pop(_PENDING, None)
+    if not pending or _uses_notify(session):
+        return
+    broker = get_event_broker()
+    for message in pending:
+        broker.dispatch_threadsafe(message["auth0_id"], {"type": message["type"], "ids": message["ids"]})
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING, None)
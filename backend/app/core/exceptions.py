@@ -1,3 +1,4 @@
+from typing import List, Optional
 from fastapi import HTTPException, status
 
 class AppointmentException(HTTPException):
@@ -18,6 +19,49 @@ class AppointmentNotFoundException(AppointmentException):
             detail=f"Appointment with id {appointment_id} not found"
         )
 
+class AppointmentConflictException(AppointmentException):
+    def __init__(self, conflicting_id: Optional[int] = None):
+        overlapped = f"appointment {conflicting_id}" if conflicting_id is not None else "another appointment"
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Appointment overlaps {overlapped}"
+        )
+
+class InvalidAvailabilityRequestException(AppointmentException):
+    def __init__(self, detail: str):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid availability request: {detail}"
+        )
+
+class InvalidDateRangeException(AppointmentException):
+    def __init__(self, detail: str):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid date range: {detail}"
+        )
+
+class SeriesNotFoundException(AppointmentException):
+    def __init__(self, series_id: int):
+        super().__init__(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Appointment series with id {series_id} not found"
+        )
+
+class OccurrenceNotFoundException(AppointmentException):
+    def __init__(self, series_id: int, occurrence_time: str):
+        super().__init__(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Appointment series {series_id} has no occurrence at {occurrence_time}"
+        )
+
+class InvalidRecurrenceRuleException(AppointmentException):
+    def __init__(self, detail: str):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid recurrence rule: {detail}"
+        )
+
 class DatabaseOperationException(AppointmentException):
     def __init__(self, operation: str, detail: str):
         super().__init__(
@@ -34,4 +78,44 @@ class EmailAlreadyExistsException(ClientException):
         super().__init__(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Email {email} is already registered"
-        ) 
\ No newline at end of file
+        ) 
+
+class InvalidCursorException(AppointmentException, ClientException):
+    """Raised by both appointment and client listings for a malformed cursor"""
+    def __init__(self, detail: str):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid pagination cursor: {detail}"
+        )
+
+
+class InvalidFieldsException(AppointmentException, ClientException):
+    """Raised for ``fields=`` names the endpoint cannot select"""
+    def __init__(self, unknown: List[str], allowed: List[str]):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}; allowed: {', '.join(allowed)}"
+        )
+
+class InvalidSyncTokenException(AppointmentException, ClientException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid sync token: malformed or issued for another resource"
+        )
+
+class UnsupportedImportFormatException(AppointmentException, ClientException):
+    def __init__(self, content_type: str):
+        super().__init__(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Unsupported import format {content_type!r}; "
+                   "use application/json, application/x-ndjson or text/csv"
+        )
+
+
+class ImportTooLargeException(AppointmentException, ClientException):
+    def __init__(self, max_rows: int):
+        super().__init__(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Import exceeds the limit of {max_rows} rows per request"
+        )
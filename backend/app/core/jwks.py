@@ -0,0 +1,159 @@
+import asyncio
+import base64
+import json
+import logging
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Protocol
+import httpx
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey, RSAPublicNumbers
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def ensure_bytes(key: str) -> bytes:
+    if isinstance(key, str):
+        key = key.encode("utf-8")
+    return key
+
+
+def decode_value(val: str) -> int:
+    """Decode JWT base64 value to integer"""
+    decoded = base64.urlsafe_b64decode(ensure_bytes(val + "=" * (4 - len(val) % 4)))
+    return int.from_bytes(decoded, "big")
+
+
+def load_public_key(jwk: Dict) -> RSAPublicKey:
+    """Convert JWK to an RSA public key object PyJWT can verify with directly"""
+    e = decode_value(jwk["e"])
+    n = decode_value(jwk["n"])
+
+    public_numbers = RSAPublicNumbers(e=e, n=n)
+    return public_numbers.public_key(backend=default_backend())
+
+
+class JWKSSource(Protocol):
+    """Where the JSON Web Key Set comes from"""
+
+    async def fetch(self) -> Dict:
+        ...
+
+
+class HTTPJWKSSource:
+    """JWKS served over HTTPS, e.g. Auth0's /.well-known/jwks.json"""
+
+    def __init__(self, url: str, timeout: float):
+        self.url = url
+        self.timeout = timeout
+
+    async def fetch(self) -> Dict:
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            response = await client.get(self.url)
+            response.raise_for_status()
+            return response.json()
+
+
+class FileJWKSSource:
+    """JWKS read from a local JSON file, for tests and offline development"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    async def fetch(self) -> Dict:
+        return json.loads(await asyncio.to_thread(self.path.read_text))
+
+
+class JWKSProvider:
+    """Signing keys indexed by kid, refreshed in the background.
+
+    Keys are preloaded at startup and re-fetched every ``refresh_interval`` seconds.
+    A token signed with an unknown kid (key rotation) triggers an immediate refetch,
+    at most once per ``min_refetch_interval`` so bogus kids cannot hammer the source.
+    """
+
+    def __init__(self, source: JWKSSource, refresh_interval: float, min_refetch_interval: float):
+        self.source = source
+        self.refresh_interval = refresh_interval
+        self.min_refetch_interval = min_refetch_interval
+        self._keys: Dict[str, RSAPublicKey] = {}
+        # Successful or not: failed fetches count against min_refetch_interval too
+        self._last_attempt: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh(self) -> None:
+        """Fetch the key set and swap it in; concurrent callers share one fetch
+        (and its failure)"""
+        started = time.monotonic()
+        async with self._lock:
+            if self._last_attempt is not None and self._last_attempt >= started:
+                return
+            try:
+                jwks = await self.source.fetch()
+                self._keys = {
+                    jwk["kid"]: load_public_key(jwk)
+                    for jwk in jwks.get("keys", [])
+                    if jwk.get("kty") == "RSA" and "kid" in jwk
+                }
+            finally:
+                self._last_attempt = time.monotonic()
+
+    def has_key(self, kid: str) -> bool:
+        """Whether ``kid`` is in the current key set (no fetch)"""
+        return kid in self._keys
+
+    async def get_key(self, kid: str) -> Optional[RSAPublicKey]:
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+
+        if self._last_attempt is None or time.monotonic() - self._last_attempt >= self.min_refetch_interval:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Failed to refresh JWKS for unknown kid %s", kid)
+        return self._keys.get(kid)
+
+    async def _refresh_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Background JWKS refresh failed; keeping previous keys")
+
+    async def start(self) -> None:
+        """Preload the keys and start the background refresh task"""
+        try:
+            await self.refresh()
+        except Exception:
+            logger.exception("Initial JWKS fetch failed; will retry on demand")
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+@lru_cache()
+def get_jwks_provider() -> JWKSProvider:
+    settings = get_settings()
+    if settings.JWKS_FILE:
+        source = FileJWKSSource(settings.JWKS_FILE)
+    else:
+        jwks_url = settings.JWKS_URL or f"https://{settings.AUTH0_DOMAIN}/.well-known/jwks.json"
+        source = HTTPJWKSSource(jwks_url, timeout=settings.JWKS_FETCH_TIMEOUT)
+    return JWKSProvider(
+        source,
+        refresh_interval=settings.JWKS_REFRESH_INTERVAL,
+        min_refetch_interval=settings.JWKS_MIN_REFETCH_INTERVAL,
+    )
@@ -0,0 +1,62 @@
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .metrics import Counter, Gauge, Histogram
+from .timing import AUTH, DB, SERIALIZATION, track_request
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request until its response body is sent",
+    ["method", "route"],
+)
+REQUESTS = Counter("http_requests_total", "Completed requests", ["method", "route", "status"])
+IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being handled", ["method"])
+PHASE_SECONDS = Histogram(
+    "http_request_phase_seconds",
+    "Request time by phase: auth (token verification), db (statement execution), "
+    "serialization (response encoding) and app (everything else)",
+    ["route", "phase"],
+)
+
+
+class MetricsMiddleware:
+    """Per-route latency, status and phase metrics for every HTTP request.
+
+    A plain ASGI middleware, so streaming responses are timed until their last
+    chunk is sent and are never buffered.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_flight = IN_FLIGHT.labels(method=method)
+        in_flight.inc()
+        start = time.perf_counter()
+        with track_request(scope) as timings:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                elapsed = time.perf_counter() - start
+                in_flight.dec()
+                route = timings.route
+                REQUEST_SECONDS.labels(method=method, route=route).observe(elapsed)
+                REQUESTS.labels(method=method, route=route, status=str(status_code)).inc()
+                accounted = 0.0
+                for phase in (AUTH, DB, SERIALIZATION):
+                    seconds = timings.phases.get(phase, 0.0)
+                    accounted += seconds
+                    PHASE_SECONDS.labels(route=route, phase=phase).observe(seconds)
+                PHASE_SECONDS.labels(route=route, phase="app").observe(max(elapsed - accounted, 0.0))
@@ -0,0 +1,139 @@
+import cProfile
+import io
+import json
+import pstats
+import time
+from typing import Dict, Optional
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .auth import decode_jwt_token
+from .config import get_settings
+from .timing import current_timings
+
+try:
+    from pyinstrument import Profiler as _Pyinstrument
+except ImportError:  # optional; fall back to cProfile
+    _Pyinstrument = None
+
+
+class _CProfile:
+    """Deterministic profile of the event-loop thread; work handed to the
+    threadpool (sync database mode) shows up only as the await on it."""
+    name = "cprofile"
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+
+    def start(self) -> None:
+        self._profile.enable()
+
+    def stop(self) -> str:
+        self._profile.disable()
+        out = io.StringIO()
+        pstats.Stats(self._profile, stream=out).sort_stats("cumulative").print_stats(60)
+        return out.getvalue()
+
+
+class _PyinstrumentProfile:
+    """Sampling profile that follows the request across awaits"""
+    name = "pyinstrument"
+
+    def __init__(self):
+        self._profiler = _Pyinstrument(async_mode="enabled")
+
+    def start(self) -> None:
+        self._profiler.start()
+
+    def stop(self) -> str:
+        self._profiler.stop()
+        return self._profiler.output_text(unicode=False, color=False)
+
+
+class ProfilerMiddleware:
+    """Opt-in per-request profiling for production diagnosis.
+
+    A request that sends PROFILER_HEADER with a bearer token holding
+    PROFILER_PERMISSION is handled normally, but gets back a JSON report (status,
+    timings, profile and the query timeline) instead of its response body. Only
+    one request is profiled at a time; others are served normally meanwhile.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._busy = False
+
+    async def _authorized(self, headers: Headers) -> bool:
+        settings = get_settings()
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return False
+        try:
+            payload = await decode_jwt_token(token)
+        except HTTPException:
+            return False
+        return settings.PROFILER_PERMISSION in payload.get("permissions", [])
+
+    async def _profile(self, scope: Scope, receive: Receive) -> Dict:
+        response: Dict[str, Optional[int]] = {"status_code": None, "bytes": 0}
+
+        async def capture(message: Message) -> None:
+            # The profiled response is measured, not sent
+            if message["type"] == "http.response.start":
+                response["status_code"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["bytes"] += len(message.get("body", b""))
+
+        timings = current_timings()
+        if timings is not None:
+            timings.queries = []
+
+        profiler = _PyinstrumentProfile() if _Pyinstrument is not None else _CProfile()
+        start = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            profile = profiler.stop()
+
+        return {
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": timings.route if timings else None,
+            "response": response,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+            "phases_ms": {k: round(v * 1000, 3) for k, v in timings.phases.items()} if timings else {},
+            "queries": timings.queries if timings else [],
+            "profiler": profiler.name,
+            "profile": profile,
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._busy or get_settings().PROFILER_HEADER not in Headers(scope=scope):
+            await self.app(scope, receive, send)
+            return
+
+        # Claim the profiler before the first await, so two requests can never
+        # both pass the check and run profilers at once
+        self._busy = True
+        report = None
+        try:
+            if await self._authorized(Headers(scope=scope)):
+                report = await self._profile(scope, receive)
+        finally:
+            self._busy = False
+        if report is None:
+            await self.app(scope, receive, send)
+            return
+
+        body = json.dumps(report).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("ascii")),
+                (b"cache-control", b"no-store"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
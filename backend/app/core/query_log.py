@@ -0,0 +1,60 @@
+import logging
+import re
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Optional
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Expanded IN lists / multi-row VALUES: (?, ?, ?) or (%(id_1_1)s, %(id_1_2)s) or ($1, $2)
+_PLACEHOLDER = r"(?:\?|%\(\w+\)s|%s|\$\d+|:\w+)"
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER}){{2,}}\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+_SAFE_TYPES = (bool, int, float, Decimal, date, datetime, time, type(None))
+
+
+def normalize_sql(statement: str) -> str:
+    """Single-line SQL with placeholder lists collapsed, so repeats group together"""
+    return _PLACEHOLDER_LIST.sub("(...)", _WHITESPACE.sub(" ", statement).strip())
+
+
+def _redact_value(value: Any) -> Any:
+    if isinstance(value, _SAFE_TYPES):
+        return value.isoformat() if isinstance(value, (date, datetime, time)) else value
+    if isinstance(value, str):
+        # Names, emails, phones, notes and tenant ids are never written to logs
+        return f"<str len={len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def redact_parameters(parameters: Any) -> Any:
+    """Parameters with strings and other personal data replaced by placeholders"""
+    if isinstance(parameters, dict):
+        return {key: _redact_value(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return f"<{len(parameters)} rows>"  # executemany
+        return [_redact_value(value) for value in parameters]
+    return _redact_value(parameters)
+
+
+def log_slow_query(
+    statement: str,
+    parameters: Any,
+    seconds: float,
+    method: Optional[str] = None,
+    route: Optional[str] = None,
+) -> None:
+    """Log ``statement`` if it ran longer than SLOW_QUERY_THRESHOLD_MS"""
+    threshold = get_settings().SLOW_QUERY_THRESHOLD_MS
+    duration_ms = seconds * 1000
+    if threshold is None or duration_ms < threshold:
+        return
+    sql = normalize_sql(statement)
+    params = redact_parameters(parameters)
+    logger.warning(
+        "Slow query (%.1f ms) during %s %s: %s | params=%s",
+        duration_ms, method or "-", route or "-", sql, params,
+        extra={"duration_ms": duration_ms, "route": route, "method": method, "sql": sql, "params": params},
+    )
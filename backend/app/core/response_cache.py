@@ -0,0 +1,75 @@
+import hashlib
+import logging
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Optional
+import orjson
+from fastapi import Request, Response, status
+from pydantic import TypeAdapter
+from .cache import get_cache_backend, get_tenant_generation
+from .config import get_settings
+from .timing import SERIALIZATION, timed
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def _adapter(response_model: Any) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+
+def _cache_key(request: Request, auth0_id: str) -> Optional[str]:
+    generation = get_tenant_generation(auth0_id)
+    if generation is None:
+        return None
+    # Same path + same query params in any order -> same entry
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()) if v != "")
+    digest = hashlib.sha256(f"{request.url.path}?{query}".encode("utf-8")).hexdigest()
+    return f"resp:{auth0_id}:{generation}:{digest}"
+
+
+async def cached_response(
+    request: Request,
+    auth0_id: str,
+    response_model: Any,
+    compute: Callable[[], Awaitable[Any]],
+    validate: bool = True,
+) -> Response:
+    """Serve a tenant-scoped GET from the response cache, computing it on a miss.
+
+    The serialized body is cached under the tenant's current generation, so any
+    write by the tenant invalidates it. Responses carry an ETag; a matching
+    If-None-Match gets an empty 304.
+
+    ``validate=False`` is for results already shaped like ``response_model``
+    (plain dicts from a column projection): they are encoded with orjson as is.
+
+    A cache backend that can't be reached counts as a miss, never as an error.
+    """
+    backend = get_cache_backend()
+    key = _cache_key(request, auth0_id)
+    body = None
+    if key is not None:
+        try:
+            body = backend.get(key)
+        except Exception:
+            logger.exception("Response cache read failed; computing the response")
+    if body is None:
+        result = await compute()
+        with timed(SERIALIZATION):
+            if validate:
+                adapter = _adapter(response_model)
+                body = adapter.dump_json(adapter.validate_python(result, from_attributes=True))
+            else:
+                # UTC as "Z", like pydantic, so both paths emit identical JSON
+                body = orjson.dumps(result, option=orjson.OPT_UTC_Z)
+        if key is not None:
+            try:
+                backend.set(key, body, ttl=get_settings().RESPONSE_CACHE_TTL)
+            except Exception:
+                logger.exception("Response cache write failed")
+
+    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,12 @@
+from typing import Any
+from fastapi.responses import ORJSONResponse
+from .timing import SERIALIZATION, timed
+
+
+class TimedJSONResponse(ORJSONResponse):
+    """orjson-encoded response whose encoding counts towards the request's
+    serialization time; the app's default response class"""
+
+    def render(self, content: Any) -> bytes:
+        with timed(SERIALIZATION):
+            return super().render(content)
@@ -0,0 +1,109 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from .query_log import log_slow_query, normalize_sql
+
+# Phases reported separately in http_request_phase_seconds; the rest is "app"
+AUTH = "auth"
+DB = "db"
+SERIALIZATION = "serialization"
+
+
+class RequestTimings:
+    """Seconds spent per phase while handling one request.
+
+    Shared by reference with the threadpool and the async-session greenlets the
+    request runs in, so time recorded there lands on the same object.
+    """
+
+    def __init__(self, scope: Dict):
+        self.scope = scope
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = defaultdict(float)
+        # Per-statement timeline, only collected for profiled requests
+        self.queries: Optional[List[Dict]] = None
+
+    @property
+    def route(self) -> str:
+        """Path template of the matched route, e.g. /api/v1/clients/{client_id}"""
+        route = self.scope.get("route")
+        return getattr(route, "path_format", None) or "unmatched"
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.phases[phase] += seconds
+
+    def add_query(self, statement: str, started: float, seconds: float) -> None:
+        self.add(DB, seconds)
+        if self.queries is not None:
+            self.queries.append({
+                "start_ms": round((started - self.started) * 1000, 3),
+                "duration_ms": round(seconds * 1000, 3),
+                "sql": normalize_sql(statement),
+            })
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+@contextmanager
+def track_request(scope: Dict) -> Iterator[RequestTimings]:
+    timings = RequestTimings(scope)
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """Attribute the enclosed block to ``phase`` of the current request, if any"""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, time.perf_counter() - start)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start_time"].pop()
+    seconds = time.perf_counter() - started
+    timings = _current.get()
+    if timings is None:
+        log_slow_query(statement, parameters, seconds)
+        return
+    timings.add_query(statement, started, seconds)
+    log_slow_query(statement, parameters, seconds, timings.scope.get("method"), timings.route)
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start_time"):
+        _after_cursor_execute(
+            conn, None, exception_context.statement or "", exception_context.parameters, None, False
+        )
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Count the time ``engine`` spends executing statements as DB time and log
+    statements slower than SLOW_QUERY_THRESHOLD_MS"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
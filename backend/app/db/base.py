@@ -1,2 +1,2 @@
 from app.db.base_class import Base
-from app.db.models import Client, Appointment  # noqa 
\ No newline at end of file
+from app.db.models import Client, Appointment, AppointmentSeries, AppointmentDailyStats, Tombstone  # noqa 
\ No newline at end of file
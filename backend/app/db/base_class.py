@@ -12,5 +12,6 @@ class Base:
     def __tablename__(cls) -> str:
         return cls.__name__.lower()
     
-    # Add auth0_id to all models
-    auth0_id = Column(String(255), nullable=False, index=True) 
\ No newline at end of file
+    # Add auth0_id to all models. Every query is tenant-scoped, so each table indexes
+    # it as the leading column of composite indexes matching its access paths.
+    auth0_id = Column(String(255), nullable=False) 
\ No newline at end of file
@@ -1,31 +1,135 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Boolean, Index, PrimaryKeyConstraint, text
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base_class import Base
 
+
+@compiles(PrimaryKeyConstraint, "postgresql")
+def _compile_primary_key(constraint, compiler, **kw):
+    """A partitioned table's primary key must include its partition key (table
+    info "partition_key"); the ORM keeps identifying rows by id alone"""
+    ddl = compiler.visit_primary_key_constraint(constraint, **kw)
+    key = constraint.table.info.get("partition_key")
+    if key and key not in constraint.columns:
+        head, _, tail = ddl.rpartition(")")
+        ddl = f"{head}, {compiler.preparer.quote(key)}){tail}"
+    return ddl
+
 class Client(Base):
     __tablename__ = "clients"
+    __table_args__ = (
+        # Keyset pagination of client listings: (name, id) within a tenant
+        Index("ix_clients_auth0_id_name_id", "auth0_id", "name", "id"),
+        # Email lookups (duplicate check on create); emails are unique per tenant
+        Index("ix_clients_auth0_id_email", "auth0_id", "email", unique=True),
+        # pg_trgm indexes backing ILIKE '%term%' and fuzzy search (see services/search.py)
+        Index("ix_clients_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_clients_email_trgm", "email", postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"}),
+        Index("ix_clients_phone_trgm", "phone", postgresql_using="gin", postgresql_ops={"phone": "gin_trgm_ops"}),
+        # Delta sync: rows changed since a (updated_at, id) watermark
+        Index("ix_clients_auth0_id_updated_at_id", "auth0_id", "updated_at", "id"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
-    email = Column(String, unique=True, index=True)
+    email = Column(String)
     phone = Column(String)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Set on insert too, so every row has a delta-sync watermark
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
 
     # Relationships
     appointments = relationship("Appointment", back_populates="client")
 
 class Appointment(Base):
     __tablename__ = "appointments"
+    __table_args__ = (
+        # Keyset pagination of appointment listings: (time, id) within a tenant / client
+        Index("ix_appointments_auth0_id_time_id", "auth0_id", "time", "id"),
+        Index("ix_appointments_auth0_id_client_id_time_id", "auth0_id", "client_id", "time", "id"),
+        # Status-filtered listings
+        Index("ix_appointments_auth0_id_status_time_id", "auth0_id", "status", "time", "id"),
+        # Delta sync: rows changed since a (updated_at, id) watermark
+        Index("ix_appointments_auth0_id_updated_at_id", "auth0_id", "updated_at", "id"),
+        # Materialized occurrences of a series. Not unique: a partitioned table's unique
+        # indexes must include time, so update_occurrence locks the series instead
+        Index("ix_appointments_series_id_occurrence_time", "series_id", "occurrence_time"),
+        # On PostgreSQL, monthly range partitions on time (see db/partitions.py), each
+        # with an exclusion constraint keeping a tenant's active appointments from
+        # overlapping; its GiST index also serves availability range queries
+        {"postgresql_partition_by": "RANGE (time)", "info": {"partition_key": "time"}},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     client_id = Column(Integer, ForeignKey("clients.id"))
     time = Column(DateTime(timezone=True), nullable=False)
+    duration_minutes = Column(Integer, nullable=False, server_default=text("60"))
+    # time + duration_minutes, kept by the service so the overlap constraint can index it
+    end_time = Column(DateTime(timezone=True), nullable=False)
     status = Column(String, nullable=False)
     notes = Column(String)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Set on insert too, so every row has a delta-sync watermark
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+    # Set when this row replaces (moves or cancels) the occurrence of a series
+    # that was scheduled at occurrence_time
+    series_id = Column(Integer, ForeignKey("appointment_series.id"))
+    occurrence_time = Column(DateTime(timezone=True))
 
     # Relationships
-    client = relationship("Client", back_populates="appointments") 
\ No newline at end of file
+    client = relationship("Client", back_populates="appointments")
+
+class AppointmentSeries(Base):
+    """A recurring appointment, stored once. Occurrences are expanded from the rule
+    when read (see services/recurrence.py); one only becomes an appointment row
+    when it is changed."""
+    __tablename__ = "appointment_series"
+    __table_args__ = (
+        # Series with occurrences in a window: start_time before its end, until after its start
+        Index("ix_appointment_series_auth0_id_start_time", "auth0_id", "start_time"),
+        # Delta sync: rows changed since a (updated_at, id) watermark
+        Index("ix_appointment_series_auth0_id_updated_at_id", "auth0_id", "updated_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    client_id = Column(Integer, ForeignKey("clients.id"), nullable=False)
+    # First occurrence; later ones repeat its wall-clock time in time_zone
+    start_time = Column(DateTime(timezone=True), nullable=False)
+    time_zone = Column(String, nullable=False, server_default=text("'UTC'"))
+    # RFC 5545 RRULE, e.g. FREQ=WEEKLY;BYDAY=MO,TH;COUNT=20
+    rrule = Column(String, nullable=False)
+    duration_minutes = Column(Integer, nullable=False)
+    status = Column(String, nullable=False)
+    notes = Column(String)
+    # End of the last occurrence; null for an open-ended rule
+    until = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+
+    client = relationship("Client")
+
+class AppointmentDailyStats(Base):
+    """Appointments per tenant, UTC day and status, kept up to date by the
+    appointment write paths (see services/stats.py)"""
+    __tablename__ = "appointment_daily_stats"
+    __table_args__ = (
+        # Dashboard range lookups: a tenant's days in order
+        PrimaryKeyConstraint("auth0_id", "day", "status"),
+    )
+
+    day = Column(Date, nullable=False)
+    status = Column(String, nullable=False)
+    count = Column(Integer, nullable=False, server_default=text("0"))
+
+class Tombstone(Base):
+    """Record of a deleted client or appointment, so delta syncs can report deletes"""
+    __tablename__ = "tombstones"
+    __table_args__ = (
+        Index("ix_tombstones_auth0_id_entity_deleted_at_id", "auth0_id", "entity", "deleted_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    entity = Column(String, nullable=False)  # "appointment" or "client"
+    entity_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -0,0 +1,228 @@
+"""Monthly range partitions of ``appointments`` on ``time`` (PostgreSQL only).
+
+Each month is a partition named appointments_YYYY_MM; rows outside every month
+land in appointments_default until `maintain` creates their month. Old months are
+archived by detaching them into the ``archive`` schema (optionally onto a cold
+tablespace), where they stay queryable through archive.appointments_history and
+can be attached again with `restore`.
+
+    PYTHONPATH=. python -m app.db.partitions maintain
+    PYTHONPATH=. python -m app.db.partitions archive
+    PYTHONPATH=. python -m app.db.partitions restore 2024-01
+    PYTHONPATH=. python -m app.db.partitions list
+"""
+import argparse
+import re
+from datetime import date, datetime, time, timezone
+from typing import List, Optional, Tuple
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Connection
+from app.core.config import get_settings
+from app.schemas.appointment import AppointmentStatus
+
+PARENT = "appointments"
+DEFAULT_PARTITION = "appointments_default"
+ARCHIVE_SCHEMA = "archive"
+HISTORY_VIEW = f"{ARCHIVE_SCHEMA}.appointments_history"
+MONTH_PARTITION = re.compile(r"^appointments_(\d{4})_(\d{2})$")
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_{month:%Y_%m}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    match = MONTH_PARTITION.match(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def _bounds(month: date) -> Tuple[str, str]:
+    """Partition bounds as UTC timestamptz literals"""
+    lower, upper = (datetime.combine(m, time.min, timezone.utc) for m in (month, add_months(month, 1)))
+    return f"'{lower.isoformat()}'", f"'{upper.isoformat()}'"
+
+
+def no_overlap_ddl(table: str) -> str:
+    """No two active appointments of a tenant overlap. PostgreSQL can't put this
+    exclusion constraint on the partitioned parent, so every partition, the
+    default one included, has its own; overlaps across partitions are prevented by
+    the service check, which holds a per-tenant advisory lock."""
+    return (
+        f"ALTER TABLE {table} ADD CONSTRAINT {table.rsplit('.', 1)[-1]}_no_overlap "
+        f"EXCLUDE USING gist (auth0_id WITH =, tstzrange(time, end_time, '[)') WITH &&) "
+        f"WHERE (status <> '{AppointmentStatus.CANCELLED.value}')"
+    )
+
+
+def attached_months(conn: Connection) -> List[date]:
+    names = conn.exec_driver_sql(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        f"WHERE p.relname = '{PARENT}'"
+    ).scalars()
+    return sorted(month for month in map(partition_month, names) if month)
+
+
+def archived_months(conn: Connection) -> List[date]:
+    names = conn.exec_driver_sql(
+        f"SELECT tablename FROM pg_tables WHERE schemaname = '{ARCHIVE_SCHEMA}'"
+    ).scalars()
+    return sorted(month for month in map(partition_month, names) if month)
+
+
+def ensure_default_partition(conn: Connection) -> None:
+    if conn.exec_driver_sql(f"SELECT to_regclass('{DEFAULT_PARTITION}')").scalar() is not None:
+        return
+    conn.exec_driver_sql(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {PARENT} DEFAULT")
+    conn.exec_driver_sql(no_overlap_ddl(DEFAULT_PARTITION))
+
+
+def create_partition(conn: Connection, month: date) -> None:
+    """Create ``month``'s partition, moving its rows out of the default partition.
+
+    The table is filled before it is attached, so attaching only has to check the
+    default partition holds nothing for the month any more. The default partition
+    is locked (as ATTACH would lock it anyway) before its rows are moved, so no
+    insert can land there in between and fail that check; inserts routed to it
+    wait until the transaction commits.
+    """
+    name = partition_name(month)
+    lower, upper = _bounds(month)
+    conn.exec_driver_sql(f"LOCK TABLE {DEFAULT_PARTITION} IN ACCESS EXCLUSIVE MODE")
+    conn.exec_driver_sql(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    conn.exec_driver_sql(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE time >= {lower} AND time < {upper} RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    )
+    conn.exec_driver_sql(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES FROM ({lower}) TO ({upper})")
+    conn.exec_driver_sql(no_overlap_ddl(name))
+
+
+def ensure_partitions(conn: Connection, first: date, last: date) -> List[str]:
+    """Create the missing partitions for every month from ``first`` to ``last``"""
+    ensure_default_partition(conn)
+    existing = set(attached_months(conn)) | set(archived_months(conn))
+    created = []
+    month = month_start(first)
+    while month <= last:
+        if month not in existing:
+            create_partition(conn, month)
+            created.append(partition_name(month))
+        month = add_months(month, 1)
+    return created
+
+
+def maintain(conn: Connection, today: Optional[date] = None) -> List[str]:
+    """Partitions from this month to PARTITION_PREMAKE_MONTHS ahead, plus the months
+    of appointments that had none and sit in the default partition"""
+    first = month_start(today or date.today())
+    last = add_months(first, get_settings().PARTITION_PREMAKE_MONTHS)
+    ensure_default_partition(conn)
+    earliest, latest = conn.exec_driver_sql(f"SELECT min(time), max(time) FROM {DEFAULT_PARTITION}").one()
+    if earliest is not None:
+        first = min(first, month_start(earliest.astimezone(timezone.utc).date()))
+        last = max(last, month_start(latest.astimezone(timezone.utc).date()))
+    return ensure_partitions(conn, first, last)
+
+
+def refresh_history_view(conn: Connection) -> None:
+    """archive.appointments_history: live and archived appointments, for queries
+    that need history without attaching it again"""
+    tables = [PARENT] + [f"{ARCHIVE_SCHEMA}.{partition_name(month)}" for month in archived_months(conn)]
+    conn.exec_driver_sql(f"DROP VIEW IF EXISTS {HISTORY_VIEW}")
+    conn.exec_driver_sql(f"CREATE VIEW {HISTORY_VIEW} AS " + " UNION ALL ".join(f"SELECT * FROM {t}" for t in tables))
+
+
+def archive_partitions(conn: Connection, before: date, tablespace: Optional[str] = None) -> List[str]:
+    """Detach the partitions of months before ``before`` into the archive schema.
+
+    A CHECK constraint matching the bounds is added first so ``restore`` can attach
+    the table again without a validating scan. With ``tablespace`` the table and
+    its indexes move there (e.g. compressed or slower storage). Detaching briefly
+    locks ``appointments``, so run this off-peak.
+    """
+    conn.exec_driver_sql(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}")
+    archived = []
+    for month in attached_months(conn):
+        if month >= month_start(before):
+            continue
+        name = partition_name(month)
+        lower, upper = _bounds(month)
+        conn.exec_driver_sql(
+            f"ALTER TABLE {name} ADD CONSTRAINT {name}_bounds CHECK (time >= {lower} AND time < {upper})"
+        )
+        conn.exec_driver_sql(f"ALTER TABLE {PARENT} DETACH PARTITION {name}")
+        conn.exec_driver_sql(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}")
+        if tablespace:
+            conn.exec_driver_sql(f"ALTER TABLE {ARCHIVE_SCHEMA}.{name} SET TABLESPACE {tablespace}")
+            indexes = conn.exec_driver_sql(
+                f"SELECT indexname FROM pg_indexes WHERE schemaname = '{ARCHIVE_SCHEMA}' AND tablename = '{name}'"
+            ).scalars().all()
+            for index in indexes:
+                conn.exec_driver_sql(f"ALTER INDEX {ARCHIVE_SCHEMA}.{index} SET TABLESPACE {tablespace}")
+        archived.append(name)
+    if archived:
+        refresh_history_view(conn)
+    return archived
+
+
+def restore_partition(conn: Connection, month: date) -> str:
+    """Attach an archived month again (its rows become visible to the API)"""
+    month = month_start(month)
+    if month not in archived_months(conn):
+        raise ValueError(f"{partition_name(month)} is not archived")
+    name = partition_name(month)
+    lower, upper = _bounds(month)
+    conn.exec_driver_sql(f"ALTER TABLE {ARCHIVE_SCHEMA}.{name} SET SCHEMA public")
+    conn.exec_driver_sql(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES FROM ({lower}) TO ({upper})")
+    conn.exec_driver_sql(f"ALTER TABLE {name} DROP CONSTRAINT {name}_bounds")
+    refresh_history_view(conn)
+    return name
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="defaults to the app's DATABASE_URL")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("maintain", help="create upcoming monthly partitions")
+    archive = commands.add_parser("archive", help="detach old partitions into the archive schema")
+    archive.add_argument("--months", type=int, help="keep this many past months attached "
+                                                    "(default PARTITION_ARCHIVE_AFTER_MONTHS)")
+    restore = commands.add_parser("restore", help="attach an archived month again")
+    restore.add_argument("month", type=lambda value: datetime.strptime(value, "%Y-%m").date(), help="YYYY-MM")
+    commands.add_parser("list", help="show attached and archived months")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    url = args.database_url or settings.DATABASE_URL
+    engine = create_engine(url.replace("postgres://", "postgresql://"))
+    if engine.dialect.name != "postgresql":
+        parser.exit(1, "Partitioning is only available on PostgreSQL\n")
+
+    with engine.begin() as conn:
+        if args.command == "maintain":
+            created = maintain(conn)
+            print(f"Created {len(created)} partitions" + (": " + ", ".join(created) if created else ""))
+        elif args.command == "archive":
+            months = args.months if args.months is not None else settings.PARTITION_ARCHIVE_AFTER_MONTHS
+            before = add_months(month_start(date.today()), -months)
+            archived = archive_partitions(conn, before, settings.PARTITION_ARCHIVE_TABLESPACE)
+            print(f"Archived {len(archived)} partitions" + (": " + ", ".join(archived) if archived else ""))
+        elif args.command == "restore":
+            print(f"Attached {restore_partition(conn, args.month)}")
+        else:
+            print("attached:", ", ".join(f"{m:%Y-%m}" for m in attached_months(conn)) or "-")
+            print("archived:", ", ".join(f"{m:%Y-%m}" for m in archived_months(conn)) or "-")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import time
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.core.metrics import Counter, Gauge, Histogram
+
+POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds",
+    "Time spent obtaining a connection from the pool, including waits and new connects",
+    ["pool"],
+)
+POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total",
+    "Checkouts that gave up after DB_POOL_TIMEOUT seconds",
+    ["pool"],
+)
+POOL_SIZE = Gauge("db_pool_size", "Configured number of persistent connections", ["pool"])
+POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connections currently in use", ["pool"])
+POOL_OVERFLOW = Gauge("db_pool_overflow", "Connections open beyond the pool size", ["pool"])
+
+
+class _InstrumentedPoolMixin:
+    """Times every checkout and counts the ones that time out"""
+    metrics_label = "sync"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            POOL_TIMEOUTS.labels(pool=self.metrics_label).inc()
+            raise
+        finally:
+            POOL_CHECKOUT_SECONDS.labels(pool=self.metrics_label).observe(time.perf_counter() - start)
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    metrics_label = "sync"
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    metrics_label = "async"
+
+
+def register_pool_gauges(engine: Engine, label: str) -> None:
+    """Expose the engine's pool occupancy, read at scrape time, under ``pool=label``"""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return
+    pool.metrics_label = label
+    # engine.pool is looked up on every scrape: dispose() swaps in a new pool
+    POOL_SIZE.labels(pool=label).set_function(lambda: engine.pool.size())
+    POOL_CHECKED_OUT.labels(pool=label).set_function(lambda: engine.pool.checkedout())
+    # overflow() starts at -pool_size and counts up as connections are opened
+    POOL_OVERFLOW.labels(pool=label).set_function(lambda: max(engine.pool.overflow(), 0))
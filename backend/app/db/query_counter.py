@@ -0,0 +1,47 @@
+from typing import List
+from sqlalchemy import event
+
+
+class QueryCounter:
+    """Record the SQL statements an engine executes inside a ``with`` block.
+
+    Meant for tests that pin the number of round-trips an endpoint makes, so an
+    N+1 regression fails loudly instead of showing up as latency in production::
+
+        with QueryCounter(engine) as queries:
+            client.get("/api/v1/appointments/")
+        queries.assert_count(2)  # count(*) + page, client loaded by the join
+    """
+
+    def __init__(self, engine):
+        # AsyncEngine exposes its events on the underlying sync engine
+        self.engine = getattr(engine, "sync_engine", engine)
+        self.statements: List[str] = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self) -> "QueryCounter":
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _describe(self) -> str:
+        return "\n".join(f"  {i + 1}. {s}" for i, s in enumerate(self.statements))
+
+    def assert_count(self, expected: int) -> None:
+        assert self.count == expected, (
+            f"Expected {expected} SQL statements, got {self.count}:\n{self._describe()}"
+        )
+
+    def assert_at_most(self, limit: int) -> None:
+        assert self.count <= limit, (
+            f"Expected at most {limit} SQL statements, got {self.count}:\n{self._describe()}"
+        )
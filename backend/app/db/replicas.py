@@ -0,0 +1,143 @@
+import asyncio
+import itertools
+import logging
+from typing import List, Optional, Sequence
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+from starlette.concurrency import run_in_threadpool
+from app.core.metrics import Gauge
+
+logger = logging.getLogger(__name__)
+
+REPLICA_HEALTHY = Gauge("db_replica_healthy", "1 while a read replica passes its health checks", ["replica"])
+
+# Session.info key of the engine a read session sends its queries to
+READ_BIND = "read_bind"
+
+# Replication lag in seconds. 0 once everything received has been replayed, so a
+# replica of an idle primary doesn't look stale, and on a server that isn't a replica
+LAG_SQL = (
+    "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class RoutingSession(Session):
+    """Session that sends its reads to ``info[READ_BIND]`` when one is set.
+
+    Flushes, INSERT/UPDATE/DELETE and SELECT ... FOR UPDATE always go to the
+    session's own bind (the primary), so a read session never writes to a replica.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        read_bind = self.info.get(READ_BIND)
+        if (
+            read_bind is not None
+            and clause is not None
+            and not self._flushing
+            and not isinstance(clause, UpdateBase)
+            and getattr(clause, "_for_update_arg", None) is None
+        ):
+            return read_bind
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+class Replica:
+    """A read replica's engines and whether it passed its last health check"""
+
+    def __init__(self, name: str, engine: Engine, async_engine: Optional[AsyncEngine] = None):
+        self.name = name
+        self.engine = engine
+        self.async_engine = async_engine
+        self.healthy = True
+        REPLICA_HEALTHY.labels(replica=name).set_function(lambda: float(self.healthy))
+        for sync_engine in (engine, async_engine.sync_engine if async_engine is not None else None):
+            if sync_engine is not None:
+                event.listen(sync_engine, "handle_error", self._on_error)
+
+    def bind(self, is_async: bool) -> Engine:
+        """Engine a RoutingSession reads through (AsyncSession runs on a sync Session)"""
+        return self.async_engine.sync_engine if is_async else self.engine
+
+    def _on_error(self, context) -> None:
+        # A dropped connection takes the replica out of rotation until a check passes
+        if context.is_disconnect and self.healthy:
+            logger.warning("Read replica %s disconnected; routing reads elsewhere", self.name)
+            self.healthy = False
+
+
+class ReplicaSet:
+    """Read replicas handed out round-robin, skipping unhealthy ones.
+
+    Every ``check_interval`` seconds each replica is pinged in the background and,
+    on PostgreSQL, its replication lag compared with ``max_lag``. A disconnect seen
+    by a request also marks a replica unhealthy until its next passing check.
+    """
+
+    def __init__(self, replicas: Sequence[Replica], check_interval: float, max_lag: Optional[float]):
+        self.replicas: List[Replica] = list(replicas)
+        self.check_interval = check_interval
+        self.max_lag = max_lag
+        self._turn = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+
+    def choose(self) -> Optional[Replica]:
+        """Next healthy replica, or None when there is none"""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._turn) % len(healthy)]
+
+    def check(self, replica: Replica) -> bool:
+        try:
+            with replica.engine.connect() as conn:
+                if conn.dialect.name == "postgresql":
+                    lag = float(conn.exec_driver_sql(LAG_SQL).scalar())
+                else:
+                    conn.exec_driver_sql("SELECT 1")
+                    lag = 0.0
+        except Exception:
+            if replica.healthy:
+                logger.exception("Read replica %s failed its health check", replica.name)
+            replica.healthy = False
+            return False
+        healthy = self.max_lag is None or lag <= self.max_lag
+        if healthy != replica.healthy:
+            if healthy:
+                logger.info("Read replica %s is healthy again", replica.name)
+            else:
+                logger.warning("Read replica %s lags %.1fs behind; routing reads elsewhere", replica.name, lag)
+        replica.healthy = healthy
+        return healthy
+
+    async def check_all(self) -> None:
+        await asyncio.gather(*(run_in_threadpool(self.check, replica) for replica in self.replicas))
+
+    async def _check_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.check_all()
+
+    async def start(self) -> None:
+        """Check every replica once, then keep checking in the background"""
+        if not self.replicas:
+            return
+        await self.check_all()
+        if self._task is None:
+            self._task = asyncio.create_task(self._check_periodically())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            if replica.async_engine is not None:
+                await replica.async_engine.dispose()
+            replica.engine.dispose()
@@ -1,20 +1,123 @@
+from typing import Dict, Optional
+from fastapi import Depends
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from app.core.config import get_settings
+from sqlalchemy.pool import NullPool
+from app.core.auth import get_current_user
+from app.core.cache import get_write_marker_store, wrote_recently
+from app.core.config import async_database_url, get_settings
+from app.db.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, register_pool_gauges
+from app.db.replicas import READ_BIND, Replica, ReplicaSet, RoutingSession
 
 settings = get_settings()
 
+
+def engine_options(url: str, is_async: bool) -> dict:
+    """Pool configuration from Settings for a sync or async engine"""
+    if settings.DB_PGBOUNCER:
+        # PgBouncer owns the pooling; asyncpg must not cache prepared statements,
+        # since consecutive transactions may land on different server connections
+        options = {"poolclass": NullPool}
+        if is_async and url.startswith("postgresql+asyncpg"):
+            options["connect_args"] = {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+        return options
+    if url.startswith("sqlite"):
+        # Local development only; keep SQLAlchemy's per-driver SQLite pooling
+        return {}
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
 # Create SQLAlchemy engine with the correct URL format
-engine = create_engine(
-    settings.DATABASE_URL.replace("postgres://", "postgresql://"),
-    pool_pre_ping=True
+database_url = settings.DATABASE_URL.replace("postgres://", "postgresql://")
+engine = create_engine(database_url, **engine_options(database_url, is_async=False))
+register_pool_gauges(engine, "sync")
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=RoutingSession)
+
+# Async engine used when DATABASE_ASYNC is enabled. Objects must stay readable
+# after commit without an implicit (awaitable) refresh, hence expire_on_commit=False.
+async_engine = None
+AsyncSessionLocal = None
+if settings.DATABASE_ASYNC:
+    async_engine = create_async_engine(
+        settings.ASYNC_DATABASE_URL,
+        **engine_options(settings.ASYNC_DATABASE_URL, is_async=True)
+    )
+    register_pool_gauges(async_engine.sync_engine, "async")
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        class_=AsyncSession,
+        sync_session_class=RoutingSession,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+
+def create_replica(index: int, url: str) -> Replica:
+    """Engines for one DATABASE_REPLICA_URLS entry, pooled like the primary's"""
+    name = f"replica{index}"
+    url = url.replace("postgres://", "postgresql://")
+    replica_engine = create_engine(url, **engine_options(url, is_async=False))
+    register_pool_gauges(replica_engine, name)
+    replica_async_engine = None
+    if settings.DATABASE_ASYNC:
+        async_url = async_database_url(url)
+        replica_async_engine = create_async_engine(async_url, **engine_options(async_url, is_async=True))
+        register_pool_gauges(replica_async_engine.sync_engine, f"{name}-async")
+    return Replica(name, replica_engine, replica_async_engine)
+
+
+# Refuse to start with replicas but no shared store for read-your-writes markers
+get_write_marker_store()
+replicas = ReplicaSet(
+    [create_replica(index, url) for index, url in enumerate(settings.DATABASE_REPLICA_URLS)],
+    check_interval=settings.REPLICA_HEALTH_CHECK_INTERVAL,
+    max_lag=settings.REPLICA_MAX_LAG_SECONDS,
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def read_bind(auth0_id: str) -> Optional[Engine]:
+    """Replica for a tenant's read-only request, round-robin among the healthy
+    ones; None (the primary) without one, or within the tenant's read-your-writes
+    window"""
+    if not replicas.replicas or wrote_recently(auth0_id):
+        return None
+    replica = replicas.choose()
+    return replica.bind(settings.DATABASE_ASYNC) if replica is not None else None
+
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_read_db(current_user: Dict = Depends(get_current_user)):
+    db = SessionLocal(info={READ_BIND: read_bind(current_user['auth0_id'])})
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(current_user: Dict = Depends(get_current_user)):
+    async with AsyncSessionLocal(info={READ_BIND: read_bind(current_user['auth0_id'])}) as db:
+        yield db
+
+# Session dependency used by the API routers; follows the DATABASE_ASYNC setting
+get_session = get_async_db if settings.DATABASE_ASYNC else get_db
+# For read-only GETs that may be served by a replica; writes still go to the primary
+get_read_session = get_async_read_db if settings.DATABASE_ASYNC else get_read_db
@@ -1,17 +1,45 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.core.config import get_settings
+from app.core.events import get_event_listener
+from app.core.jwks import get_jwks_provider
+from app.core.metrics import render as render_metrics
+from app.core.middleware import MetricsMiddleware
+from app.core.profiler import ProfilerMiddleware
+from app.core.responses import TimedJSONResponse
+from app.core.timing import instrument_engine
+from app.db.session import async_engine, database_url, engine, replicas
 from app.api.v1.api import api_router
 
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    jwks_provider = get_jwks_provider()
+    await jwks_provider.start()
+    event_listener = get_event_listener(database_url)
+    if event_listener is not None:
+        await event_listener.start()
+    await replicas.start()
+    yield
+    await replicas.stop()
+    if event_listener is not None:
+        await event_listener.stop()
+    await jwks_provider.stop()
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
 app = FastAPI(
     title=settings.APP_NAME,
     openapi_url="/api/v1/openapi.json",
     redirect_slashes=False
 )
 
-app = FastAPI(redirect_slashes=False)
+app = FastAPI(redirect_slashes=False, lifespan=lifespan, default_response_class=TimedJSONResponse)
 # Set all CORS enabled origins
 app.add_middleware(
     CORSMiddleware,
@@ -21,4 +49,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.include_router(api_router, prefix="/api/v1") 
\ No newline at end of file
+# Request timing feeds the metrics, the slow-query log and the profiler;
+# MetricsMiddleware is added last so it wraps the profiler
+app.add_middleware(ProfilerMiddleware)
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine)
+if async_engine is not None:
+    instrument_engine(async_engine.sync_engine)
+for replica in replicas.replicas:
+    instrument_engine(replica.engine)
+    if replica.async_engine is not None:
+        instrument_engine(replica.async_engine.sync_engine)
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        """Prometheus scrape endpoint"""
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+app.include_router(api_router, prefix="/api/v1") 
@@ -1,7 +1,7 @@
 from __future__ import annotations
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from enum import Enum
 
 class AppointmentStatus(str, Enum):
@@ -17,17 +17,27 @@ class AppointmentBase(BaseModel):
 
 class AppointmentCreate(AppointmentBase):
     client_id: int
+    # Defaults to APPOINTMENT_DEFAULT_DURATION
+    duration_minutes: Optional[int] = Field(None, gt=0, le=24 * 60)
 
 class AppointmentUpdate(AppointmentBase):
+    # Partial: fields left out are unchanged
     time: Optional[datetime] = None
     status: Optional[str] = None
     notes: Optional[str] = None
+    duration_minutes: Optional[int] = Field(None, gt=0, le=24 * 60)
 
 class Appointment(AppointmentBase):
-    id: int
+    # None for an occurrence of a series that has not been changed (materialized)
+    id: Optional[int] = None
     client_id: int
+    duration_minutes: int
+    end_time: datetime
     created_at: datetime
     updated_at: Optional[datetime] = None
+    # The series this is an occurrence of, and the start it was scheduled for
+    series_id: Optional[int] = None
+    occurrence_time: Optional[datetime] = None
 
     model_config = {
         "from_attributes": True
@@ -40,6 +50,46 @@ class AppointmentWithClient(Appointment):
         "from_attributes": True
     }
 
+class AppointmentSeriesCreate(BaseModel):
+    client_id: int
+    # First occurrence; the rule repeats its wall-clock time in time_zone
+    start_time: datetime
+    time_zone: str = "UTC"
+    # RFC 5545 RRULE, e.g. FREQ=WEEKLY;BYDAY=MO;COUNT=12 (DAILY or coarser)
+    rrule: str
+    status: AppointmentStatus = AppointmentStatus.SCHEDULED
+    notes: Optional[str] = None
+    # Defaults to APPOINTMENT_DEFAULT_DURATION
+    duration_minutes: Optional[int] = Field(None, gt=0, le=24 * 60)
+
+class AppointmentSeries(BaseModel):
+    id: int
+    client_id: int
+    start_time: datetime
+    time_zone: str
+    rrule: str
+    duration_minutes: int
+    status: AppointmentStatus
+    notes: Optional[str] = None
+    # End of the last occurrence; null for an open-ended series
+    until: Optional[datetime] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    model_config = {
+        "from_attributes": True
+    }
+
+class TimeSlot(BaseModel):
+    start: datetime
+    end: datetime
+
+class Availability(BaseModel):
+    """Free time within working hours, in the requested time zone"""
+    time_zone: str
+    duration_minutes: int
+    slots: List[TimeSlot]
+
 from app.schemas.client import Client
 
 AppointmentWithClient.model_rebuild() 
\ No newline at end of file
@@ -0,0 +1,11 @@
+from typing import List
+from pydantic import BaseModel
+
+class BulkRowError(BaseModel):
+    row: int  # 0-based position of the row in the submitted batch
+    detail: str
+
+class BulkResult(BaseModel):
+    created: int
+    ids: List[int]  # ids of the created rows, in submission order
+    errors: List[BulkRowError]
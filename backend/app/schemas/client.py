@@ -1,5 +1,5 @@
 from __future__ import annotations
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, computed_field
 from datetime import datetime
 from typing import Optional, List
 
@@ -24,7 +24,15 @@ class Client(ClientBase):
     }
 
 class ClientWithAppointments(Client):
+    # Bounded preview: upcoming appointments first, then the most recent past ones
     appointments: List["Appointment"] = []
+    appointments_has_more: bool = False
+
+    @computed_field
+    @property
+    def appointments_url(self) -> str:
+        """Paginated listing of all of the client's appointments"""
+        return f"/api/v1/clients/{self.id}/appointments"
 
     model_config = {
         "from_attributes": True
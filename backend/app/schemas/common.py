@@ -1,17 +1,58 @@
-from typing import TypeVar, Generic, List
+from typing import TypeVar, Generic, List, Optional
+from datetime import datetime
+from enum import Enum
 from pydantic import BaseModel
 
 T = TypeVar("T")
 
+class PaginationMode(str, Enum):
+    OFFSET = "offset"
+    CURSOR = "cursor"
+
+class SearchMode(str, Enum):
+    CONTAINS = "contains"
+    RANKED = "ranked"
+
+class CountStrategy(str, Enum):
+    EXACT = "exact"
+    CACHED = "cached"
+    ESTIMATED = "estimated"
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
 class PaginationParams(BaseModel):
     page: int = 1
     page_size: int = 10
 
 class PaginatedResponse(BaseModel, Generic[T]):
     items: List[T]
-    total: int
+    # Null when the listing was requested with include_total=false
+    total: Optional[int] = None
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    # True when total is the planner's estimate rather than an exact count
+    total_estimated: bool = False
+    has_next: bool
+    has_previous: bool
+
+class CursorPage(BaseModel, Generic[T]):
+    items: List[T]
+    page_size: int
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
     has_next: bool
-    has_previous: bool 
\ No newline at end of file
+    has_previous: bool
+
+class Tombstone(BaseModel):
+    id: int  # id of the deleted row
+    deleted_at: datetime
+
+class ChangesPage(BaseModel, Generic[T]):
+    items: List[T]  # rows created or updated since the token, as they are now
+    deleted: List[Tombstone]
+    # Pass as since= next time; keep paging while has_more
+    next_token: str
+    has_more: bool
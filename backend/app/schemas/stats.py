@@ -0,0 +1,23 @@
+from datetime import date
+from typing import Dict, List
+from pydantic import BaseModel
+
+class PeriodStats(BaseModel):
+    total: int
+    by_status: Dict[str, int]
+
+class DayStats(PeriodStats):
+    day: date  # UTC
+
+class WeekStats(PeriodStats):
+    week_start: date  # Monday
+
+class TodayStats(DayStats):
+    upcoming: int  # scheduled or confirmed, from now until the end of the day
+
+class AppointmentStats(PeriodStats):
+    start_date: date
+    end_date: date
+    days: List[DayStats]
+    weeks: List[WeekStats]
+    today: TodayStats
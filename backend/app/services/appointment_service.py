@@ -1,68 +1,283 @@
-from typing import List, Optional, Dict
-from datetime import datetime, date
-from sqlalchemy.orm import Session
+from collections import Counter
+from typing import List, Optional, Dict, Set, Tuple
+from datetime import datetime, date, time, timedelta, timezone
+from enum import Enum
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from sqlalchemy import Select, func, select
+from sqlalchemy.orm import Session, contains_eager, joinedload
+from app.core.cache import bump_tenant_generation
+from app.core.config import get_settings
+from app.core.events import CREATED, DELETED, RESYNC, UPDATED, queue_event
 from app.db import models
-from app.schemas.appointment import AppointmentCreate, AppointmentUpdate, AppointmentStatus
+from app.schemas.appointment import (
+    Appointment,
+    AppointmentCreate,
+    AppointmentUpdate,
+    AppointmentSeries,
+    AppointmentSeriesCreate,
+    AppointmentStatus
+)
+from app.schemas.client import Client
+from app.schemas.bulk import BulkRowError
 from app.core.exceptions import (
     ClientNotFoundException,
     AppointmentNotFoundException,
-    DatabaseOperationException
+    AppointmentConflictException,
+    InvalidAvailabilityRequestException,
+    InvalidDateRangeException,
+    DatabaseOperationException,
+    InvalidCursorException,
+    InvalidFieldsException,
+    InvalidSyncTokenException,
+    InvalidRecurrenceRuleException,
+    SeriesNotFoundException,
+    OccurrenceNotFoundException
+)
+from app.schemas.common import CountStrategy, PaginationMode, SearchMode
+from app.services.base import AsyncServiceFacade
+from app.services.bulk import chunked, insert_chunks
+from app.services.changes import changes_page
+from app.services.pagination import NEXT, paginate, paginate_keyset, paginate_merged
+from app.services.projection import Projection, schema_fields
+from app.services.recurrence import (
+    Occurrence,
+    expand,
+    in_window,
+    is_occurrence,
+    occurrence_intervals,
+    occurrence_values,
+    overlapping_occurrences,
+    replaced_occurrences,
+    series_until,
+    sort_key
+)
+from app.services.scheduling import (
+    as_utc,
+    conflicting_rows,
+    end_time,
+    free_slots,
+    is_overlap_violation,
+    lock_tenant_schedule,
+    overlapping,
+    working_windows
 )
+from app.services.search import apply_search
+from app.services.stats import record_changes, stats_day
+
+class AppointmentLoad(str, Enum):
+    """Response shape an appointment query is loaded for.
+
+    Everything a shape serializes is loaded by the query itself, so building the
+    response never lazy-loads (N+1 queries, or MissingGreenlet in async mode).
+    """
+    PLAIN = "plain"              # schemas.Appointment
+    WITH_CLIENT = "with_client"  # schemas.AppointmentWithClient
+
+# Listings select exactly the columns of their response shape
+LIST_PROJECTIONS = {
+    AppointmentLoad.PLAIN: Projection(models.Appointment, schema_fields(Appointment)),
+    AppointmentLoad.WITH_CLIENT: Projection(
+        models.Appointment,
+        schema_fields(Appointment),
+        relations={"client": (models.Client, schema_fields(Client))},
+    ),
+}
+
+SERIES_PROJECTION = Projection(models.AppointmentSeries, schema_fields(AppointmentSeries))
+
+# Keyset order of appointment listings
+KEYSET = (models.Appointment.time, models.Appointment.id)
+
+def updated_values(appointment_update: AppointmentUpdate) -> Dict:
+    """Column values of a partial update: fields left out stay unchanged, and an
+    explicit null only clears a nullable column (notes)"""
+    columns = models.Appointment.__table__.columns
+    return {
+        key: value
+        for key, value in appointment_update.model_dump(exclude_unset=True).items()
+        if value is not None or columns[key].nullable
+    }
 
 class AppointmentService:
     def __init__(self, db: Session):
         self.db = db
 
+    def _apply_filters(
+        self,
+        query,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        status: Optional[AppointmentStatus] = None,
+    ):
+        """Date-range and status filters shared by listings and exports.
+
+        The bounds are UTC timestamptz values, so PostgreSQL prunes the monthly
+        partitions outside the range when planning.
+        """
+        if start_date:
+            start_datetime = datetime.combine(start_date, time.min, timezone.utc)
+            query = query.filter(models.Appointment.time >= start_datetime)
+
+        if end_date:
+            end_datetime = datetime.combine(end_date, time.max, timezone.utc)
+            query = query.filter(models.Appointment.time <= end_datetime)
+
+        if status:
+            query = query.filter(models.Appointment.status == status)
+
+        return query
+
     def get_appointments(
         self,
         auth0_id: str,
         page: int = 1,
         page_size: int = 10,
         search: Optional[str] = None,
+        search_mode: SearchMode = SearchMode.CONTAINS,
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
         status: Optional[AppointmentStatus] = None,
+        pagination: PaginationMode = PaginationMode.OFFSET,
+        cursor: Optional[str] = None,
+        count: Optional[CountStrategy] = None,
+        include_total: bool = True,
+        fields: Optional[str] = None,
+        load: AppointmentLoad = AppointmentLoad.WITH_CLIENT,
     ):
+        """Appointments page whose items are plain dicts shaped like the ``load`` schema,
+        or holding only the ``fields`` requested (see Projection.subset).
+
+        With both start_date and end_date, occurrences of recurring series in that
+        window are listed too, expanded lazily and merged in (time, id) order.
+        """
         try:
-            query = self.db.query(models.Appointment).join(models.Client).filter(
+            projection = LIST_PROJECTIONS[load]
+            if fields:
+                projection = projection.subset(fields, keys=KEYSET)
+            # Client is joined for search either way; WITH_CLIENT also selects its columns
+            query = self.db.query(*projection.columns).select_from(models.Appointment).join(models.Client).filter(
                 models.Appointment.auth0_id == auth0_id
             )
             
-            if start_date:
-                start_datetime = datetime.combine(start_date, datetime.min.time())
-                query = query.filter(models.Appointment.time >= start_datetime)
-            
-            if end_date:
-                end_datetime = datetime.combine(end_date, datetime.max.time())
-                query = query.filter(models.Appointment.time <= end_datetime)
-            
-            if status:
-                query = query.filter(models.Appointment.status == status)
-            
+            query = self._apply_filters(query, start_date=start_date, end_date=end_date, status=status)
+
+            use_cursor = pagination == PaginationMode.CURSOR or bool(cursor)
+            occurrences = None
+            if start_date and end_date:
+                occurrences = self._window_occurrences(auth0_id, start_date, end_date, status=status, search=search)
+
             if search:
-                search_term = f"%{search}%"
-                query = query.filter(models.Client.name.ilike(search_term))
-            
-            total = query.count()
-            total_pages = (total + page_size - 1) // page_size
+                # Keyset pages are ordered by their key, so ranking only applies to offset
+                # pages, and not when series occurrences are merged in by time
+                mode = SearchMode.CONTAINS if use_cursor or occurrences else search_mode
+                query = apply_search(
+                    query,
+                    [models.Client.name],
+                    search,
+                    mode,
+                    self.db.get_bind().dialect.name
+                )
             
-            # Normalize page numbers
-            page = max(1, min(page, total_pages if total_pages > 0 else 1))
-            
-            appointments = query.offset((page - 1) * page_size).limit(page_size).all()
-            
-            return {
-                "items": appointments,
-                "total": total,
-                "page": page,
-                "page_size": page_size,
-                "total_pages": total_pages,
-                "has_next": page < total_pages,
-                "has_previous": page > 1
-            }
+            if use_cursor:
+                result = paginate_keyset(query, KEYSET, cursor, page_size, extra=occurrences, key=sort_key)
+            elif occurrences:
+                result = paginate_merged(
+                    query.order_by(*KEYSET),
+                    lambda: occurrences(None, NEXT),
+                    sort_key,
+                    page,
+                    page_size,
+                    auth0_id,
+                    count=count,
+                    include_total=include_total
+                )
+            else:
+                # Ranked search orders first; the key keeps pages stable either way
+                result = paginate(
+                    query.order_by(*KEYSET), page, page_size, auth0_id, count=count, include_total=include_total
+                )
+            result["items"] = [
+                projection.from_values(occurrence_values(item)) if isinstance(item, Occurrence) else projection.to_dict(item)
+                for item in result["items"]
+            ]
+            return result
+        except (InvalidCursorException, InvalidFieldsException):
+            raise
         except Exception as e:
             raise DatabaseOperationException("query", str(e))
 
+    def _window_occurrences(
+        self,
+        auth0_id: str,
+        start_date: date,
+        end_date: date,
+        status: Optional[AppointmentStatus] = None,
+        search: Optional[str] = None,
+    ):
+        """Occurrence source for the listing of a date window (see paginate_keyset's
+        ``extra``), or None when no series has occurrences in it.
+
+        Loads the matching series and the occurrences already materialized in the
+        window up front; occurrences themselves are only generated as pages need them.
+        """
+        start = datetime.combine(start_date, time.min, timezone.utc)
+        end = datetime.combine(end_date, time.max, timezone.utc)
+        query = self.db.query(models.AppointmentSeries).join(models.AppointmentSeries.client).options(
+            contains_eager(models.AppointmentSeries.client)
+        ).filter(
+            models.AppointmentSeries.auth0_id == auth0_id,
+            *in_window(start, end)
+        )
+        if status:
+            query = query.filter(models.AppointmentSeries.status == status)
+        if search:
+            query = apply_search(query, [models.Client.name], search, SearchMode.CONTAINS, self.db.get_bind().dialect.name)
+        series = query.all()
+        if not series:
+            return None
+        replaced = replaced_occurrences(self.db, [s.id for s in series], start, end)
+
+        def occurrences(values: Optional[list], direction: str):
+            if values is None:
+                return expand(series, start, end, replaced)
+            position = (as_utc(values[0]), values[1])
+            if direction == NEXT:
+                return (o for o in expand(series, max(start, position[0]), end, replaced) if sort_key(o) > position)
+            return reversed([o for o in expand(series, start, min(end, position[0]), replaced) if sort_key(o) < position])
+
+        return occurrences
+
+    def export_statement(
+        self,
+        auth0_id: str,
+        search: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        status: Optional[AppointmentStatus] = None,
+    ) -> Select:
+        """Column-only SELECT of every matching appointment, in (time, id) order, for streaming"""
+        statement = select(
+            models.Appointment.id,
+            models.Appointment.client_id,
+            models.Client.name.label("client_name"),
+            models.Client.email.label("client_email"),
+            models.Appointment.time,
+            models.Appointment.duration_minutes,
+            models.Appointment.end_time,
+            models.Appointment.status,
+            models.Appointment.notes,
+            models.Appointment.created_at,
+            models.Appointment.updated_at
+        ).join(models.Client, models.Appointment.client_id == models.Client.id).where(
+            models.Appointment.auth0_id == auth0_id
+        )
+        statement = self._apply_filters(statement, start_date=start_date, end_date=end_date, status=status)
+        if search:
+            statement = apply_search(
+                statement, [models.Client.name], search, SearchMode.CONTAINS, self.db.get_bind().dialect.name
+            )
+        return statement.order_by(models.Appointment.time, models.Appointment.id)
+
     def create_appointment(self, appointment: AppointmentCreate, auth0_id: str):
         try:
             client = self.db.query(models.Client).filter(
@@ -73,28 +288,77 @@ class AppointmentService:
             if not client:
                 raise ClientNotFoundException(appointment.client_id)
 
+            duration = appointment.duration_minutes or get_settings().APPOINTMENT_DEFAULT_DURATION
             db_appointment = models.Appointment(
                 client_id=client.id,
                 time=appointment.time,
+                duration_minutes=duration,
+                end_time=end_time(appointment.time, duration),
                 status=appointment.status or AppointmentStatus.SCHEDULED,
                 notes=appointment.notes,
                 auth0_id=auth0_id
             )
+            self._check_overlap(db_appointment)
             
             self.db.add(db_appointment)
+            record_changes(self.db, auth0_id, [(db_appointment.time, db_appointment.status, 1)])
+            self.db.flush()
+            queue_event(self.db, auth0_id, CREATED, [db_appointment.id])
             self.db.commit()
+            bump_tenant_generation(auth0_id)
             self.db.refresh(db_appointment)
             return db_appointment
             
-        except ClientNotFoundException:
+        except (ClientNotFoundException, AppointmentConflictException):
             raise
         except Exception as e:
             self.db.rollback()
+            if is_overlap_violation(e):
+                # Lost a race with a concurrent booking; the constraint caught it
+                raise AppointmentConflictException()
             raise DatabaseOperationException("create", str(e))
 
-    def get_appointment(self, appointment_id: int, auth0_id: str):
+    def _check_overlap(self, appointment: models.Appointment) -> None:
+        """Raise AppointmentConflictException if an active appointment or series
+        occurrence would overlap the (new or updated) one. The tenant's schedule
+        stays locked until commit; the partitions' exclusion constraints back this
+        up within each month"""
+        if appointment.status == AppointmentStatus.CANCELLED:
+            return
+        with self.db.no_autoflush:
+            lock_tenant_schedule(self.db, appointment.auth0_id)
+            query = self.db.query(models.Appointment.id).filter(
+                models.Appointment.auth0_id == appointment.auth0_id,
+                overlapping(appointment.time, appointment.end_time, self.db.get_bind().dialect.name)
+            )
+            if appointment.id is not None:
+                query = query.filter(models.Appointment.id != appointment.id)
+            conflict = query.first()
+            if conflict:
+                raise AppointmentConflictException(conflict.id)
+            replaced = (appointment.series_id, appointment.occurrence_time) if appointment.series_id else None
+            occurrence = next(overlapping_occurrences(
+                self.db, appointment.auth0_id, as_utc(appointment.time), as_utc(appointment.end_time), replaced=replaced
+            ), None)
+        if occurrence:
+            raise AppointmentConflictException()
+
+    def get_appointment(
+        self,
+        appointment_id: int,
+        auth0_id: str,
+        load: AppointmentLoad = AppointmentLoad.WITH_CLIENT,
+        fields: Optional[str] = None,
+    ):
+        """Appointment entity, or a dict of just the ``fields`` requested"""
         try:
-            appointment = self.db.query(models.Appointment).filter(
+            if fields:
+                return self._get_appointment_fields(appointment_id, auth0_id, fields)
+
+            query = self.db.query(models.Appointment)
+            if load == AppointmentLoad.WITH_CLIENT:
+                query = query.options(joinedload(models.Appointment.client))
+            appointment = query.filter(
                 models.Appointment.id == appointment_id,
                 models.Appointment.auth0_id == auth0_id
             ).first()
@@ -104,39 +368,569 @@ class AppointmentService:
                 
             return appointment
             
-        except AppointmentNotFoundException:
+        except (AppointmentNotFoundException, InvalidFieldsException):
             raise
         except Exception as e:
             raise DatabaseOperationException("query", str(e))
 
+    def _get_appointment_fields(self, appointment_id: int, auth0_id: str, fields: str) -> Dict:
+        projection = LIST_PROJECTIONS[AppointmentLoad.WITH_CLIENT].subset(fields)
+        query = self.db.query(*projection.columns).select_from(models.Appointment)
+        if projection.relations:
+            query = query.join(models.Client)
+        row = query.filter(
+            models.Appointment.id == appointment_id,
+            models.Appointment.auth0_id == auth0_id
+        ).first()
+
+        if not row:
+            raise AppointmentNotFoundException(appointment_id)
+
+        return projection.to_dict(row)
+
     def update_appointment(self, appointment_id: int, appointment_update: AppointmentUpdate, auth0_id: str):
         try:
-            db_appointment = self.get_appointment(appointment_id, auth0_id)
+            db_appointment = self.get_appointment(appointment_id, auth0_id, load=AppointmentLoad.PLAIN)
+            before = (db_appointment.time, db_appointment.status)
             
-            appointment_data = appointment_update.model_dump()
-            for key, value in appointment_data.items():
+            for key, value in updated_values(appointment_update).items():
                 setattr(db_appointment, key, value)
+            db_appointment.end_time = end_time(db_appointment.time, db_appointment.duration_minutes)
+            self._check_overlap(db_appointment)
+            record_changes(self.db, auth0_id, [
+                (*before, -1),
+                (db_appointment.time, db_appointment.status, 1)
+            ])
+            queue_event(self.db, auth0_id, UPDATED, [appointment_id])
             
             self.db.commit()
+            bump_tenant_generation(auth0_id)
             self.db.refresh(db_appointment)
             return db_appointment
             
-        except AppointmentNotFoundException:
+        except (AppointmentNotFoundException, AppointmentConflictException, DatabaseOperationException):
+            self.db.rollback()
             raise
         except Exception as e:
             self.db.rollback()
+            if is_overlap_violation(e):
+                raise AppointmentConflictException()
             raise DatabaseOperationException("update", str(e))
 
     def delete_appointment(self, appointment_id: int, auth0_id: str):
         try:
-            db_appointment = self.get_appointment(appointment_id, auth0_id)
+            db_appointment = self.get_appointment(appointment_id, auth0_id, load=AppointmentLoad.PLAIN)
+            if db_appointment.series_id is not None:
+                return self._cancel_occurrence(db_appointment, auth0_id)
             
             self.db.delete(db_appointment)
+            self.db.add(models.Tombstone(entity="appointment", entity_id=appointment_id, auth0_id=auth0_id))
+            record_changes(self.db, auth0_id, [(db_appointment.time, db_appointment.status, -1)])
+            queue_event(self.db, auth0_id, DELETED, [appointment_id])
             self.db.commit()
+            bump_tenant_generation(auth0_id)
             return {"message": "Appointment deleted successfully"}
             
         except AppointmentNotFoundException:
             raise
         except Exception as e:
             self.db.rollback()
-            raise DatabaseOperationException("delete", str(e)) 
\ No newline at end of file
+            raise DatabaseOperationException("delete", str(e)) 
+
+    def _cancel_occurrence(self, db_appointment: models.Appointment, auth0_id: str) -> Dict:
+        """Deleting a changed occurrence of a series keeps its row as a cancelled
+        exception: the row is what replaces the generated occurrence, so removing
+        it would bring the occurrence back"""
+        record_changes(self.db, auth0_id, [
+            (db_appointment.time, db_appointment.status, -1),
+            (db_appointment.time, AppointmentStatus.CANCELLED.value, 1)
+        ])
+        db_appointment.status = AppointmentStatus.CANCELLED.value
+        queue_event(self.db, auth0_id, UPDATED, [db_appointment.id])
+        self.db.commit()
+        bump_tenant_generation(auth0_id)
+        return {"message": "Appointment occurrence cancelled"}
+
+    def bulk_create_appointments(
+        self,
+        rows: List[Tuple[int, AppointmentCreate]],
+        auth0_id: str,
+        errors: Optional[List[BulkRowError]] = None,
+    ) -> Dict:
+        """Create many appointments: one client-ownership lookup per chunk, multi-row inserts"""
+        errors = list(errors or [])
+        chunk_size = get_settings().BULK_CHUNK_SIZE
+        try:
+            owned = set()
+            for chunk in chunked(list({a.client_id for _, a in rows}), chunk_size):
+                owned.update(self.db.execute(
+                    select(models.Client.id).where(
+                        models.Client.auth0_id == auth0_id,
+                        models.Client.id.in_(chunk)
+                    )
+                ).scalars())
+
+            values = []
+            for index, appointment in rows:
+                if appointment.client_id not in owned:
+                    errors.append(BulkRowError(row=index, detail=f"Client with id {appointment.client_id} not found"))
+                    continue
+                duration = appointment.duration_minutes or get_settings().APPOINTMENT_DEFAULT_DURATION
+                values.append((index, {
+                    "client_id": appointment.client_id,
+                    "time": appointment.time,
+                    "duration_minutes": duration,
+                    "end_time": end_time(appointment.time, duration),
+                    "status": appointment.status or AppointmentStatus.SCHEDULED,
+                    "notes": appointment.notes,
+                    "auth0_id": auth0_id
+                }))
+
+            def reject_overlaps(chunk: List[Tuple[int, Dict]]) -> List[Tuple[int, Dict]]:
+                # In the chunk's own transaction: its lock is released on commit
+                overlaps = self._bulk_overlaps(chunk, auth0_id)
+                errors.extend(BulkRowError(row=index, detail="Overlaps another appointment") for index in overlaps)
+                return [(index, row) for index, row in chunk if index not in overlaps]
+
+            def before_commit(chunk: List[Dict], chunk_ids: List[int]) -> None:
+                record_changes(self.db, auth0_id, [(row["time"], row["status"], 1) for row in chunk])
+                queue_event(self.db, auth0_id, CREATED, chunk_ids)
+
+            ids = insert_chunks(
+                self.db, models.Appointment, values, chunk_size, errors,
+                before_insert=reject_overlaps, before_commit=before_commit
+            )
+        except Exception as e:
+            self.db.rollback()
+            raise DatabaseOperationException("create", str(e))
+
+        if ids:
+            bump_tenant_generation(auth0_id)
+
+        return {"created": len(ids), "ids": ids, "errors": sorted(errors, key=lambda e: e.row)}
+
+    def _bulk_overlaps(self, values: List[Tuple[int, Dict]], auth0_id: str) -> Set[int]:
+        """Rows of an import chunk overlapping stored appointments (earlier chunks
+        included) or each other, checked against one range query over the span of
+        the chunk. Locks the tenant's schedule until the chunk commits."""
+        candidates = [
+            (index, as_utc(row["time"]), as_utc(row["end_time"]))
+            for index, row in values if row["status"] != AppointmentStatus.CANCELLED
+        ]
+        if not candidates:
+            return set()
+        lock_tenant_schedule(self.db, auth0_id)
+        span_start = min(start for _, start, _ in candidates)
+        span_end = max(end for _, _, end in candidates)
+        existing = self.db.query(models.Appointment.time, models.Appointment.end_time).filter(
+            models.Appointment.auth0_id == auth0_id,
+            overlapping(span_start, span_end, self.db.get_bind().dialect.name)
+        ).all()
+        existing = [(as_utc(start), as_utc(end)) for start, end in existing]
+        existing += occurrence_intervals(overlapping_occurrences(self.db, auth0_id, span_start, span_end))
+        return conflicting_rows(candidates, existing)
+
+    def get_availability(
+        self,
+        auth0_id: str,
+        start_date: date,
+        end_date: date,
+        duration_minutes: Optional[int] = None,
+        day_start: Optional[time] = None,
+        day_end: Optional[time] = None,
+        time_zone: str = "UTC",
+    ) -> Dict:
+        """Free slots of at least ``duration_minutes`` within working hours on each
+        day of the range, from one range query over the tenant's active appointments
+        and the occurrences of its series"""
+        settings = get_settings()
+        duration_minutes = duration_minutes or settings.APPOINTMENT_DEFAULT_DURATION
+        day_start = day_start or settings.AVAILABILITY_DAY_START
+        day_end = day_end or settings.AVAILABILITY_DAY_END
+        if duration_minutes <= 0:
+            raise InvalidAvailabilityRequestException("duration_minutes must be positive")
+        if end_date < start_date:
+            raise InvalidAvailabilityRequestException("end_date is before start_date")
+        if (end_date - start_date).days + 1 > settings.AVAILABILITY_MAX_DAYS:
+            raise InvalidAvailabilityRequestException(f"at most {settings.AVAILABILITY_MAX_DAYS} days per request")
+        if day_end <= day_start:
+            raise InvalidAvailabilityRequestException("day_end must be after day_start")
+        try:
+            tz = ZoneInfo(time_zone)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise InvalidAvailabilityRequestException(f"unknown time zone {time_zone!r}")
+
+        # Past time is never free
+        now = datetime.now(timezone.utc)
+        windows = [
+            (max(as_utc(start), now), as_utc(end))
+            for start, end in working_windows(start_date, end_date, day_start, day_end, tz)
+            if as_utc(end) > now
+        ]
+        slots = []
+        if windows:
+            try:
+                busy = self.db.query(models.Appointment.time, models.Appointment.end_time).filter(
+                    models.Appointment.auth0_id == auth0_id,
+                    overlapping(windows[0][0], windows[-1][1], self.db.get_bind().dialect.name)
+                ).all()
+                busy = [(as_utc(start), as_utc(end)) for start, end in busy]
+                busy += occurrence_intervals(overlapping_occurrences(self.db, auth0_id, windows[0][0], windows[-1][1]))
+            except Exception as e:
+                raise DatabaseOperationException("query", str(e))
+            slots = free_slots(windows, busy, timedelta(minutes=duration_minutes))
+
+        return {
+            "time_zone": time_zone,
+            "duration_minutes": duration_minutes,
+            "slots": [{"start": start.astimezone(tz), "end": end.astimezone(tz)} for start, end in slots],
+        }
+
+
+    def get_stats(
+        self,
+        auth0_id: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ) -> Dict:
+        """Dashboard counts by status, UTC day and week for the range (default: 30
+        days either side of today) plus today's, from the daily rollups.
+
+        The rollup rows for the range and today come from one primary-key range
+        scan; only today's upcoming count reads appointments (one day of the
+        (auth0_id, time) index). Occurrences of recurring series have no rows to
+        roll up, so the series in the range (at most STATS_MAX_DAYS) are expanded
+        and their occurrences counted alongside.
+        """
+        now = datetime.now(timezone.utc)
+        today = now.date()
+        start_date = start_date or today - timedelta(days=30)
+        end_date = end_date or today + timedelta(days=30)
+        if end_date < start_date:
+            raise InvalidDateRangeException("end_date is before start_date")
+        max_days = get_settings().STATS_MAX_DAYS
+        if (end_date - start_date).days + 1 > max_days:
+            raise InvalidDateRangeException(f"at most {max_days} days per request")
+
+        stats = models.AppointmentDailyStats
+        first_day, last_day = min(start_date, today), max(end_date, today)
+        tomorrow = datetime.combine(today + timedelta(days=1), time.min, timezone.utc)
+        active = [AppointmentStatus.SCHEDULED.value, AppointmentStatus.CONFIRMED.value]
+        try:
+            rows = self.db.query(stats.day, stats.status, stats.count).filter(
+                stats.auth0_id == auth0_id,
+                stats.day >= first_day,
+                stats.day <= last_day,
+                stats.count != 0
+            ).all()
+            upcoming = self.db.query(func.count()).select_from(models.Appointment).filter(
+                models.Appointment.auth0_id == auth0_id,
+                models.Appointment.time >= now,
+                models.Appointment.time < tomorrow,
+                models.Appointment.status.in_(active)
+            ).scalar()
+
+            window_start = datetime.combine(first_day, time.min, timezone.utc)
+            window_end = datetime.combine(last_day, time.max, timezone.utc)
+            series = self.db.query(models.AppointmentSeries).filter(
+                models.AppointmentSeries.auth0_id == auth0_id,
+                *in_window(window_start, window_end)
+            ).all()
+            replaced = replaced_occurrences(self.db, [s.id for s in series], window_start, window_end)
+            counts = Counter({(day, status): count for day, status, count in rows})
+            for occurrence in expand(series, window_start, window_end, replaced):
+                counts[(stats_day(occurrence.time), occurrence.series.status)] += 1
+                if now <= occurrence.time < tomorrow and occurrence.series.status in active:
+                    upcoming += 1
+        except Exception as e:
+            raise DatabaseOperationException("query", str(e))
+
+        by_status: Dict[str, int] = {}
+        days: Dict[date, Dict[str, int]] = {}
+        weeks: Dict[date, Dict[str, int]] = {}
+        today_by_status: Dict[str, int] = {}
+        for (day, status), count in sorted(counts.items()):
+            if day == today:
+                today_by_status[status] = count
+            if not start_date <= day <= end_date:
+                continue
+            by_status[status] = by_status.get(status, 0) + count
+            days.setdefault(day, {})[status] = count
+            week = weeks.setdefault(day - timedelta(days=day.weekday()), {})
+            week[status] = week.get(status, 0) + count
+
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "total": sum(by_status.values()),
+            "by_status": by_status,
+            "days": [
+                {"day": day, "total": sum(counts.values()), "by_status": counts}
+                for day, counts in sorted(days.items())
+            ],
+            "weeks": [
+                {"week_start": week, "total": sum(counts.values()), "by_status": counts}
+                for week, counts in sorted(weeks.items())
+            ],
+            "today": {
+                "day": today,
+                "total": sum(today_by_status.values()),
+                "by_status": today_by_status,
+                "upcoming": upcoming,
+            },
+        }
+
+    def get_changes(self, auth0_id: str, since: Optional[str] = None, limit: int = 500) -> Dict:
+        """Appointments changed and deleted since the ``since`` sync token"""
+        try:
+            return changes_page(
+                self.db, models.Appointment, LIST_PROJECTIONS[AppointmentLoad.PLAIN],
+                "appointment", auth0_id, since, limit
+            )
+        except InvalidSyncTokenException:
+            raise
+        except Exception as e:
+            raise DatabaseOperationException("query", str(e))
+
+    def get_series_changes(self, auth0_id: str, since: Optional[str] = None, limit: int = 500) -> Dict:
+        """Series changed and deleted since the ``since`` sync token. Their unchanged
+        occurrences have no rows in the appointment feed, so syncing clients expand
+        them from these"""
+        try:
+            return changes_page(self.db, models.AppointmentSeries, SERIES_PROJECTION, "series", auth0_id, since, limit)
+        except InvalidSyncTokenException:
+            raise
+        except Exception as e:
+            raise DatabaseOperationException("query", str(e))
+
+    def create_series(self, series: AppointmentSeriesCreate, auth0_id: str):
+        """Store a recurring series once; its occurrences are expanded when read"""
+        settings = get_settings()
+        try:
+            client = self.db.query(models.Client).filter(
+                models.Client.id == series.client_id,
+                models.Client.auth0_id == auth0_id
+            ).first()
+            if not client:
+                raise ClientNotFoundException(series.client_id)
+
+            start = as_utc(series.start_time)
+            duration = series.duration_minutes or settings.APPOINTMENT_DEFAULT_DURATION
+            db_series = models.AppointmentSeries(
+                client_id=client.id,
+                start_time=start,
+                time_zone=series.time_zone,
+                rrule=series.rrule.strip(),
+                duration_minutes=duration,
+                status=series.status,
+                notes=series.notes,
+                until=series_until(series.rrule, start, series.time_zone, duration, settings.SERIES_MAX_OCCURRENCES),
+                auth0_id=auth0_id
+            )
+            self.db.add(db_series)
+            self.db.flush()
+            self._check_series_overlap(db_series)
+            queue_event(self.db, auth0_id, RESYNC, None)
+            self.db.commit()
+            bump_tenant_generation(auth0_id)
+            self.db.refresh(db_series)
+            return db_series
+
+        except (ClientNotFoundException, InvalidRecurrenceRuleException):
+            raise
+        except AppointmentConflictException:
+            self.db.rollback()
+            raise
+        except Exception as e:
+            self.db.rollback()
+            raise DatabaseOperationException("create", str(e))
+
+    def _check_series_overlap(self, series: models.AppointmentSeries) -> None:
+        """Raise AppointmentConflictException if occurrences of a new series in the
+        next SERIES_CONFLICT_HORIZON_DAYS overlap each other, an active appointment
+        or another series' occurrence"""
+        if series.status == AppointmentStatus.CANCELLED:
+            return
+        lock_tenant_schedule(self.db, series.auth0_id)
+        start = as_utc(series.start_time)
+        end = start + timedelta(days=get_settings().SERIES_CONFLICT_HORIZON_DAYS)
+        if series.until is not None:
+            end = min(end, as_utc(series.until))
+        candidates = [
+            (index, occurrence.time, occurrence.end_time)
+            for index, occurrence in enumerate(expand([series], start, end, set()))
+        ]
+        existing = self.db.query(models.Appointment.time, models.Appointment.end_time).filter(
+            models.Appointment.auth0_id == series.auth0_id,
+            overlapping(start, end, self.db.get_bind().dialect.name)
+        ).all()
+        existing = [(as_utc(start), as_utc(end)) for start, end in existing]
+        existing += occurrence_intervals(
+            overlapping_occurrences(self.db, series.auth0_id, start, end, exclude_series=series.id)
+        )
+        if conflicting_rows(candidates, existing):
+            raise AppointmentConflictException()
+
+    def get_series(self, series_id: int, auth0_id: str, for_update: bool = False):
+        try:
+            query = self.db.query(models.AppointmentSeries).filter(
+                models.AppointmentSeries.id == series_id,
+                models.AppointmentSeries.auth0_id == auth0_id
+            )
+            if for_update:
+                query = query.with_for_update()
+            series = query.first()
+        except Exception as e:
+            raise DatabaseOperationException("query", str(e))
+        if not series:
+            raise SeriesNotFoundException(series_id)
+        return series
+
+    def delete_series(self, series_id: int, auth0_id: str):
+        """Delete a series with the appointments its changed occurrences became"""
+        try:
+            db_series = self.get_series(series_id, auth0_id)
+            materialized = self.db.query(models.Appointment).filter(
+                models.Appointment.auth0_id == auth0_id,
+                models.Appointment.series_id == series_id
+            ).all()
+            for appointment in materialized:
+                self.db.delete(appointment)
+                self.db.add(models.Tombstone(entity="appointment", entity_id=appointment.id, auth0_id=auth0_id))
+            record_changes(self.db, auth0_id, [(a.time, a.status, -1) for a in materialized])
+            # Appointments first: they reference the series
+            self.db.flush()
+            self.db.delete(db_series)
+            self.db.add(models.Tombstone(entity="series", entity_id=db_series.id, auth0_id=auth0_id))
+            queue_event(self.db, auth0_id, RESYNC, None)
+            self.db.commit()
+            bump_tenant_generation(auth0_id)
+            return {"message": "Appointment series deleted successfully"}
+
+        except SeriesNotFoundException:
+            raise
+        except Exception as e:
+            self.db.rollback()
+            raise DatabaseOperationException("delete", str(e))
+
+    def update_occurrence(
+        self,
+        series_id: int,
+        occurrence_time: datetime,
+        appointment_update: AppointmentUpdate,
+        auth0_id: str,
+    ):
+        """Move, cancel or annotate one occurrence of a series by materializing it as
+        an appointment; fields left out keep the series' values. An occurrence that
+        already has its appointment updates that instead."""
+        try:
+            # Locking the series serializes materializing its occurrences
+            db_series = self.get_series(series_id, auth0_id, for_update=True)
+            occurrence_time = as_utc(occurrence_time)
+            existing = self.db.query(models.Appointment.id).filter(
+                models.Appointment.auth0_id == auth0_id,
+                models.Appointment.series_id == series_id,
+                models.Appointment.occurrence_time == occurrence_time
+            ).first()
+            if existing:
+                return self.update_appointment(existing.id, appointment_update, auth0_id)
+            if not is_occurrence(db_series, occurrence_time):
+                raise OccurrenceNotFoundException(series_id, occurrence_time.isoformat())
+
+            data = updated_values(appointment_update)
+            start = data.get("time", occurrence_time)
+            duration = data.get("duration_minutes", db_series.duration_minutes)
+            db_appointment = models.Appointment(
+                client_id=db_series.client_id,
+                time=start,
+                duration_minutes=duration,
+                end_time=end_time(start, duration),
+                status=data.get("status", db_series.status),
+                notes=data.get("notes", db_series.notes),
+                series_id=series_id,
+                occurrence_time=occurrence_time,
+                auth0_id=auth0_id
+            )
+            self._check_overlap(db_appointment)
+
+            self.db.add(db_appointment)
+            record_changes(self.db, auth0_id, [(db_appointment.time, db_appointment.status, 1)])
+            self.db.flush()
+            queue_event(self.db, auth0_id, CREATED, [db_appointment.id])
+            self.db.commit()
+            bump_tenant_generation(auth0_id)
+            self.db.refresh(db_appointment)
+            return db_appointment
+
+        except (
+            SeriesNotFoundException,
+            OccurrenceNotFoundException,
+            AppointmentNotFoundException,
+            AppointmentConflictException,
+            DatabaseOperationException
+        ):
+            self.db.rollback()
+            raise
+        except Exception as e:
+            self.db.rollback()
+            if is_overlap_violation(e):
+                raise AppointmentConflictException()
+            raise DatabaseOperationException("update", str(e))
+
+
+class AsyncAppointmentService(AsyncServiceFacade[AppointmentService]):
+    """Awaitable AppointmentService used by the API routers"""
+    service_class = AppointmentService
+
+    async def get_appointments(self, auth0_id: str, **kwargs):
+        return await self._run("get_appointments", auth0_id, **kwargs)
+
+    async def create_appointment(self, appointment: AppointmentCreate, auth0_id: str):
+        return await self._run("create_appointment", appointment, auth0_id)
+
+    async def get_appointment(self, appointment_id: int, auth0_id: str, **kwargs):
+        return await self._run("get_appointment", appointment_id, auth0_id, **kwargs)
+
+    async def update_appointment(self, appointment_id: int, appointment_update: AppointmentUpdate, auth0_id: str):
+        return await self._run("update_appointment", appointment_id, appointment_update, auth0_id)
+
+    async def delete_appointment(self, appointment_id: int, auth0_id: str):
+        return await self._run("delete_appointment", appointment_id, auth0_id)
+
+    async def bulk_create_appointments(self, rows: List[Tuple[int, AppointmentCreate]], auth0_id: str, **kwargs):
+        return await self._run("bulk_create_appointments", rows, auth0_id, **kwargs)
+
+    async def get_availability(self, auth0_id: str, **kwargs):
+        return await self._run("get_availability", auth0_id, **kwargs)
+
+    async def get_stats(self, auth0_id: str, **kwargs):
+        return await self._run("get_stats", auth0_id, **kwargs)
+
+    async def get_changes(self, auth0_id: str, **kwargs):
+        return await self._run("get_changes", auth0_id, **kwargs)
+
+    async def get_series_changes(self, auth0_id: str, **kwargs):
+        return await self._run("get_series_changes", auth0_id, **kwargs)
+
+    async def create_series(self, series: AppointmentSeriesCreate, auth0_id: str):
+        return await self._run("create_series", series, auth0_id)
+
+    async def get_series(self, series_id: int, auth0_id: str):
+        return await self._run("get_series", series_id, auth0_id)
+
+    async def delete_series(self, series_id: int, auth0_id: str):
+        return await self._run("delete_series", series_id, auth0_id)
+
+    async def update_occurrence(
+        self,
+        series_id: int,
+        occurrence_time: datetime,
+        appointment_update: AppointmentUpdate,
+        auth0_id: str,
+    ):
+        return await self._run("update_occurrence", series_id, occurrence_time, appointment_update, auth0_id)
+
+    async def export_appointments(self, auth0_id: str, **filters):
+        """Column names and an async iterator of row batches for a streaming export"""
+        statement = await self._run("export_statement", auth0_id, **filters)
+        return list(statement.selected_columns.keys()), self._stream(statement)
@@ -0,0 +1,50 @@
+from typing import AsyncIterator, Generic, List, Type, TypeVar, Union
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Row, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.config import get_settings
+
+S = TypeVar("S")
+
+class AsyncServiceFacade(Generic[S]):
+    """Awaitable wrapper around a synchronous service.
+
+    With an AsyncSession the service runs through ``AsyncSession.run_sync``, so its
+    queries go through the async driver and never block the event loop. With a plain
+    Session the service runs in the threadpool instead. Either way the business logic
+    lives in one place: the synchronous service class.
+    """
+    service_class: Type[S]
+
+    def __init__(self, db: Union[Session, AsyncSession]):
+        self.db = db
+
+    async def _run(self, method: str, *args, **kwargs):
+        if isinstance(self.db, AsyncSession):
+            return await self.db.run_sync(
+                lambda session: getattr(self.service_class(session), method)(*args, **kwargs)
+            )
+        return await run_in_threadpool(
+            getattr(self.service_class(self.db), method), *args, **kwargs
+        )
+
+    async def _stream(self, statement: Select) -> AsyncIterator[List[Row]]:
+        """Execute ``statement`` with a server-side cursor, yielding batches of rows.
+
+        Only EXPORT_BATCH_SIZE rows are held in memory at a time, however many match.
+        """
+        statement = statement.execution_options(yield_per=get_settings().EXPORT_BATCH_SIZE)
+        if isinstance(self.db, AsyncSession):
+            result = await self.db.stream(statement)
+            async for partition in result.partitions():
+                yield partition
+            return
+
+        result = await run_in_threadpool(self.db.execute, statement)
+        partitions = result.partitions()
+        while True:
+            partition = await run_in_threadpool(next, partitions, None)
+            if partition is None:
+                break
+            yield partition
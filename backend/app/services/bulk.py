@@ -0,0 +1,66 @@
+import logging
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.schemas.bulk import BulkRowError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# What a rejected chunk reports for the PostgreSQL errors a caller can act on;
+# anything else gets CHUNK_FAILED. The database's own message (SQL, constraint
+# names, values) is only logged.
+CHUNK_ERRORS = {
+    "23505": "Duplicates an existing row; chunk rolled back",
+    "23503": "References a row that does not exist; chunk rolled back",
+    "23P01": "Overlaps another appointment; chunk rolled back",
+}
+CHUNK_FAILED = "Insert failed; chunk rolled back"
+
+
+def chunked(items: Sequence[T], size: int) -> Iterator[Sequence[T]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def insert_chunks(
+    db: Session,
+    model,
+    values: List[Tuple[int, Dict]],
+    chunk_size: int,
+    errors: List[BulkRowError],
+    before_insert: Optional[Callable[[List[Tuple[int, Dict]]], List[Tuple[int, Dict]]]] = None,
+    before_commit: Optional[Callable[[List[Dict], List[int]], None]] = None,
+) -> List[int]:
+    """Insert ``(row index, column values)`` pairs with one multi-row
+    ``INSERT ... RETURNING id`` and one transaction per chunk.
+
+    A chunk that fails (e.g. a concurrent insert hit a unique index) is rolled
+    back and reported row by row; earlier chunks stay committed.
+    ``before_insert`` runs first in each chunk's transaction and returns the pairs
+    to insert (reporting any it rejects itself). ``before_commit`` gets each
+    chunk's rows and new ids for writes that must share its transaction.
+    """
+    ids: List[int] = []
+    statement = insert(model).returning(model.id, sort_by_parameter_order=True)
+    for chunk in chunked(values, chunk_size):
+        pending = chunk
+        try:
+            if before_insert is not None:
+                pending = before_insert(list(chunk))
+                if not pending:
+                    db.commit()
+                    continue
+            rows = [row for _, row in pending]
+            chunk_ids = list(db.execute(statement, rows).scalars())
+            if before_commit is not None:
+                before_commit(rows, chunk_ids)
+            db.commit()
+            ids.extend(chunk_ids)
+        except Exception as e:
+            db.rollback()
+            logger.exception("Bulk insert of %d %s rows rolled back", len(pending), model.__tablename__)
+            detail = CHUNK_ERRORS.get(getattr(getattr(e, "orig", None), "pgcode", None), CHUNK_FAILED)
+            errors.extend(BulkRowError(row=index, detail=detail) for index, _ in pending)
+    return ids
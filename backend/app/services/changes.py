@@ -0,0 +1,116 @@
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, text, tuple_
+from sqlalchemy.orm import Session
+from app.core.config import get_settings
+from app.core.exceptions import InvalidSyncTokenException
+from app.db import models
+from app.services.projection import Projection
+
+# (updated_at / deleted_at, id) of the last row handed out
+Watermark = Optional[Tuple[datetime, int]]
+
+
+def encode_sync_token(entity: str, rows: Watermark, deleted: Watermark) -> str:
+    """Opaque, URL-safe token holding the row and tombstone watermarks"""
+    payload = json.dumps({
+        "e": entity,
+        "u": [rows[0].isoformat(), rows[1]] if rows else None,
+        "d": [deleted[0].isoformat(), deleted[1]] if deleted else None,
+    }, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_sync_token(token: str, entity: str) -> Tuple[Watermark, Watermark]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if payload["e"] != entity:
+            raise ValueError(token)
+        return tuple(
+            (datetime.fromisoformat(mark[0]), int(mark[1])) if mark else None
+            for mark in (payload["u"], payload["d"])
+        )
+    except (ValueError, KeyError, TypeError, IndexError) as e:
+        raise InvalidSyncTokenException() from e
+
+
+# Start of the oldest transaction open in this database, ours included. Rows take
+# updated_at / deleted_at from now(), their transaction's start, so a transaction
+# still in flight can only commit changes at or after this bound
+OLDEST_OPEN_TRANSACTION = text(
+    "SELECT min(xact_start) FROM pg_stat_activity "
+    "WHERE datname = current_database() AND xact_start IS NOT NULL"
+)
+
+
+def _timestamp(value: datetime, dialect: str):
+    """Bound timestamp comparable with now() defaults: SQLite stores those as
+    text without fractional seconds, which would sort before an equal bound value"""
+    return func.datetime(value) if dialect == "sqlite" else value
+
+
+def _cutoff(db: Session, dialect: str):
+    """Bound below which no more changes can appear: changes at or after it are
+    left for a later call"""
+    if dialect == "postgresql":
+        return db.execute(OLDEST_OPEN_TRANSACTION).scalar() or func.now()
+    # SQLite (development) can't see other transactions; hold recent changes back
+    settle = timedelta(seconds=get_settings().CHANGES_SETTLE_SECONDS)
+    return _timestamp(datetime.now(timezone.utc) - settle, dialect)
+
+
+def changes_page(
+    db: Session,
+    model,
+    projection: Projection,
+    entity: str,
+    auth0_id: str,
+    since: Optional[str],
+    limit: int,
+) -> Dict:
+    """Rows of ``model`` created or updated after the ``since`` token, and tombstones
+    of the ones deleted, each read as a keyset range of its (auth0_id, timestamp, id)
+    index. Without a token the whole tenant is paged through (initial sync).
+
+    Timestamps are taken when a transaction starts, so a slow transaction could
+    commit a row behind a watermark that was already handed out. Changes are only
+    served up to the start of the oldest transaction still open (see ``_cutoff``),
+    however long it runs.
+    """
+    settings = get_settings()
+    limit = max(1, min(limit, settings.CHANGES_MAX_LIMIT))
+    rows_mark, deleted_mark = decode_sync_token(since, entity) if since else (None, None)
+    dialect = db.get_bind().dialect.name
+    cutoff = _cutoff(db, dialect)
+
+    query = db.query(*projection.columns).filter(model.auth0_id == auth0_id, model.updated_at < cutoff)
+    if rows_mark:
+        query = query.filter(tuple_(model.updated_at, model.id) > tuple_(_timestamp(rows_mark[0], dialect), rows_mark[1]))
+    rows = query.order_by(model.updated_at, model.id).limit(limit + 1).all()
+    items = projection.to_dicts(rows[:limit])
+
+    tombstone = models.Tombstone
+    query = db.query(tombstone.id, tombstone.entity_id, tombstone.deleted_at).filter(
+        tombstone.auth0_id == auth0_id,
+        tombstone.entity == entity,
+        tombstone.deleted_at < cutoff
+    )
+    if deleted_mark:
+        query = query.filter(tuple_(tombstone.deleted_at, tombstone.id) > tuple_(_timestamp(deleted_mark[0], dialect), deleted_mark[1]))
+    tombstones = query.order_by(tombstone.deleted_at, tombstone.id).limit(limit + 1).all()
+    deleted: List[Dict] = [{"id": t.entity_id, "deleted_at": t.deleted_at} for t in tombstones[:limit]]
+
+    if items:
+        rows_mark = (items[-1]["updated_at"], items[-1]["id"])
+    if deleted:
+        last = tombstones[len(deleted) - 1]
+        deleted_mark = (last.deleted_at, last.id)
+    return {
+        "items": items,
+        "deleted": deleted,
+        "next_token": encode_sync_token(entity, rows_mark, deleted_mark),
+        "has_more": len(rows) > limit or len(tombstones) > limit,
+    }
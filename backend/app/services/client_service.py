@@ -1,13 +1,41 @@
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple
+from enum import Enum
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import Select, and_, case, func, select
+from app.core.cache import bump_tenant_generation
+from app.core.config import get_settings
 from app.db import models
-from app.schemas.client import ClientCreate
+from app.schemas.bulk import BulkRowError
+from app.schemas.appointment import Appointment
+from app.schemas.client import Client, ClientCreate
 from app.core.exceptions import (
     ClientNotFoundException,
     EmailAlreadyExistsException,
-    DatabaseOperationException
+    DatabaseOperationException,
+    InvalidCursorException,
+    InvalidFieldsException,
+    InvalidSyncTokenException
 )
+from app.schemas.common import CountStrategy, PaginationMode, SearchMode
+from app.services.base import AsyncServiceFacade
+from app.services.bulk import chunked, insert_chunks
+from app.services.changes import changes_page
+from app.services.pagination import paginate, paginate_keyset
+from app.services.projection import Projection, schema_fields
+from app.services.search import apply_search
+
+class ClientLoad(str, Enum):
+    """Response shape a client query is loaded for (see AppointmentLoad)"""
+    PLAIN = "plain"                          # schemas.Client
+    WITH_APPOINTMENTS = "with_appointments"  # schemas.ClientWithAppointments
+
+# Listings select exactly the columns of their response shape
+CLIENT_PROJECTION = Projection(models.Client, schema_fields(Client))
+APPOINTMENT_PROJECTION = Projection(models.Appointment, schema_fields(Appointment))
+
+# Keyset orders of client and client-appointment listings
+CLIENT_KEYSET = (models.Client.name, models.Client.id)
+APPOINTMENT_KEYSET = (models.Appointment.time, models.Appointment.id)
 
 class ClientService:
     def __init__(self, db: Session):
@@ -19,44 +47,68 @@ class ClientService:
         page: int = 1,
         page_size: int = 10,
         search: Optional[str] = None,
+        search_mode: SearchMode = SearchMode.CONTAINS,
+        pagination: PaginationMode = PaginationMode.OFFSET,
+        cursor: Optional[str] = None,
+        count: Optional[CountStrategy] = None,
+        include_total: bool = True,
+        fields: Optional[str] = None,
     ):
-        """Get all clients with pagination and optional search"""
+        """Get all clients with pagination and optional search; items are plain dicts"""
         try:
-            query = self.db.query(models.Client).filter(models.Client.auth0_id == auth0_id)
+            projection = CLIENT_PROJECTION.subset(fields, keys=CLIENT_KEYSET) if fields else CLIENT_PROJECTION
+            query = self.db.query(*projection.columns).filter(models.Client.auth0_id == auth0_id)
             
+            use_cursor = pagination == PaginationMode.CURSOR or bool(cursor)
+
             if search:
-                search_term = f"%{search}%"
-                query = query.filter(
-                    or_(
-                        models.Client.name.ilike(search_term),
-                        models.Client.email.ilike(search_term),
-                        models.Client.phone.ilike(search_term)
-                    )
+                # Keyset pages are ordered by their key, so ranking only applies to offset pages
+                mode = SearchMode.CONTAINS if use_cursor else search_mode
+                query = apply_search(
+                    query,
+                    [models.Client.name, models.Client.email, models.Client.phone],
+                    search,
+                    mode,
+                    self.db.get_bind().dialect.name
                 )
             
-            total = query.count()
-            total_pages = (total + page_size - 1) // page_size
-            
-            # Normalize page numbers
-            page = max(1, min(page, total_pages if total_pages > 0 else 1))
-            
-            clients = query.offset((page - 1) * page_size).limit(page_size).all()
-            
-            return {
-                "items": clients,
-                "total": total,
-                "page": page,
-                "page_size": page_size,
-                "total_pages": total_pages,
-                "has_next": page < total_pages,
-                "has_previous": page > 1
-            }
+            if use_cursor:
+                result = paginate_keyset(query, CLIENT_KEYSET, cursor, page_size)
+            else:
+                # Ranked search orders first; the key keeps pages stable either way
+                result = paginate(
+                    query.order_by(*CLIENT_KEYSET), page, page_size, auth0_id, count=count, include_total=include_total
+                )
+            result["items"] = projection.to_dicts(result["items"])
+            return result
+        except (InvalidCursorException, InvalidFieldsException):
+            raise
         except Exception as e:
             raise DatabaseOperationException("query", str(e))
 
-    def get_client(self, client_id: int, auth0_id: str):
-        """Get a specific client by ID"""
+    def get_client(
+        self,
+        client_id: int,
+        auth0_id: str,
+        load: ClientLoad = ClientLoad.WITH_APPOINTMENTS,
+        fields: Optional[str] = None,
+    ):
+        """Get a specific client by ID; with ``fields``, a dict of just those columns
+        (the appointment preview is left out)"""
         try:
+            if fields:
+                projection = CLIENT_PROJECTION.subset(fields)
+                row = self.db.query(*projection.columns).filter(
+                    models.Client.id == client_id,
+                    models.Client.auth0_id == auth0_id
+                ).first()
+                if not row:
+                    raise ClientNotFoundException(client_id)
+                return projection.to_dict(row)
+
+            if load == ClientLoad.WITH_APPOINTMENTS:
+                return self._get_client_with_appointment_preview(client_id, auth0_id)
+
             client = self.db.query(models.Client).filter(
                 models.Client.id == client_id,
                 models.Client.auth0_id == auth0_id
@@ -66,51 +118,103 @@ class ClientService:
                 raise ClientNotFoundException(client_id)
                 
             return client
-        except ClientNotFoundException:
+        except (ClientNotFoundException, InvalidFieldsException):
             raise
         except Exception as e:
             raise DatabaseOperationException("query", str(e))
 
+    def _get_client_with_appointment_preview(self, client_id: int, auth0_id: str) -> Dict:
+        """Client plus its next/most recent appointments (upcoming first), in one query"""
+        limit = get_settings().CLIENT_APPOINTMENTS_PREVIEW_LIMIT
+        upcoming = models.Appointment.time >= func.now()
+
+        rows = self.db.query(models.Client, models.Appointment).outerjoin(
+            models.Appointment,
+            and_(
+                models.Appointment.client_id == models.Client.id,
+                models.Appointment.auth0_id == auth0_id
+            )
+        ).filter(
+            models.Client.id == client_id,
+            models.Client.auth0_id == auth0_id
+        ).order_by(
+            case((upcoming, 0), else_=1),
+            case((upcoming, models.Appointment.time)),  # soonest upcoming first
+            models.Appointment.time.desc(),              # then most recent past
+            models.Appointment.id.desc()
+        ).limit(limit + 1).all()
+
+        if not rows:
+            raise ClientNotFoundException(client_id)
+
+        client = rows[0][0]
+        appointments = [appointment for _, appointment in rows if appointment is not None]
+        return {
+            **{column.key: getattr(client, column.key) for column in models.Client.__table__.columns},
+            "appointments": appointments[:limit],
+            "appointments_has_more": len(appointments) > limit,
+        }
+
     def get_client_appointments(
         self,
         client_id: int,
         auth0_id: str,
         page: int = 1,
-        page_size: int = 10
+        page_size: int = 10,
+        pagination: PaginationMode = PaginationMode.OFFSET,
+        cursor: Optional[str] = None,
+        count: Optional[CountStrategy] = None,
+        include_total: bool = True,
+        fields: Optional[str] = None,
     ):
         """Get all appointments for a specific client with pagination"""
         try:
             # Check if client exists and belongs to the user
-            client = self.get_client(client_id, auth0_id)
+            client = self.get_client(client_id, auth0_id, load=ClientLoad.PLAIN)
             
+            projection = (
+                APPOINTMENT_PROJECTION.subset(fields, keys=APPOINTMENT_KEYSET) if fields else APPOINTMENT_PROJECTION
+            )
             # Get appointments query
-            query = self.db.query(models.Appointment).filter(
+            query = self.db.query(*projection.columns).filter(
                 models.Appointment.client_id == client_id,
                 models.Appointment.auth0_id == auth0_id
             )
             
-            total = query.count()
-            total_pages = (total + page_size - 1) // page_size
-            
-            # Normalize page numbers
-            page = max(1, min(page, total_pages if total_pages > 0 else 1))
-            
-            appointments = query.offset((page - 1) * page_size).limit(page_size).all()
-            
-            return {
-                "items": appointments,
-                "total": total,
-                "page": page,
-                "page_size": page_size,
-                "total_pages": total_pages,
-                "has_next": page < total_pages,
-                "has_previous": page > 1
-            }
-        except ClientNotFoundException:
+            if pagination == PaginationMode.CURSOR or cursor:
+                result = paginate_keyset(query, APPOINTMENT_KEYSET, cursor, page_size)
+            else:
+                result = paginate(
+                    query.order_by(*APPOINTMENT_KEYSET), page, page_size, auth0_id,
+                    count=count, include_total=include_total
+                )
+            result["items"] = projection.to_dicts(result["items"])
+            return result
+        except (ClientNotFoundException, InvalidCursorException, InvalidFieldsException):
             raise
         except Exception as e:
             raise DatabaseOperationException("query", str(e))
 
+    def export_statement(self, auth0_id: str, search: Optional[str] = None) -> Select:
+        """Column-only SELECT of every matching client, in (name, id) order, for streaming"""
+        statement = select(
+            models.Client.id,
+            models.Client.name,
+            models.Client.email,
+            models.Client.phone,
+            models.Client.created_at,
+            models.Client.updated_at
+        ).where(models.Client.auth0_id == auth0_id)
+        if search:
+            statement = apply_search(
+                statement,
+                [models.Client.name, models.Client.email, models.Client.phone],
+                search,
+                SearchMode.CONTAINS,
+                self.db.get_bind().dialect.name
+            )
+        return statement.order_by(models.Client.name, models.Client.id)
+
     def create_client(self, client: ClientCreate, auth0_id: str):
         """Create a new client"""
         try:
@@ -133,6 +237,7 @@ class ClientService:
             
             self.db.add(db_client)
             self.db.commit()
+            bump_tenant_generation(auth0_id)
             self.db.refresh(db_client)
             return db_client
             
@@ -140,4 +245,83 @@ class ClientService:
             raise
         except Exception as e:
             self.db.rollback()
-            raise DatabaseOperationException("create", str(e)) 
\ No newline at end of file
+            raise DatabaseOperationException("create", str(e)) 
+
+    def bulk_create_clients(
+        self,
+        rows: List[Tuple[int, ClientCreate]],
+        auth0_id: str,
+        errors: Optional[List[BulkRowError]] = None,
+    ) -> Dict:
+        """Create many clients: one duplicate-email lookup per chunk, multi-row inserts"""
+        errors = list(errors or [])
+        chunk_size = get_settings().BULK_CHUNK_SIZE
+        try:
+            existing = set()
+            for chunk in chunked([client.email for _, client in rows], chunk_size):
+                existing.update(self.db.execute(
+                    select(models.Client.email).where(
+                        models.Client.auth0_id == auth0_id,
+                        models.Client.email.in_(chunk)
+                    )
+                ).scalars())
+
+            values = []
+            for index, client in rows:
+                if client.email in existing:
+                    errors.append(BulkRowError(row=index, detail=f"Email {client.email} is already registered"))
+                    continue
+                existing.add(client.email)  # also rejects duplicates within the batch
+                values.append((index, {
+                    "name": client.name,
+                    "email": client.email,
+                    "phone": client.phone,
+                    "auth0_id": auth0_id
+                }))
+
+            ids = insert_chunks(self.db, models.Client, values, chunk_size, errors)
+        except Exception as e:
+            self.db.rollback()
+            raise DatabaseOperationException("create", str(e))
+
+        if ids:
+            bump_tenant_generation(auth0_id)
+
+        return {"created": len(ids), "ids": ids, "errors": sorted(errors, key=lambda e: e.row)}
+
+    def get_changes(self, auth0_id: str, since: Optional[str] = None, limit: int = 500) -> Dict:
+        """Clients changed and deleted since the ``since`` sync token"""
+        try:
+            return changes_page(self.db, models.Client, CLIENT_PROJECTION, "client", auth0_id, since, limit)
+        except InvalidSyncTokenException:
+            raise
+        except Exception as e:
+            raise DatabaseOperationException("query", str(e))
+
+
+class AsyncClientService(AsyncServiceFacade[ClientService]):
+    """Awaitable ClientService used by the API routers"""
+    service_class = ClientService
+
+    async def get_clients(self, auth0_id: str, **kwargs):
+        return await self._run("get_clients", auth0_id, **kwargs)
+
+    async def get_client(self, client_id: int, auth0_id: str, **kwargs):
+        return await self._run("get_client", client_id, auth0_id, **kwargs)
+
+    async def get_client_appointments(self, client_id: int, auth0_id: str, **kwargs):
+        return await self._run("get_client_appointments", client_id, auth0_id, **kwargs)
+
+    async def create_client(self, client: ClientCreate, auth0_id: str):
+        return await self._run("create_client", client, auth0_id)
+
+    async def bulk_create_clients(self, rows: List[Tuple[int, ClientCreate]], auth0_id: str, **kwargs):
+        return await self._run("bulk_create_clients", rows, auth0_id, **kwargs)
+
+    async def get_changes(self, auth0_id: str, **kwargs):
+        return await self._run("get_changes", auth0_id, **kwargs)
+
+    async def export_clients(self, auth0_id: str, **filters):
+        """Column names and an async iterator of row batches for a streaming export"""
+        statement = await self._run("export_statement", auth0_id, **filters)
+        return list(statement.selected_columns.keys()), self._stream(statement)
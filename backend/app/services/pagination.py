@@ -0,0 +1,277 @@
+import base64
+import hashlib
+import heapq
+import json
+import logging
+from datetime import date, datetime
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import tuple_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Query
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from app.core.cache import NullCacheBackend, get_cache_backend, get_tenant_generation
+from app.core.config import get_settings
+from app.core.exceptions import InvalidCursorException
+from app.schemas.common import CountStrategy
+
+logger = logging.getLogger(__name__)
+
+NEXT = "next"
+PREV = "prev"
+
+
+class Explain(Executable, ClauseElement):
+    """``EXPLAIN (FORMAT JSON)`` of a statement, compiled with its bound parameters"""
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+@lru_cache(maxsize=None)
+def _warn_uncached_count() -> None:
+    logger.warning("count=cached with CACHE_BACKEND=none counts exactly on every request; "
+                   "set CACHE_BACKEND to memory or redis")
+
+
+def _cached_count(query: Query, auth0_id: str) -> int:
+    """Exact count, cached per tenant and filter until the tenant's next write.
+    Counted every time without a cache backend or while it can't be reached."""
+    backend = get_cache_backend()
+    if isinstance(backend, NullCacheBackend):
+        _warn_uncached_count()
+        return query.count()
+    generation = get_tenant_generation(auth0_id)
+    if generation is None:
+        return query.count()
+    compiled = query.statement.compile(dialect=query.session.get_bind().dialect)
+    filters = f"{compiled}|{sorted(compiled.params.items())!r}"
+    key = f"count:{auth0_id}:{generation}:{hashlib.sha256(filters.encode('utf-8')).hexdigest()}"
+    try:
+        cached = backend.get(key)
+        if cached is not None:
+            return int(cached)
+    except Exception:
+        logger.exception("Count cache read failed; counting")
+    total = query.count()
+    try:
+        backend.set(key, str(total).encode(), ttl=get_settings().COUNT_CACHE_TTL)
+    except Exception:
+        logger.exception("Count cache write failed")
+    return total
+
+
+def _estimated_count(query: Query) -> Optional[int]:
+    """Row estimate from the PostgreSQL planner, or None where it can't be trusted.
+
+    Small estimates are discarded in favour of an exact count: those are cheap to
+    count and the planner is least accurate for them.
+    """
+    if query.session.get_bind().dialect.name != "postgresql":
+        return None
+    plan = query.session.execute(Explain(query.statement)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    estimate = int(plan[0]["Plan"]["Plan Rows"])
+    return estimate if estimate >= get_settings().COUNT_ESTIMATE_THRESHOLD else None
+
+
+def count_total(query: Query, strategy: CountStrategy, auth0_id: str) -> Tuple[int, bool]:
+    """Total rows for ``query`` using ``strategy``; returns (total, is_estimate)"""
+    if strategy == CountStrategy.ESTIMATED:
+        estimate = _estimated_count(query)
+        if estimate is not None:
+            return estimate, True
+    if strategy == CountStrategy.CACHED:
+        return _cached_count(query, auth0_id), False
+    return query.count(), False
+
+
+def paginate(
+    query: Query,
+    page: int,
+    page_size: int,
+    auth0_id: str,
+    count: Optional[CountStrategy] = None,
+    include_total: bool = True,
+) -> Dict:
+    """Offset pagination, as used by the UI tables.
+
+    ``count`` picks how the total is computed (default: COUNT_STRATEGY). With
+    ``include_total=False`` no count runs at all and total/total_pages are null.
+    Whenever the total is not exact, one extra row is fetched to tell whether a
+    next page exists.
+    """
+    total = total_pages = None
+    estimated = False
+    if include_total:
+        strategy = count or CountStrategy(get_settings().COUNT_STRATEGY)
+        total, estimated = count_total(query, strategy, auth0_id)
+        total_pages = (total + page_size - 1) // page_size
+
+    if total is not None and not estimated:
+        # Normalize page numbers
+        page = max(1, min(page, total_pages if total_pages > 0 else 1))
+        items = query.offset((page - 1) * page_size).limit(page_size).all()
+        has_next = page < total_pages
+    else:
+        page = max(1, page)
+        items = query.offset((page - 1) * page_size).limit(page_size + 1).all()
+        has_next = len(items) > page_size
+        items = items[:page_size]
+
+    return {
+        "items": items,
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": total_pages,
+        "total_estimated": estimated,
+        "has_next": has_next,
+        "has_previous": page > 1
+    }
+
+
+def paginate_merged(
+    query: Query,
+    extra: Callable[[], Iterable],
+    key: Callable[[Any], Any],
+    page: int,
+    page_size: int,
+    auth0_id: str,
+    count: Optional[CountStrategy] = None,
+    include_total: bool = True,
+) -> Dict:
+    """Offset pagination over the rows of ``query`` merged with items that are not
+    stored (``extra()`` returns a fresh iterator of them), as one listing.
+
+    Both sources must be ordered by ``key``. Only the first page * page_size + 1
+    items of each are read; the total adds up every extra item.
+    """
+    total = total_pages = None
+    estimated = False
+    if include_total:
+        strategy = count or CountStrategy(get_settings().COUNT_STRATEGY)
+        total, estimated = count_total(query, strategy, auth0_id)
+        total += sum(1 for _ in extra())
+        total_pages = (total + page_size - 1) // page_size
+
+    if total is not None and not estimated:
+        page = max(1, min(page, total_pages if total_pages > 0 else 1))
+    else:
+        page = max(1, page)
+    end = page * page_size + 1
+    rows = query.limit(end).all()
+    items = list(islice(heapq.merge(rows, islice(extra(), end), key=key), (page - 1) * page_size, end))
+    has_next = len(items) > page_size
+
+    return {
+        "items": items[:page_size],
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": total_pages,
+        "total_estimated": estimated,
+        "has_next": has_next,
+        "has_previous": page > 1
+    }
+
+
+def _dump_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _load_value(column, value: Any) -> Any:
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(values: Sequence[Any], direction: str) -> str:
+    """Encode sort-key values into an opaque, URL-safe cursor"""
+    payload = json.dumps({"k": [_dump_value(v) for v in values], "d": direction}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> tuple:
+    """Decode a cursor produced by encode_cursor back into (values, direction)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        values = payload["k"]
+        direction = payload["d"]
+        if direction not in (NEXT, PREV) or len(values) != len(columns):
+            raise ValueError(cursor)
+        return [_load_value(c, v) for c, v in zip(columns, values)], direction
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorException("malformed or issued for another listing") from e
+
+
+def paginate_keyset(
+    query: Query,
+    columns: Sequence,
+    cursor: Optional[str],
+    page_size: int,
+    extra: Optional[Callable[[Optional[list], str], Iterable]] = None,
+    key: Optional[Callable[[Any], Any]] = None,
+) -> Dict:
+    """Keyset pagination over ``columns`` (the last one must be unique, e.g. the id).
+
+    Seeks with a row-value comparison so each page is a bounded index range scan,
+    whatever its depth, and no count is run.
+
+    ``extra(values, direction)`` can supply items that are not stored, past the
+    cursor's ``values`` (None on the first page) in ``direction`` order; they are
+    merged in by ``key`` and must have the ``columns`` as attributes.
+    """
+    direction = NEXT
+    values = None
+    if cursor:
+        values, direction = decode_cursor(cursor, columns)
+        if direction == NEXT:
+            query = query.filter(tuple_(*columns) > tuple_(*values))
+        else:
+            query = query.filter(tuple_(*columns) < tuple_(*values))
+
+    if direction == NEXT:
+        query = query.order_by(*[c.asc() for c in columns])
+    else:
+        query = query.order_by(*[c.desc() for c in columns])
+
+    items: List = query.limit(page_size + 1).all()
+    if extra is not None:
+        merged = heapq.merge(items, islice(extra(values, direction), page_size + 1), key=key, reverse=direction == PREV)
+        items = list(islice(merged, page_size + 1))
+    has_more = len(items) > page_size
+    items = items[:page_size]
+    if direction == PREV:
+        items.reverse()
+        has_next, has_previous = True, has_more
+    else:
+        has_next, has_previous = has_more, bool(cursor)
+
+    def keys(item) -> List[Any]:
+        return [getattr(item, c.key) for c in columns]
+
+    return {
+        "items": items,
+        "page_size": page_size,
+        "next_cursor": encode_cursor(keys(items[-1]), NEXT) if items and has_next else None,
+        "prev_cursor": encode_cursor(keys(items[0]), PREV) if items and has_previous else None,
+        "has_next": has_next,
+        "has_previous": has_previous
+    }
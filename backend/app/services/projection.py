@@ -0,0 +1,98 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+from pydantic import BaseModel
+from app.core.exceptions import InvalidFieldsException
+
+# Separates a relation from its field in result labels: client__name -> {"client": {"name": ...}}
+SEP = "__"
+
+
+def schema_fields(schema: Type[BaseModel], exclude: Sequence[str] = ()) -> List[str]:
+    """Stored fields of a response schema, i.e. everything but computed fields"""
+    return [name for name in schema.model_fields if name not in exclude]
+
+
+def parse_fields(fields: str, allowed: Sequence[str]) -> List[str]:
+    """Names listed in a comma-separated ``fields=`` parameter, in ``allowed`` order"""
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested.difference(allowed)
+    if unknown:
+        raise InvalidFieldsException(sorted(unknown), list(allowed))
+    return [name for name in allowed if name in requested]
+
+
+class Projection:
+    """Column-only select of ``model`` (plus fields of to-one relations) whose rows
+    are reshaped into the nested dicts a response schema serializes to.
+
+    Rows skip ORM identity-map bookkeeping and the dicts need no validation:
+    the columns are the schema's fields, so the shape is guaranteed.
+
+    ``keys`` are columns of ``model`` that must be selected even when they are not
+    output fields (e.g. keyset pagination keys); they are left out of the dicts.
+    """
+
+    def __init__(
+        self,
+        model,
+        fields: Sequence[str],
+        relations: Optional[Dict[str, Tuple[Any, Sequence[str]]]] = None,
+        keys: Sequence = (),
+    ):
+        self.model = model
+        self.fields = list(fields)
+        self.relations = {
+            relation: (related_model, list(related_fields))
+            for relation, (related_model, related_fields) in (relations or {}).items()
+            if related_fields
+        }
+        self.columns = [getattr(model, name).label(name) for name in self.fields]
+        self._layout: List[Tuple[str, Optional[str]]] = [(name, None) for name in self.fields]
+        for relation, (related_model, related_fields) in self.relations.items():
+            for name in related_fields:
+                self.columns.append(getattr(related_model, name).label(f"{relation}{SEP}{name}"))
+                self._layout.append((relation, name))
+        # Trailing columns past the layout are selected but not output
+        self.columns.extend(key.label(key.key) for key in keys if key.key not in self.fields)
+
+    @property
+    def allowed(self) -> List[str]:
+        """Names ``subset`` accepts: own fields, relation names and relation.field pairs"""
+        names = list(self.fields)
+        for relation, (_, related_fields) in self.relations.items():
+            names.append(relation)
+            names.extend(f"{relation}.{name}" for name in related_fields)
+        return names
+
+    def subset(self, fields: str, keys: Sequence = ()) -> "Projection":
+        """Sparse fieldset: only the columns named in a ``fields=`` parameter.
+
+        The id is always selected. A relation name selects all of its fields and
+        "relation.field" single ones; relations not named are not selected at all.
+        """
+        requested = parse_fields(fields, self.allowed)
+        relations = {}
+        for relation, (related_model, related_fields) in self.relations.items():
+            if relation in requested:
+                relations[relation] = (related_model, related_fields)
+            else:
+                relations[relation] = (
+                    related_model, [name for name in related_fields if f"{relation}.{name}" in requested]
+                )
+        own = [name for name in self.fields if name == "id" or name in requested]
+        return Projection(self.model, own, relations, keys=keys)
+
+    def to_dict(self, row: Sequence) -> Dict:
+        item: Dict[str, Any] = {}
+        for (key, nested), value in zip(self._layout, row):
+            if nested is None:
+                item[key] = value
+            else:
+                item.setdefault(key, {})[nested] = value
+        return item
+
+    def from_values(self, values: Dict[str, Any]) -> Dict:
+        """``to_dict`` of an item that was not selected but given by column label"""
+        return self.to_dict([values.get(column.key) for column in self.columns])
+
+    def to_dicts(self, rows: Sequence[Sequence]) -> List[Dict]:
+        return [self.to_dict(row) for row in rows]
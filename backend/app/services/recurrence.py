@@ -0,0 +1,183 @@
+import heapq
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from dateutil.rrule import rrule, rrulestr
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.core.exceptions import InvalidRecurrenceRuleException
+from app.db import models
+from app.schemas.appointment import AppointmentStatus
+from app.services.projection import SEP
+from app.services.scheduling import as_utc
+
+# Finer frequencies would expand one series into thousands of occurrences per view
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+
+# (series id, UTC start) of occurrences replaced by a materialized appointment
+Replaced = Set[Tuple[int, datetime]]
+
+
+class Occurrence(NamedTuple):
+    """An occurrence of a series that has no appointment row"""
+    time: datetime  # UTC start
+    series: models.AppointmentSeries
+
+    @property
+    def id(self) -> int:
+        # Keyset tie-breaker: sorts before appointments at the same time and never
+        # equals one of their (positive) ids
+        return -self.series.id
+
+    @property
+    def end_time(self) -> datetime:
+        return self.time + timedelta(minutes=self.series.duration_minutes)
+
+
+def sort_key(item) -> Tuple[datetime, int]:
+    """(time, id) order shared by appointment rows and occurrences"""
+    return as_utc(item.time), item.id
+
+
+def _rule_params(text: str) -> Dict[str, str]:
+    body = text.strip()
+    if body.upper().startswith("RRULE:"):
+        body = body[len("RRULE:"):]
+    return dict(part.upper().partition("=")[::2] for part in body.split(";") if part)
+
+
+def parse_rule(text: str, start: datetime, time_zone: str) -> rrule:
+    """RRULE anchored at ``start``, repeating its wall-clock time in ``time_zone``
+    (so a 09:00 session stays at 09:00 across DST changes)"""
+    if "\n" in text or "\r" in text:
+        raise InvalidRecurrenceRuleException("expected a single RRULE, without DTSTART, RDATE or EXDATE")
+    if _rule_params(text).get("FREQ") not in FREQUENCIES:
+        raise InvalidRecurrenceRuleException(f"FREQ must be one of {', '.join(FREQUENCIES)}")
+    try:
+        tz = ZoneInfo(time_zone)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise InvalidRecurrenceRuleException(f"unknown time zone {time_zone!r}")
+    try:
+        return rrulestr(text.strip(), dtstart=as_utc(start).astimezone(tz))
+    except (ValueError, TypeError) as e:
+        raise InvalidRecurrenceRuleException(str(e))
+
+
+def series_until(text: str, start: datetime, time_zone: str, duration_minutes: int, max_occurrences: int) -> Optional[datetime]:
+    """End of the last occurrence of a bounded (COUNT or UNTIL) rule, None for an
+    open-ended one; raises InvalidRecurrenceRuleException for an invalid rule"""
+    rule = parse_rule(text, start, time_zone)
+    if not {"COUNT", "UNTIL"} & _rule_params(text).keys():
+        return None
+    occurrences = list(islice(rule, max_occurrences + 1))
+    if not occurrences:
+        raise InvalidRecurrenceRuleException("the rule has no occurrences")
+    if len(occurrences) > max_occurrences:
+        raise InvalidRecurrenceRuleException(
+            f"at most {max_occurrences} occurrences; leave out COUNT and UNTIL for an open-ended series"
+        )
+    return as_utc(occurrences[-1]) + timedelta(minutes=duration_minutes)
+
+
+@lru_cache(maxsize=1024)
+def _cached_rule(text: str, start: datetime, time_zone: str) -> rrule:
+    return parse_rule(text, start, time_zone)
+
+
+def series_rule(series: models.AppointmentSeries) -> rrule:
+    return _cached_rule(series.rrule, as_utc(series.start_time), series.time_zone)
+
+
+def is_occurrence(series: models.AppointmentSeries, time: datetime) -> bool:
+    following = next(series_rule(series).xafter(as_utc(time), inc=True), None)
+    return following is not None and following == as_utc(time)
+
+
+def _series_occurrences(series: models.AppointmentSeries, start: datetime, end: datetime, replaced: Replaced) -> Iterator[Occurrence]:
+    for local in series_rule(series).xafter(start, inc=True):
+        time = local.astimezone(timezone.utc)
+        if time > end:
+            return
+        if (series.id, time) not in replaced:
+            yield Occurrence(time, series)
+
+
+def expand(series: Iterable[models.AppointmentSeries], start: datetime, end: datetime, replaced: Replaced) -> Iterator[Occurrence]:
+    """Occurrences of ``series`` starting in [start, end] that were not replaced,
+    generated lazily and merged into (time, id) order"""
+    return heapq.merge(*(_series_occurrences(s, start, end, replaced) for s in series), key=sort_key)
+
+
+def in_window(start: datetime, end: datetime):
+    """Filter for series that can have occurrences between ``start`` and ``end``"""
+    series = models.AppointmentSeries
+    return series.start_time <= end, or_(series.until.is_(None), series.until > start)
+
+
+def replaced_occurrences(db: Session, series_ids: Sequence[int], start: datetime, end: datetime) -> Replaced:
+    """Occurrences of ``series_ids`` starting in [start, end] that have an appointment row"""
+    if not series_ids:
+        return set()
+    rows = db.query(models.Appointment.series_id, models.Appointment.occurrence_time).filter(
+        models.Appointment.series_id.in_(series_ids),
+        models.Appointment.occurrence_time >= start,
+        models.Appointment.occurrence_time <= end
+    ).all()
+    return {(series_id, as_utc(time)) for series_id, time in rows}
+
+
+def overlapping_occurrences(
+    db: Session,
+    auth0_id: str,
+    start: datetime,
+    end: datetime,
+    replaced: Optional[Tuple[int, datetime]] = None,
+    exclude_series: Optional[int] = None,
+) -> Iterator[Occurrence]:
+    """Occurrences of the tenant's active series overlapping [start, end), besides
+    the ``replaced`` one and those of ``exclude_series``"""
+    query = db.query(models.AppointmentSeries).filter(
+        models.AppointmentSeries.auth0_id == auth0_id,
+        models.AppointmentSeries.status != AppointmentStatus.CANCELLED.value,
+        *in_window(start, end)
+    )
+    if exclude_series is not None:
+        query = query.filter(models.AppointmentSeries.id != exclude_series)
+    series = query.all()
+    if not series:
+        return iter(())
+    lead = timedelta(minutes=max(s.duration_minutes for s in series))
+    skip = replaced_occurrences(db, [s.id for s in series], start - lead, end)
+    if replaced is not None:
+        skip.add((replaced[0], as_utc(replaced[1])))
+    return (
+        occurrence for occurrence in expand(series, start - lead, end, skip)
+        if occurrence.time < end and occurrence.end_time > start
+    )
+
+
+def occurrence_values(occurrence: Occurrence) -> Dict[str, Any]:
+    """An occurrence as appointment columns, by Projection label"""
+    series = occurrence.series
+    values: Dict[str, Any] = {
+        "id": None,
+        "client_id": series.client_id,
+        "time": occurrence.time,
+        "duration_minutes": series.duration_minutes,
+        "end_time": occurrence.end_time,
+        "status": series.status,
+        "notes": series.notes,
+        "created_at": series.created_at,
+        "updated_at": series.updated_at,
+        "series_id": series.id,
+        "occurrence_time": occurrence.time,
+    }
+    for column in models.Client.__table__.columns:
+        values[f"client{SEP}{column.key}"] = getattr(series.client, column.key)
+    return values
+
+
+def occurrence_intervals(occurrences: Iterable[Occurrence]) -> List[Tuple[datetime, datetime]]:
+    return [(occurrence.time, occurrence.end_time) for occurrence in occurrences]
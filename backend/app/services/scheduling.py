@@ -0,0 +1,122 @@
+from bisect import bisect_left
+from datetime import date, datetime, time, timedelta, timezone, tzinfo
+from typing import Iterable, List, Sequence, Set, Tuple
+from sqlalchemy import and_, func, literal_column, select
+from sqlalchemy.orm import Session
+from app.db import models
+from app.schemas.appointment import AppointmentStatus
+
+# SQLSTATE raised by the partitions' no-overlap exclusion constraints
+EXCLUSION_VIOLATION = "23P01"
+
+# Longest appointment (the schemas cap duration_minutes at a day); bounds how far
+# before a range an overlapping appointment can start
+MAX_DURATION = timedelta(days=1)
+
+Interval = Tuple[datetime, datetime]
+
+
+def end_time(start: datetime, duration_minutes: int) -> datetime:
+    return start + timedelta(minutes=duration_minutes)
+
+
+def as_utc(value: datetime) -> datetime:
+    """Aware UTC datetime; naive values (SQLite) are taken to be UTC"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def overlapping(start: datetime, end: datetime, dialect: str):
+    """Filter for active (not cancelled) appointments overlapping [start, end)
+
+    Also bounds the start time, which the range operator alone doesn't, so only
+    the monthly partitions that can hold an overlap are scanned.
+    """
+    # Inlined rather than bound, so the predicate and range expression match the
+    # exclusion constraint's partial GiST index even under generic (prepared) plans
+    cancelled = literal_column(f"'{AppointmentStatus.CANCELLED.value}'")
+    bounds = literal_column("'[)'")
+    active = models.Appointment.status != cancelled
+    if dialect == "postgresql":
+        overlap = func.tstzrange(models.Appointment.time, models.Appointment.end_time, bounds).op("&&")(
+            func.tstzrange(start, end, bounds)
+        )
+    else:
+        overlap = and_(models.Appointment.time < end, models.Appointment.end_time > start)
+    pruning = and_(models.Appointment.time < end, models.Appointment.time > start - MAX_DURATION)
+    return and_(active, overlap, pruning)
+
+
+def lock_tenant_schedule(db: Session, auth0_id: str) -> None:
+    """Serialize the tenant's overlap checks until the transaction ends (PostgreSQL).
+
+    The exclusion constraints only compare rows within one monthly partition, so
+    a check followed by an insert must not interleave with another of the same
+    tenant's: otherwise both could pass and commit overlapping appointments in
+    neighbouring partitions.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(select(func.pg_advisory_xact_lock(func.hashtext(auth0_id))))
+
+
+def is_overlap_violation(error: Exception) -> bool:
+    """Whether a failed flush/commit was rejected by the overlap constraint"""
+    return getattr(getattr(error, "orig", None), "pgcode", None) == EXCLUSION_VIOLATION
+
+
+def working_windows(start_date: date, end_date: date, day_start: time, day_end: time, tz: tzinfo) -> List[Interval]:
+    """[day_start, day_end) of every day in the range, as wall-clock times in ``tz``"""
+    windows = []
+    day = start_date
+    while day <= end_date:
+        windows.append((datetime.combine(day, day_start, tz), datetime.combine(day, day_end, tz)))
+        day += timedelta(days=1)
+    return windows
+
+
+def merge(intervals: Iterable[Interval]) -> List[Interval]:
+    """Sorted, disjoint union of ``intervals``"""
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def free_slots(windows: Sequence[Interval], busy: Iterable[Interval], duration: timedelta) -> List[Interval]:
+    """Gaps of at least ``duration`` inside ``windows`` (sorted, disjoint) not covered by ``busy``"""
+    merged = merge(busy)
+    slots: List[Interval] = []
+    first = 0
+    for window_start, window_end in windows:
+        while first < len(merged) and merged[first][1] <= window_start:
+            first += 1
+        cursor = window_start
+        for busy_start, busy_end in merged[first:]:
+            if busy_start >= window_end:
+                break
+            if busy_start - cursor >= duration:
+                slots.append((cursor, busy_start))
+            cursor = max(cursor, busy_end)
+        if window_end - cursor >= duration:
+            slots.append((cursor, window_end))
+    return slots
+
+
+def conflicting_rows(candidates: Sequence[Tuple[int, datetime, datetime]], existing: Iterable[Interval]) -> Set[int]:
+    """Row indexes of ``(row, start, end)`` candidates that overlap ``existing`` or an
+    earlier-starting accepted candidate (one pass over the sorted rows)"""
+    taken = merge(existing)
+    starts = [start for start, _ in taken]
+    rejected: Set[int] = set()
+    accepted_end = None
+    for row, start, end in sorted(candidates, key=lambda candidate: candidate[1]):
+        index = bisect_left(starts, end) - 1
+        if (index >= 0 and taken[index][1] > start) or (accepted_end is not None and start < accepted_end):
+            rejected.add(row)
+        else:
+            accepted_end = end if accepted_end is None else max(accepted_end, end)
+    return rejected
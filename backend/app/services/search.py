@@ -0,0 +1,27 @@
+from typing import Sequence
+from sqlalchemy import case, func, literal, or_
+from sqlalchemy.orm import Query
+from app.schemas.common import SearchMode
+
+
+def apply_search(query: Query, columns: Sequence, term: str, mode: SearchMode, dialect: str) -> Query:
+    """Filter ``query`` to rows where any of ``columns`` matches ``term``.
+
+    CONTAINS keeps the plain ``ILIKE '%term%'`` semantics; on PostgreSQL the
+    pg_trgm GIN indexes serve it without a sequential scan. RANKED also accepts
+    fuzzy (trigram) matches and orders by best word similarity. Other databases
+    (SQLite in tests) fall back to ILIKE, ranking prefix matches first.
+    """
+    pattern = f"%{term}%"
+    matches = [column.ilike(pattern) for column in columns]
+
+    if mode != SearchMode.RANKED:
+        return query.filter(or_(*matches))
+
+    if dialect == "postgresql":
+        fuzzy = [literal(term).op("<%")(column) for column in columns]
+        rank = func.greatest(*[func.word_similarity(term, column) for column in columns])
+        return query.filter(or_(*matches, *fuzzy)).order_by(rank.desc())
+
+    prefix = or_(*[column.ilike(f"{term}%") for column in columns])
+    return query.filter(or_(*matches)).order_by(case((prefix, 0), else_=1))
@@ -0,0 +1,42 @@
+from collections import Counter
+from datetime import date, datetime
+from typing import Iterable, Tuple
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from app.db import models
+from app.services.scheduling import as_utc
+
+# (appointment time, status, +1 for added / -1 for removed)
+Change = Tuple[datetime, str, int]
+
+
+def stats_day(moment: datetime) -> date:
+    """Rollup bucket of an appointment time: its UTC date"""
+    return as_utc(moment).date()
+
+
+def record_changes(db: Session, auth0_id: str, changes: Iterable[Change]) -> None:
+    """Apply appointment changes to the tenant's daily rollups inside the caller's
+    transaction, so they commit (or roll back) with the appointments themselves.
+
+    One multi-row upsert adds the deltas; rows are written in key order so
+    concurrent writers lock them in the same order.
+    """
+    deltas = Counter()
+    for moment, status, delta in changes:
+        deltas[(stats_day(moment), getattr(status, "value", status))] += delta
+    rows = [
+        {"auth0_id": auth0_id, "day": day, "status": status, "count": delta}
+        for (day, status), delta in sorted(deltas.items()) if delta
+    ]
+    if not rows:
+        return
+
+    table = models.AppointmentDailyStats.__table__
+    insert = postgresql_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    statement = insert(table).values(rows)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[table.c.auth0_id, table.c.day, table.c.status],
+        set_={"count": table.c.count + statement.excluded.count}
+    ))
@@ -0,0 +1,344 @@
+"""Load test for the API: seeds tenants, mints local tokens and drives the real
+endpoints with concurrent requests, then reports throughput and latency
+percentiles per scenario as JSON.
+
+In-process (ASGI transport, no server needed):
+
+    PYTHONPATH=. python -m benchmarks.load_test --database-url postgresql://localhost/ruh_bench \\
+        --create-schema --output results/HEAD.json
+
+Against a running server, start it with the JWKS this tool writes so tokens verify:
+
+    JWKS_FILE=benchmarks/.keys/jwks.json uvicorn app.main:app --workers 4
+    PYTHONPATH=. python -m benchmarks.load_test --base-url http://localhost:8000 --skip-seed
+
+Compare two runs:
+
+    PYTHONPATH=. python -m benchmarks.load_test --compare results/base.json results/HEAD.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+import httpx
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from benchmarks.seed import add_arguments, create_schema, engine_from_args, seed, tenant_id
+
+KEY_ID = "load-test"
+PERCENTILES = (50, 90, 95, 99)
+# Scenario -> (method, builder of path and JSON body for one request)
+Request = Tuple[str, str, Optional[Dict]]
+
+
+# --- Tokens -----------------------------------------------------------------
+
+def load_or_create_key(key_dir: Path) -> rsa.RSAPrivateKey:
+    """RSA key used to sign test tokens; its public half is written as a JWKS
+    next to it so the API can verify the tokens through JWKS_FILE."""
+    key_dir.mkdir(parents=True, exist_ok=True)
+    key_path = key_dir / "private.pem"
+    if key_path.exists():
+        key = serialization.load_pem_private_key(key_path.read_bytes(), password=None)
+    else:
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        key_path.write_bytes(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ))
+    jwk = json.loads(RSAAlgorithm.to_jwk(key.public_key()))
+    jwk.update({"kid": KEY_ID, "use": "sig", "alg": "RS256"})
+    (key_dir / "jwks.json").write_text(json.dumps({"keys": [jwk]}))
+    return key
+
+
+def mint_token(
+    key: rsa.RSAPrivateKey,
+    subject: str,
+    audience: str,
+    issuer: str,
+    ttl: int = 24 * 3600,
+    kid: str = KEY_ID,
+) -> str:
+    now = int(time.time())
+    claims = {"sub": subject, "aud": audience, "iss": issuer, "iat": now, "exp": now + ttl}
+    return jwt.encode(claims, key, algorithm="RS256", headers={"kid": kid})
+
+
+# --- Scenarios --------------------------------------------------------------
+
+class Tenant:
+    def __init__(self, auth0_id: str, token: str, client_ids: List[int], appointment_ids: List[int]):
+        self.auth0_id = auth0_id
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.client_ids = client_ids
+        self.appointment_ids = appointment_ids
+
+
+def load_tenants(engine: Engine, tenant_ids: Sequence[str], tokens: Dict[str, str], sample: int = 200) -> List[Tenant]:
+    from app.db import models
+
+    tenants = []
+    with engine.connect() as conn:
+        for auth0_id in tenant_ids:
+            client_ids = conn.execute(
+                select(models.Client.id).where(models.Client.auth0_id == auth0_id).limit(sample)
+            ).scalars().all()
+            appointment_ids = conn.execute(
+                select(models.Appointment.id).where(models.Appointment.auth0_id == auth0_id).limit(sample)
+            ).scalars().all()
+            if client_ids and appointment_ids:
+                tenants.append(Tenant(auth0_id, tokens[auth0_id], client_ids, appointment_ids))
+    return tenants
+
+
+def _random_time(rng: random.Random) -> str:
+    # Minutes spread over years past the seeded range, so writes rarely hit the overlap check
+    moment = datetime.now(timezone.utc) + timedelta(days=365, minutes=rng.randrange(0, 60 * 24 * 365 * 20))
+    return moment.replace(second=0, microsecond=0).isoformat()
+
+
+def _availability(rng: random.Random) -> Request:
+    start = date.today() + timedelta(days=rng.randint(0, 60))
+    end = start + timedelta(days=rng.randint(0, 13))
+    return ("GET", f"/api/v1/appointments/availability?start_date={start}&end_date={end}", None)
+
+
+SCENARIOS: Dict[str, Callable[[Tenant, random.Random], Request]] = {
+    "appointments.list": lambda t, rng: ("GET", f"/api/v1/appointments/?page={rng.randint(1, 20)}", None),
+    "appointments.search": lambda t, rng: (
+        "GET", f"/api/v1/appointments/?search={rng.choice(['ahmed', 'costa', 'khan', 'patel', 'silva'])}", None
+    ),
+    "appointments.date_filter": lambda t, rng: (
+        "GET",
+        "/api/v1/appointments/?start_date={0}&end_date={1}".format(
+            date.today() + timedelta(days=rng.randint(-60, 30)),
+            date.today() + timedelta(days=rng.randint(31, 60)),
+        ),
+        None,
+    ),
+    "appointments.get": lambda t, rng: ("GET", f"/api/v1/appointments/{rng.choice(t.appointment_ids)}", None),
+    "appointments.create": lambda t, rng: ("POST", "/api/v1/appointments/", {
+        "client_id": rng.choice(t.client_ids),
+        "time": _random_time(rng),
+        "duration_minutes": 15,
+        "status": "scheduled",
+        "notes": "load test",
+    }),
+    "appointments.update": lambda t, rng: ("PUT", f"/api/v1/appointments/{rng.choice(t.appointment_ids)}", {
+        "time": _random_time(rng),
+        "duration_minutes": 15,
+        "status": rng.choice(["scheduled", "confirmed", "completed"]),
+    }),
+    "appointments.availability": lambda t, rng: _availability(rng),
+    "appointments.stats": lambda t, rng: ("GET", "/api/v1/appointments/stats", None),
+    "clients.list": lambda t, rng: ("GET", f"/api/v1/clients/?page={rng.randint(1, 10)}", None),
+    "clients.search": lambda t, rng: (
+        "GET", f"/api/v1/clients/?search={rng.choice(['amira', 'omar', 'tanaka', 'novak', 'priya'])}", None
+    ),
+    "clients.get": lambda t, rng: ("GET", f"/api/v1/clients/{rng.choice(t.client_ids)}", None),
+}
+
+
+# --- Runner -----------------------------------------------------------------
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: List[float], errors: Dict[str, int], elapsed: float) -> Dict:
+    values = sorted(latencies)
+    ok = len(values)
+    summary = {
+        "requests": ok + sum(errors.values()),
+        "errors": errors,
+        "throughput_rps": round(ok / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(values) / ok * 1000, 3) if ok else 0.0,
+        "max_ms": round(values[-1] * 1000, 3) if ok else 0.0,
+    }
+    for pct in PERCENTILES:
+        summary[f"p{pct}_ms"] = round(percentile(values, pct) * 1000, 3)
+    return summary
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    name: str,
+    tenants: List[Tenant],
+    requests: int,
+    concurrency: int,
+    rng: random.Random,
+) -> Dict:
+    build = SCENARIOS[name]
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            tenant = rng.choice(tenants)
+            method, path, body = build(tenant, rng)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body, headers=tenant.headers)
+                await response.aread()
+                outcome = None if response.status_code < 400 else str(response.status_code)
+            except httpx.HTTPError as e:
+                outcome = type(e).__name__
+            if outcome is None:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors[outcome] = errors.get(outcome, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+@asynccontextmanager
+async def http_client(base_url: str, concurrency: int) -> AsyncIterator[httpx.AsyncClient]:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    if base_url:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+            yield client
+        return
+
+    # In-process: the real app, middleware and lifespan, minus the network
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=60) as client:
+            yield client
+
+
+async def run(args: argparse.Namespace, tenants: List[Tenant]) -> Dict:
+    rng = random.Random(args.random_seed)
+    results = {}
+    async with http_client(args.base_url, args.concurrency) as client:
+        for name in args.scenarios:
+            if args.warmup:
+                await run_scenario(client, name, tenants, args.warmup, args.concurrency, rng)
+            results[name] = await run_scenario(client, name, tenants, args.requests, args.concurrency, rng)
+            print(f"{name:28} {results[name]['throughput_rps']:>9.1f} req/s  "
+                  f"p50={results[name]['p50_ms']:.1f}ms p99={results[name]['p99_ms']:.1f}ms  "
+                  f"errors={sum(results[name]['errors'].values())}", file=sys.stderr)
+    return results
+
+
+# --- Reporting --------------------------------------------------------------
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(baseline: Dict, current: Dict) -> str:
+    """Table of per-scenario changes; negative latency deltas are improvements"""
+    metrics = ["throughput_rps"] + [f"p{pct}_ms" for pct in PERCENTILES]
+    lines = [f"{'scenario':28}" + "".join(f"{m:>22}" for m in metrics)]
+    for name, now in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        cells = []
+        for metric in metrics:
+            old, new = before[metric], now[metric]
+            change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+            cells.append(f"{new:>12.1f} ({change:>7})")
+        lines.append(f"{name:28}" + "".join(cells))
+    return (
+        f"baseline {baseline['meta']['commit']} -> current {current['meta']['commit']}\n" + "\n".join(lines)
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    parser.add_argument("--create-schema", action="store_true", help="create tables from the models first")
+    parser.add_argument("--skip-seed", action="store_true", help="reuse a previously seeded database")
+    parser.add_argument("--base-url", default="", help="target a running server instead of the in-process app")
+    parser.add_argument("--key-dir", default=str(Path(__file__).parent / ".keys"),
+                        help="where the signing key and jwks.json are kept")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=50, help="unmeasured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--output", help="write the JSON report here as well as to stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="print the difference between two saved reports and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        baseline, current = (json.loads(Path(p).read_text()) for p in args.compare)
+        print(compare(baseline, current))
+        return
+
+    # Settings are read once; point the in-process app at the same database and JWKS
+    key = load_or_create_key(Path(args.key_dir))
+    os.environ.setdefault("JWKS_FILE", str(Path(args.key_dir) / "jwks.json"))
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    from app.core.config import get_settings
+
+    settings = get_settings()
+    engine = engine_from_args(args)
+    if args.create_schema:
+        create_schema(engine)
+    if args.skip_seed:
+        tenant_ids = [tenant_id(i) for i in range(args.tenants)]
+    else:
+        tenant_ids = seed(engine, args.tenants, args.clients, args.appointments, args.random_seed)
+
+    tokens = {t: mint_token(key, t, settings.AUTH0_AUDIENCE, settings.AUTH0_ISSUER) for t in tenant_ids}
+    tenants = load_tenants(engine, tenant_ids, tokens)
+    if not tenants:
+        sys.exit("No seeded tenants found; run without --skip-seed first")
+
+    scenarios = asyncio.run(run(args, tenants))
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "target": args.base_url or "in-process",
+            "database": engine.dialect.name,
+            "tenants": len(tenants),
+            "clients_per_tenant": args.clients,
+            "appointments_per_client": args.appointments,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "scenarios": scenarios,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
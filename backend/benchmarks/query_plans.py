@@ -0,0 +1,173 @@
+"""Query-plan regression check for the tenant-scoped service queries.
+
+Seeds a large synthetic dataset into a local PostgreSQL database, runs every
+read path of AppointmentService / ClientService, captures the SQL each one
+issues and EXPLAINs it with the same parameters. Fails (exit code 1) when any
+plan reads ``clients``, ``appointments`` or the stats rollups with a
+sequential scan.
+
+    PYTHONPATH=. python -m benchmarks.query_plans \\
+        --database-url postgresql://localhost/ruh_bench --create-schema
+"""
+import argparse
+import json
+import re
+import sys
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, Iterator, List, Tuple
+from sqlalchemy import event, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.core.exceptions import EmailAlreadyExistsException
+from app.db import models
+from app.schemas.appointment import AppointmentStatus
+from app.schemas.client import ClientCreate
+from app.schemas.common import PaginationMode
+from app.services.appointment_service import AppointmentService
+from app.services.changes import encode_sync_token
+from app.services.client_service import ClientService
+from benchmarks.seed import add_arguments, create_schema, engine_from_args, seed, tenant_id
+
+TENANT_TABLES = {"clients", "appointments", "appointment_daily_stats", "tombstones"}
+# Monthly and default partitions count as their parent
+APPOINTMENT_PARTITION = re.compile(r"^appointments_(\d{4}_\d{2}|default)$")
+
+
+def walk_plan(node: Dict) -> Iterator[Dict]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from walk_plan(child)
+
+
+def relation(node: Dict) -> str:
+    return APPOINTMENT_PARTITION.sub("appointments", node.get("Relation Name", ""))
+
+
+def sequential_scans(plan: Dict) -> List[str]:
+    return [
+        node["Relation Name"]
+        for node in walk_plan(plan["Plan"])
+        if node["Node Type"] == "Seq Scan" and relation(node) in TENANT_TABLES
+    ]
+
+
+def scanned_partitions(plan: Dict) -> List[str]:
+    """Appointment partitions the plan reads (after plan-time pruning)"""
+    return sorted({
+        node["Relation Name"]
+        for node in walk_plan(plan["Plan"])
+        if APPOINTMENT_PARTITION.match(node.get("Relation Name", ""))
+    })
+
+
+def capture_statements(engine: Engine, fn: Callable[[], None]) -> List[Tuple[str, object]]:
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return statements
+
+
+def service_cases(session: Session, auth0_id: str) -> Dict[str, Callable[[], None]]:
+    client = session.execute(
+        select(models.Client).where(models.Client.auth0_id == auth0_id).limit(1)
+    ).scalar_one()
+    appointment_id = session.execute(
+        select(models.Appointment.id).where(models.Appointment.auth0_id == auth0_id).limit(1)
+    ).scalar_one()
+    appointments = AppointmentService(session)
+    clients = ClientService(session)
+    today = date.today()
+    hour_ago = (datetime.now(timezone.utc) - timedelta(hours=1), 0)
+
+    def duplicate_email_check():
+        try:
+            clients.create_client(ClientCreate(name=client.name, email=client.email), auth0_id)
+        except EmailAlreadyExistsException:
+            pass
+
+    return {
+        "appointments.list": lambda: appointments.get_appointments(auth0_id, page=50),
+        "appointments.list_status": lambda: appointments.get_appointments(
+            auth0_id, status=AppointmentStatus.CONFIRMED
+        ),
+        "appointments.list_date_range": lambda: appointments.get_appointments(
+            auth0_id, start_date=today, end_date=today + timedelta(days=7)
+        ),
+        "appointments.list_cursor": lambda: appointments.get_appointments(
+            auth0_id, pagination=PaginationMode.CURSOR
+        ),
+        "appointments.search": lambda: appointments.get_appointments(auth0_id, search="hussain"),
+        "appointments.get": lambda: appointments.get_appointment(appointment_id, auth0_id),
+        "appointments.availability": lambda: appointments.get_availability(
+            auth0_id, start_date=today, end_date=today + timedelta(days=13)
+        ),
+        "appointments.stats": lambda: appointments.get_stats(auth0_id),
+        "appointments.changes": lambda: appointments.get_changes(
+            auth0_id, since=encode_sync_token("appointment", hour_ago, hour_ago)
+        ),
+        "clients.list": lambda: clients.get_clients(auth0_id, page=20),
+        "clients.list_cursor": lambda: clients.get_clients(auth0_id, pagination=PaginationMode.CURSOR),
+        "clients.search": lambda: clients.get_clients(auth0_id, search="okafor"),
+        "clients.get": lambda: clients.get_client(client.id, auth0_id),
+        "clients.appointments": lambda: clients.get_client_appointments(client.id, auth0_id),
+        "clients.duplicate_email_check": duplicate_email_check,
+        "clients.changes": lambda: clients.get_changes(auth0_id, since=encode_sync_token("client", hour_ago, hour_ago)),
+    }
+
+
+def check_plans(engine: Engine, auth0_id: str) -> List[Dict]:
+    results = []
+    with Session(engine) as session:
+        for name, case in service_cases(session, auth0_id).items():
+            for statement, parameters in capture_statements(engine, case):
+                with engine.connect() as conn:
+                    plan = conn.exec_driver_sql(
+                        "EXPLAIN (FORMAT JSON) " + statement, parameters
+                    ).scalar()[0]
+                results.append({
+                    "case": name,
+                    "statement": " ".join(statement.split()),
+                    "seq_scans": sequential_scans(plan),
+                    "partitions": scanned_partitions(plan),
+                    "total_cost": plan["Plan"]["Total Cost"],
+                })
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    parser.add_argument("--create-schema", action="store_true", help="create tables from the models first")
+    parser.add_argument("--skip-seed", action="store_true", help="reuse a previously seeded database")
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args()
+
+    engine = engine_from_args(args)
+    if engine.dialect.name != "postgresql":
+        sys.exit("Query plans are only meaningful on PostgreSQL")
+    if args.create_schema:
+        create_schema(engine)
+    if not args.skip_seed:
+        seed(engine, args.tenants, args.clients, args.appointments, args.random_seed)
+
+    results = check_plans(engine, tenant_id(0))
+    failures = [r for r in results if r["seq_scans"]]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for r in results:
+            verdict = "FAIL seq scan on " + ", ".join(r["seq_scans"]) if r["seq_scans"] else "ok"
+            print(f"{r['case']:32} cost={r['total_cost']:>10.1f}  partitions={len(r['partitions']):<3} {verdict}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
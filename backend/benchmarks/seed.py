@@ -0,0 +1,145 @@
+"""Seed a synthetic clinic dataset: N tenants x M clients x K appointments.
+
+    PYTHONPATH=. python -m benchmarks.seed --tenants 20 --clients 500 --appointments 20
+"""
+import argparse
+import random
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.engine import Engine
+from app.core.config import get_settings
+from app.db.base import Base
+from app.db import models
+from app.db.partitions import add_months, ensure_partitions, month_start
+from app.schemas.appointment import AppointmentStatus
+
+FIRST_NAMES = ["Amira", "Bilal", "Chloe", "Daniel", "Elif", "Farah", "Grace", "Hassan", "Ines", "Jonas",
+               "Karim", "Leila", "Mateo", "Nadia", "Omar", "Priya", "Quinn", "Rosa", "Sami", "Tara"]
+LAST_NAMES = ["Ahmed", "Berger", "Costa", "Dubois", "Evans", "Fischer", "Garcia", "Hussain", "Ivanova",
+              "Jensen", "Khan", "Lopez", "Malik", "Novak", "Okafor", "Patel", "Rossi", "Silva", "Tanaka"]
+STATUSES = [s.value for s in AppointmentStatus]
+BATCH_SIZE = 5000
+
+
+def tenant_id(index: int) -> str:
+    return f"auth0|bench-tenant-{index:04d}"
+
+
+def _insert_batches(engine: Engine, table, rows: List[Dict]) -> None:
+    with engine.begin() as conn:
+        for start in range(0, len(rows), BATCH_SIZE):
+            conn.execute(insert(table), rows[start:start + BATCH_SIZE])
+
+
+def seed(
+    engine: Engine,
+    tenants: int,
+    clients_per_tenant: int,
+    appointments_per_client: int,
+    random_seed: int = 42,
+) -> List[str]:
+    """Insert the dataset and return the seeded tenant ids.
+
+    Appointment times are spread from one year in the past to six months ahead so
+    date filters, upcoming-first ordering and status filters all see realistic data.
+    Each tenant fits at most 26,304 non-overlapping half-hour appointments.
+    """
+    rng = random.Random(random_seed)
+    now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    tenant_ids = [tenant_id(i) for i in range(tenants)]
+
+    for auth0_id in tenant_ids:
+        clients = []
+        for i in range(clients_per_tenant):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            clients.append({
+                "auth0_id": auth0_id,
+                "name": f"{first} {last}",
+                "email": f"{first}.{last}.{i}@example.com".lower(),
+                "phone": f"+1555{rng.randrange(10**6, 10**7)}",
+            })
+        _insert_batches(engine, models.Client.__table__, clients)
+
+        with engine.connect() as conn:
+            client_ids = conn.execute(
+                select(models.Client.id).where(models.Client.auth0_id == auth0_id)
+            ).scalars().all()
+
+        # Distinct half-hour slots: a tenant's appointments may not overlap
+        slots = iter(rng.sample(range(-365 * 48, 183 * 48), len(client_ids) * appointments_per_client))
+        appointments = []
+        for client_id in client_ids:
+            for _ in range(appointments_per_client):
+                time = now + timedelta(minutes=30 * next(slots))
+                appointments.append({
+                    "auth0_id": auth0_id,
+                    "client_id": client_id,
+                    "time": time,
+                    "duration_minutes": 30,
+                    "end_time": time + timedelta(minutes=30),
+                    "status": rng.choice(STATUSES),
+                    "notes": rng.choice([None, "Follow-up", "Intake session", "Review goals " * 20]),
+                })
+        _insert_batches(engine, models.Appointment.__table__, appointments)
+
+        # The rollups the service keeps for these appointments
+        daily = Counter((a["time"].date(), a["status"]) for a in appointments)
+        _insert_batches(engine, models.AppointmentDailyStats.__table__, [
+            {"auth0_id": auth0_id, "day": day, "status": status, "count": count}
+            for (day, status), count in daily.items()
+        ])
+
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("ANALYZE clients")
+            # Partitioned: analyzes every partition, and the parent's own statistics
+            conn.exec_driver_sql("ANALYZE appointments")
+            conn.exec_driver_sql("ANALYZE appointment_daily_stats")
+
+    return tenant_ids
+
+
+def create_schema(engine: Engine) -> None:
+    """Create the tables from the models, with the extensions their indexes need
+    and the appointment partitions for the months ``seed`` covers"""
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            conn.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            conn.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    Base.metadata.create_all(engine)
+    if engine.dialect.name == "postgresql":
+        this_month = month_start(datetime.now(timezone.utc).date())
+        with engine.begin() as conn:
+            ensure_partitions(conn, add_months(this_month, -13), add_months(this_month, 7))
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--database-url", help="defaults to the app's DATABASE_URL")
+    parser.add_argument("--tenants", type=int, default=20)
+    parser.add_argument("--clients", type=int, default=500, help="clients per tenant")
+    parser.add_argument("--appointments", type=int, default=20, help="appointments per client")
+    parser.add_argument("--random-seed", type=int, default=42)
+
+
+def engine_from_args(args: argparse.Namespace) -> Engine:
+    url = args.database_url or get_settings().DATABASE_URL
+    return create_engine(url.replace("postgres://", "postgresql://"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    parser.add_argument("--create-schema", action="store_true", help="create tables from the models first")
+    args = parser.parse_args()
+
+    engine = engine_from_args(args)
+    if args.create_schema:
+        create_schema(engine)
+    tenant_ids = seed(engine, args.tenants, args.clients, args.appointments, args.random_seed)
+    print(f"Seeded {len(tenant_ids)} tenants x {args.clients} clients x {args.appointments} appointments")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Serialization benchmark for appointment list pages.
+
+Times fetching one page and encoding it as the list endpoint's JSON body, for:
+
+  orm_fastapi    ORM entities -> pydantic validation -> jsonable_encoder -> json.dumps
+                 (FastAPI's response_model path the listings originally used)
+  orm_pydantic   ORM entities -> pydantic validation -> dump_json
+  projection     column-only select -> plain dicts -> orjson (current path)
+
+    PYTHONPATH=. python -m benchmarks.serialization --page-sizes 10 100 500
+"""
+import argparse
+import json
+import statistics
+import time
+from typing import Callable, Dict, List
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, contains_eager
+from app.db import models
+from app.schemas.appointment import AppointmentWithClient
+from app.schemas.common import PaginatedResponse
+from app.services.appointment_service import LIST_PROJECTIONS, AppointmentLoad
+from benchmarks.seed import add_arguments, create_schema, seed, tenant_id
+
+PAGE = TypeAdapter(PaginatedResponse[AppointmentWithClient])
+
+
+def _page(items: List, page_size: int) -> Dict:
+    return {
+        "items": items, "total": len(items), "page": 1, "page_size": page_size,
+        "total_pages": 1, "total_estimated": False, "has_next": False, "has_previous": False,
+    }
+
+
+def paths(session: Session, auth0_id: str, page_size: int) -> Dict[str, Callable[[], bytes]]:
+    def orm_rows() -> List:
+        session.expunge_all()  # hydrate fresh entities every time, as a new request would
+        return session.query(models.Appointment).join(models.Client).options(
+            contains_eager(models.Appointment.client)
+        ).filter(models.Appointment.auth0_id == auth0_id).limit(page_size).all()
+
+    def orm_fastapi() -> bytes:
+        page = PAGE.validate_python(_page(orm_rows(), page_size), from_attributes=True)
+        return json.dumps(jsonable_encoder(page)).encode("utf-8")
+
+    def orm_pydantic() -> bytes:
+        return PAGE.dump_json(PAGE.validate_python(_page(orm_rows(), page_size), from_attributes=True))
+
+    def projection() -> bytes:
+        columns = LIST_PROJECTIONS[AppointmentLoad.WITH_CLIENT]
+        rows = session.query(*columns.columns).select_from(models.Appointment).join(models.Client).filter(
+            models.Appointment.auth0_id == auth0_id
+        ).limit(page_size).all()
+        return orjson.dumps(_page(columns.to_dicts(rows), page_size), option=orjson.OPT_UTC_Z)
+
+    return {"orm_fastapi": orm_fastapi, "orm_pydantic": orm_pydantic, "projection": projection}
+
+
+def measure(fn: Callable[[], bytes], iterations: int) -> Dict:
+    fn()  # warm up statement caches and TypeAdapter
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "min_ms": round(min(samples) * 1000, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    parser.set_defaults(database_url="sqlite://", tenants=1, clients=200, appointments=5)
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url.replace("postgres://", "postgresql://"))
+    if args.database_url == "sqlite://":
+        create_schema(engine)
+        seed(engine, args.tenants, args.clients, args.appointments, args.random_seed)
+
+    report = {}
+    with Session(engine) as session:
+        for page_size in args.page_sizes:
+            results = {
+                name: measure(fn, args.iterations)
+                for name, fn in paths(session, tenant_id(0), page_size).items()
+            }
+            baseline = results["orm_fastapi"]["median_ms"]
+            for result in results.values():
+                result["speedup"] = round(baseline / result["median_ms"], 2) if result["median_ms"] else None
+            report[str(page_size)] = results
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
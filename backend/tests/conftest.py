@@ -0,0 +1,91 @@
+import json
+import os
+import tempfile
+import pytest
+
+# Settings are read once, at import; point them at a throwaway SQLite database and
+# a local, empty JWKS before anything from app is imported
+_workdir = tempfile.mkdtemp(prefix="ruh-tests-")
+_jwks_file = os.path.join(_workdir, "jwks.json")
+with open(_jwks_file, "w") as f:
+    json.dump({"keys": []}, f)
+
+os.environ.update({
+    "DATABASE_USERNAME": "test",
+    "DATABASE_PASSWORD": "test",
+    "DATABASE_HOST": "localhost",
+    "DATABASE_NAME": "test",
+    "DATABASE_PORT": "5432",
+    "DATABASE_URL": f"sqlite:///{os.path.join(_workdir, 'primary.db')}",
+    # Both engines exist; the client fixture picks one per test (see db_mode)
+    "DATABASE_ASYNC": "true",
+    "CACHE_BACKEND": "none",
+    "JWKS_FILE": _jwks_file,
+    "AUTH0_ISSUER": "https://tests.invalid/",
+    "AUTH0_URL": "https://tests.invalid",
+    "AUTH0_CLIENT_ID": "test",
+    "AUTH0_CLIENT_SECRET": "test",
+    "AUTH0_AUDIENCE": "test",
+})
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from app.core.auth import get_current_user  # noqa: E402
+from app.core.config import get_settings  # noqa: E402
+from app.db import session  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.db.session import engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+TENANT = "auth0|tests"
+
+
+@pytest.fixture
+def workdir() -> str:
+    return _workdir
+
+
+@pytest.fixture
+def postgres_engine():
+    """Engine on the throwaway database at TEST_POSTGRES_URL, for tests marked postgres"""
+    url = os.environ.get("TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+    postgres = create_engine(url.replace("postgres://", "postgresql://"))
+    yield postgres
+    postgres.dispose()
+
+
+@pytest.fixture
+def db_engine():
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(params=["sync", "async"])
+def db_mode(request, monkeypatch) -> str:
+    """Runs each endpoint test with plain Sessions in the threadpool and with
+    AsyncSessions on aiosqlite, as DATABASE_ASYNC=false/true would"""
+    is_async = request.param == "async"
+    monkeypatch.setattr(get_settings(), "DATABASE_ASYNC", is_async)
+    app.dependency_overrides[session.get_session] = session.get_async_db if is_async else session.get_db
+    app.dependency_overrides[session.get_read_session] = (
+        session.get_async_read_db if is_async else session.get_read_db
+    )
+    return request.param
+
+
+@pytest.fixture
+def app_engine(db_mode):
+    """Engine the app's queries run on in this mode, e.g. for counting statements"""
+    return session.async_engine.sync_engine if db_mode == "async" else engine
+
+
+@pytest.fixture
+def client(db_engine, db_mode):
+    app.dependency_overrides[get_current_user] = lambda: {"auth0_id": TENANT, "email": None}
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
@@ -0,0 +1,108 @@
+import json
+import pytest
+
+
+@pytest.fixture
+def appointment(client):
+    client_id = client.post("/api/v1/clients/", json={"name": "Ann", "email": "ann@example.com"}).json()["id"]
+    response = client.post("/api/v1/appointments/", json={
+        "client_id": client_id,
+        "time": "2030-01-07T09:00:00Z",
+        "status": "scheduled",
+        "notes": "first visit",
+        "duration_minutes": 45,
+    })
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def test_partial_update_keeps_omitted_fields(client, appointment):
+    response = client.put(f"/api/v1/appointments/{appointment['id']}", json={"notes": "moved upstairs"})
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["notes"] == "moved upstairs"
+    for field in ("time", "status", "duration_minutes", "end_time"):
+        assert body[field] == appointment[field]
+
+
+def test_update_time_moves_end_time(client, appointment):
+    response = client.put(f"/api/v1/appointments/{appointment['id']}", json={"time": "2030-01-07T11:00:00Z"})
+    assert response.status_code == 200, response.text
+    assert response.json()["end_time"].startswith("2030-01-07T11:45:00")
+
+
+def test_null_clears_only_nullable_fields(client, appointment):
+    response = client.put(f"/api/v1/appointments/{appointment['id']}", json={"notes": None, "time": None})
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["notes"] is None
+    assert body["time"] == appointment["time"]
+
+
+def test_bulk_import_rejects_overlaps_across_chunks(client, appointment, monkeypatch):
+    from app.core.config import get_settings
+    monkeypatch.setattr(get_settings(), "BULK_CHUNK_SIZE", 2)
+    rows = [
+        {"client_id": appointment["client_id"], "time": time, "status": "scheduled", "duration_minutes": 60}
+        for time in (
+            "2030-02-01T09:00:00Z",
+            "2030-02-01T11:00:00Z",
+            "2030-02-01T09:30:00Z",  # next chunk, overlaps the first row
+            "2030-01-07T09:15:00Z",  # overlaps the stored appointment
+            "2030-02-01T13:00:00Z",
+        )
+    ]
+    response = client.post("/api/v1/appointments/bulk", json=rows)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["created"] == 3
+    assert [error["row"] for error in body["errors"]] == [2, 3]
+
+
+def test_failed_chunk_does_not_leak_database_error(db_engine):
+    from sqlalchemy.exc import IntegrityError
+    from app.db import models
+    from app.db.session import SessionLocal
+    from app.services.bulk import CHUNK_FAILED, insert_chunks
+
+    class Violation(Exception):
+        pgcode = None
+
+    def fail(rows, ids):
+        raise IntegrityError("INSERT INTO clients ...", {"email": "secret@example.com"}, Violation("secret detail"))
+
+    errors = []
+    rows = [(i, {"auth0_id": "auth0|tests", "name": f"C{i}", "email": f"c{i}@example.com"}) for i in range(3)]
+    with SessionLocal() as db:
+        ids = insert_chunks(db, models.Client, rows, 2, errors, before_commit=fail)
+    assert ids == []
+    assert [(error.row, error.detail) for error in errors] == [(i, CHUNK_FAILED) for i in range(3)]
+
+
+def test_offset_pages_are_in_time_order(client, appointment):
+    for time in ("2030-03-01T09:00:00Z", "2029-12-01T09:00:00Z", "2030-02-01T09:00:00Z", "2029-11-01T09:00:00Z"):
+        response = client.post("/api/v1/appointments/", json={
+            "client_id": appointment["client_id"], "time": time, "status": "scheduled",
+        })
+        assert response.status_code == 201, response.text
+    times = []
+    for page in (1, 2, 3):
+        body = client.get(f"/api/v1/appointments/?page={page}&page_size=2&include_total=false").json()
+        times += [item["time"] for item in body["items"]]
+        assert body["has_next"] == (page < 3)
+    assert times == sorted(times) and len(times) == 5
+    listing = client.get(f"/api/v1/clients/{appointment['client_id']}/appointments?page_size=10").json()
+    assert [item["time"] for item in listing["items"]] == times
+
+
+def test_export_streams_every_row(client, appointment, monkeypatch):
+    from app.core.config import get_settings
+    monkeypatch.setattr(get_settings(), "EXPORT_BATCH_SIZE", 2)
+    for day in range(10, 15):
+        client.post("/api/v1/appointments/", json={
+            "client_id": appointment["client_id"], "time": f"2030-01-{day}T09:00:00Z", "status": "scheduled",
+        })
+    response = client.get("/api/v1/appointments/export?format=ndjson")
+    assert response.status_code == 200, response.text
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["time"][:10] for row in rows] == ["2030-01-07"] + [f"2030-01-{day}" for day in range(10, 15)]
@@ -0,0 +1,77 @@
+import hashlib
+import json
+import time
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+from jwt.algorithms import RSAAlgorithm
+from app.core import auth
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.core.jwks import FileJWKSSource, JWKSProvider
+from benchmarks.load_test import mint_token
+
+
+@pytest.fixture
+def keys(tmp_path, monkeypatch):
+    """Two signing keys, a JWKS file publishing either, and a fresh provider and
+    token cache reading it"""
+    jwks_file = tmp_path / "jwks.json"
+    signing = {kid: rsa.generate_private_key(public_exponent=65537, key_size=2048) for kid in ("old", "new")}
+
+    def publish(*kids: str) -> None:
+        jwks = []
+        for kid in kids:
+            jwk = json.loads(RSAAlgorithm.to_jwk(signing[kid].public_key()))
+            jwk.update({"kid": kid, "use": "sig", "alg": "RS256"})
+            jwks.append(jwk)
+        jwks_file.write_text(json.dumps({"keys": jwks}))
+
+    provider = JWKSProvider(FileJWKSSource(str(jwks_file)), refresh_interval=3600, min_refetch_interval=0)
+    monkeypatch.setattr(auth, "get_jwks_provider", lambda: provider)
+    cache = TTLCache(maxsize=10)
+    monkeypatch.setattr(auth, "get_token_cache", lambda: cache)
+    return signing, publish, provider, cache
+
+
+def token(key, kid: str, ttl: int) -> str:
+    settings = get_settings()
+    return mint_token(key, "auth0|tests", settings.AUTH0_AUDIENCE, settings.AUTH0_ISSUER, ttl=ttl, kid=kid)
+
+
+@pytest.mark.asyncio
+async def test_cached_claims_expire_at_exp(keys, monkeypatch):
+    signing, publish, provider, cache = keys
+    publish("old")
+    await provider.refresh()
+    verified = []
+    decode = auth.jwt.decode
+    monkeypatch.setattr(auth.jwt, "decode", lambda *a, **kw: verified.append(1) or decode(*a, **kw))
+
+    jwt_token = token(signing["old"], "old", ttl=2)
+    assert (await auth.decode_jwt_token(jwt_token))["sub"] == "auth0|tests"
+    await auth.decode_jwt_token(jwt_token)
+    assert len(verified) == 1  # the second call was served from the cache
+
+    time.sleep(2.1)
+    assert cache.get(hashlib.sha256(jwt_token.encode()).hexdigest()) is None
+    await auth.decode_jwt_token(jwt_token)
+    assert len(verified) == 2  # verified again once past exp
+
+
+@pytest.mark.asyncio
+async def test_token_of_rotated_out_key_is_rejected_after_refresh(keys):
+    signing, publish, provider, cache = keys
+    publish("old", "new")
+    await provider.refresh()
+    old_token = token(signing["old"], "old", ttl=3600)
+    new_token = token(signing["new"], "new", ttl=3600)
+    await auth.decode_jwt_token(old_token)
+    await auth.decode_jwt_token(new_token)
+
+    publish("new")
+    await provider.refresh()
+    with pytest.raises(HTTPException) as rejected:
+        await auth.decode_jwt_token(old_token)
+    assert rejected.value.status_code == 401
+    assert (await auth.decode_jwt_token(new_token))["sub"] == "auth0|tests"
@@ -0,0 +1,43 @@
+import pytest
+from app.core import cache, response_cache
+from app.services import pagination
+
+
+class UnreachableBackend:
+    """A cache backend whose server is down"""
+
+    def get(self, key):
+        raise ConnectionError("cache is down")
+
+    def set(self, key, value, ttl):
+        raise ConnectionError("cache is down")
+
+    def incr(self, key):
+        raise ConnectionError("cache is down")
+
+
+@pytest.fixture
+def cache_down(monkeypatch):
+    backend = UnreachableBackend()
+    for module in (cache, response_cache, pagination):
+        monkeypatch.setattr(module, "get_cache_backend", lambda: backend)
+
+
+def test_committed_write_survives_cache_outage(client, cache_down):
+    response = client.post("/api/v1/clients/", json={"name": "Ann", "email": "ann@example.com"})
+    assert response.status_code == 200, response.text
+    client_id = response.json()["id"]
+    response = client.post("/api/v1/appointments/", json={
+        "client_id": client_id, "time": "2030-01-07T09:00:00Z", "status": "scheduled",
+    })
+    assert response.status_code == 201, response.text
+    response = client.put(f"/api/v1/appointments/{response.json()['id']}", json={"notes": "x"})
+    assert response.status_code == 200, response.text
+
+
+def test_reads_bypass_cache_during_outage(client, cache_down):
+    client.post("/api/v1/clients/", json={"name": "Ann", "email": "ann@example.com"})
+    for url in ("/api/v1/clients/", "/api/v1/clients/?count=cached", "/api/v1/appointments/"):
+        response = client.get(url)
+        assert response.status_code == 200, response.text
+    assert client.get("/api/v1/clients/").json()["total"] == 1
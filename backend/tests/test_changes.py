@@ -0,0 +1,88 @@
+import base64
+import json
+import time
+import pytest
+from sqlalchemy.orm import Session
+from app.core.config import get_settings
+from app.services.changes import _cutoff, encode_sync_token
+
+A = "/api/v1/appointments"
+
+
+@pytest.fixture
+def settled(monkeypatch):
+    """Serve changes as soon as they are a whole second old (SQLite's resolution)"""
+    monkeypatch.setattr(get_settings(), "CHANGES_SETTLE_SECONDS", 0)
+    return lambda: time.sleep(1.1)
+
+
+def create(client, client_id: int, when: str) -> int:
+    response = client.post(f"{A}/", json={"client_id": client_id, "time": when, "status": "scheduled"})
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def changes(client, since=None):
+    response = client.get(f"{A}/changes", params={"since": since} if since else {})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_changes_return_the_delta_and_tombstones(client, settled):
+    client_id = client.post("/api/v1/clients/", json={"name": "Ann", "email": "ann@example.com"}).json()["id"]
+    kept = create(client, client_id, "2030-01-07T09:00:00Z")
+    deleted = create(client, client_id, "2030-01-08T09:00:00Z")
+    settled()
+    initial = changes(client)
+    assert [item["id"] for item in initial["items"]] == [kept, deleted]
+    assert initial["deleted"] == [] and not initial["has_more"]
+
+    assert client.put(f"{A}/{kept}", json={"notes": "moved upstairs"}).status_code == 200
+    assert client.delete(f"{A}/{deleted}").status_code == 200
+    created = create(client, client_id, "2030-01-09T09:00:00Z")
+    settled()
+    delta = changes(client, initial["next_token"])
+    assert [(item["id"], item["notes"]) for item in delta["items"]] == [(kept, "moved upstairs"), (created, None)]
+    assert [tombstone["id"] for tombstone in delta["deleted"]] == [deleted]
+
+    assert changes(client, delta["next_token"]) == {
+        "items": [], "deleted": [], "next_token": delta["next_token"], "has_more": False
+    }
+
+
+def test_recent_changes_wait_for_a_later_call(client, monkeypatch):
+    monkeypatch.setattr(get_settings(), "CHANGES_SETTLE_SECONDS", 60)
+    client_id = client.post("/api/v1/clients/", json={"name": "Ann", "email": "ann@example.com"}).json()["id"]
+    create(client, client_id, "2030-01-07T09:00:00Z")
+    assert changes(client)["items"] == []
+
+
+def tampered(token: str) -> str:
+    payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    payload["u"] = ["not a time", "x"]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("token", [
+    "not-a-token",
+    encode_sync_token("client", None, None),  # issued for another resource
+    tampered(encode_sync_token("appointment", None, None)),
+])
+def test_invalid_sync_token_is_rejected(client, token):
+    response = client.get(f"{A}/changes", params={"since": token})
+    assert response.status_code == 400, response.text
+    assert "Invalid sync token" in response.json()["detail"]
+
+
+@pytest.mark.postgres
+def test_cutoff_waits_for_the_oldest_open_transaction(postgres_engine):
+    with postgres_engine.connect() as slow:
+        slow.begin()
+        started = slow.exec_driver_sql("SELECT now()").scalar()
+        time.sleep(0.2)
+        with Session(postgres_engine) as db:
+            # the slow transaction may still commit rows stamped at its start
+            assert _cutoff(db, "postgresql") == started
+        slow.rollback()
+    with Session(postgres_engine) as db:
+        assert _cutoff(db, "postgresql") > started
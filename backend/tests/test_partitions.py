@@ -0,0 +1,127 @@
+"""Partition maintenance, archival and restore. These need PostgreSQL: set
+TEST_POSTGRES_URL to a throwaway database (its appointments table and archive
+schema are dropped and recreated) to run them."""
+import threading
+import time
+from datetime import date
+import pytest
+from app.db.partitions import (
+    ARCHIVE_SCHEMA,
+    DEFAULT_PARTITION,
+    HISTORY_VIEW,
+    archive_partitions,
+    archived_months,
+    attached_months,
+    maintain,
+    restore_partition,
+)
+
+pytestmark = pytest.mark.postgres
+
+TENANT = "auth0|partitions"
+
+
+@pytest.fixture
+def pg_engine(postgres_engine):
+    with postgres_engine.begin() as conn:
+        # Just the columns the partition DDL touches, partitioned like the migration does
+        conn.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS btree_gist")
+        conn.exec_driver_sql(f"DROP SCHEMA IF EXISTS {ARCHIVE_SCHEMA} CASCADE")
+        conn.exec_driver_sql("DROP TABLE IF EXISTS appointments CASCADE")
+        conn.exec_driver_sql(
+            "CREATE TABLE appointments ("
+            " id serial, time timestamptz NOT NULL, end_time timestamptz NOT NULL,"
+            " status varchar NOT NULL, auth0_id varchar(255) NOT NULL,"
+            " PRIMARY KEY (id, time)) PARTITION BY RANGE (time)"
+        )
+    yield postgres_engine
+    with postgres_engine.begin() as conn:
+        conn.exec_driver_sql(f"DROP SCHEMA IF EXISTS {ARCHIVE_SCHEMA} CASCADE")
+        conn.exec_driver_sql("DROP TABLE IF EXISTS appointments CASCADE")
+
+
+def insert(conn, start: str) -> None:
+    conn.exec_driver_sql(
+        "INSERT INTO appointments (time, end_time, status, auth0_id) "
+        f"VALUES ('{start}', timestamptz '{start}' + interval '1 hour', 'scheduled', '{TENANT}')"
+    )
+
+
+def rows_in(conn, table: str) -> int:
+    return conn.exec_driver_sql(f"SELECT count(*) FROM {table}").scalar()
+
+
+def test_maintain_creates_months_ahead_and_empties_default(pg_engine):
+    with pg_engine.begin() as conn:
+        maintain(conn, today=date(2030, 1, 15))
+        insert(conn, "2031-05-06T09:00:00+00")
+        assert rows_in(conn, DEFAULT_PARTITION) == 1
+
+    with pg_engine.begin() as conn:
+        maintain(conn, today=date(2030, 1, 15))
+        months = attached_months(conn)
+        assert months[0] == date(2030, 1, 1) and months[-1] == date(2031, 5, 1)
+        assert rows_in(conn, DEFAULT_PARTITION) == 0
+        assert rows_in(conn, "appointments_2031_05") == 1
+
+
+def test_default_partition_rejects_overlaps(pg_engine):
+    with pg_engine.begin() as conn:
+        maintain(conn, today=date(2030, 1, 15))
+        insert(conn, "2040-01-01T09:00:00+00")
+    with pytest.raises(Exception, match="no_overlap"):
+        with pg_engine.begin() as conn:
+            insert(conn, "2040-01-01T09:30:00+00")
+
+
+def test_maintain_waits_for_inserts_into_default(pg_engine):
+    with pg_engine.begin() as conn:
+        maintain(conn, today=date(2030, 1, 15))
+
+    # An insert for a month without a partition, still uncommitted when maintain
+    # starts moving that month's rows out of the default partition
+    writer = pg_engine.connect()
+    transaction = writer.begin()
+    insert(writer, "2032-03-01T09:00:00+00")
+    errors = []
+
+    def run_maintain():
+        try:
+            with pg_engine.begin() as conn:
+                maintain(conn, today=date(2032, 3, 1))
+        except Exception as e:  # reported below
+            errors.append(e)
+
+    worker = threading.Thread(target=run_maintain)
+    worker.start()
+    time.sleep(0.5)
+    transaction.commit()
+    writer.close()
+    worker.join(timeout=30)
+
+    assert not worker.is_alive()
+    assert errors == []
+    with pg_engine.connect() as conn:
+        assert rows_in(conn, DEFAULT_PARTITION) == 0
+        assert rows_in(conn, "appointments_2032_03") == 1
+
+
+def test_archive_and_restore(pg_engine):
+    with pg_engine.begin() as conn:
+        maintain(conn, today=date(2029, 1, 1))
+        insert(conn, "2029-01-10T09:00:00+00")
+        insert(conn, "2029-03-10T09:00:00+00")
+
+    with pg_engine.begin() as conn:
+        assert archive_partitions(conn, before=date(2029, 2, 1)) == ["appointments_2029_01"]
+        assert archived_months(conn) == [date(2029, 1, 1)]
+        assert date(2029, 1, 1) not in attached_months(conn)
+        assert rows_in(conn, "appointments") == 1
+        assert rows_in(conn, HISTORY_VIEW) == 2
+
+    with pg_engine.begin() as conn:
+        assert restore_partition(conn, date(2029, 1, 1)) == "appointments_2029_01"
+        assert archived_months(conn) == []
+        assert rows_in(conn, "appointments") == 2
+        with pytest.raises(ValueError):
+            restore_partition(conn, date(2029, 1, 1))
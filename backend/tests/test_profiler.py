@@ -0,0 +1,30 @@
+import asyncio
+import httpx
+import pytest
+from app.core import profiler
+from app.core.profiler import ProfilerMiddleware
+
+
+async def endpoint(scope, receive, send):
+    await asyncio.sleep(0.05)
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+    await send({"type": "http.response.body", "body": b"served"})
+
+
+@pytest.mark.asyncio
+async def test_concurrent_profile_requests_profile_one_at_a_time(monkeypatch):
+    async def decode(token):
+        # Yield while verifying, so both requests are past the busy check at once
+        await asyncio.sleep(0.01)
+        return {"permissions": ["debug:profile"]}
+
+    monkeypatch.setattr(profiler, "decode_jwt_token", decode)
+    transport = httpx.ASGITransport(app=ProfilerMiddleware(endpoint))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        headers = {"X-Profile": "1", "Authorization": "Bearer token"}
+        responses = await asyncio.gather(*(client.get("/", headers=headers) for _ in range(2)))
+
+    assert all(r.status_code == 200 for r in responses)
+    bodies = [r.text for r in responses]
+    assert bodies.count("served") == 1
+    assert sum('"profiler"' in body for body in bodies) == 1
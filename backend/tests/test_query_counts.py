@@ -0,0 +1,90 @@
+import pytest
+from app.db.query_counter import QueryCounter
+
+
+@pytest.fixture
+def seeded(client):
+    """Three clients with four appointments each, so an N+1 shows up as extra statements"""
+    client_ids = []
+    for i in range(3):
+        response = client.post("/api/v1/clients/", json={"name": f"Client {i}", "email": f"c{i}@example.com"})
+        assert response.status_code == 200, response.text
+        client_ids.append(response.json()["id"])
+    appointment_ids = []
+    for i, client_id in enumerate(client_ids):
+        for day in range(1, 5):
+            response = client.post("/api/v1/appointments/", json={
+                "client_id": client_id,
+                "time": f"2030-0{i + 1}-{day:02d}T10:00:00Z",
+                "status": "scheduled",
+            })
+            assert response.status_code == 201, response.text
+            appointment_ids.append(response.json()["id"])
+    return client_ids, appointment_ids
+
+
+def statements(app_engine, client, url: str) -> QueryCounter:
+    with QueryCounter(app_engine) as queries:
+        response = client.get(url)
+    assert response.status_code == 200, response.text
+    return queries
+
+
+def test_list_appointments(app_engine, client, seeded):
+    # count(*) + page, the client loaded by the join
+    statements(app_engine, client, "/api/v1/appointments/?page_size=20").assert_count(2)
+
+
+def test_list_appointments_cursor(app_engine, client, seeded):
+    statements(app_engine, client, "/api/v1/appointments/?pagination=cursor&page_size=5").assert_count(1)
+
+
+def test_list_appointments_without_total(app_engine, client, seeded):
+    statements(app_engine, client, "/api/v1/appointments/?include_total=false").assert_count(1)
+
+
+def test_get_appointment(app_engine, client, seeded):
+    _, appointment_ids = seeded
+    statements(app_engine, client, f"/api/v1/appointments/{appointment_ids[0]}").assert_count(1)
+
+
+def test_get_client(app_engine, client, seeded):
+    client_ids, _ = seeded
+    # the client and its bounded appointment preview in one windowed join
+    statements(app_engine, client, f"/api/v1/clients/{client_ids[0]}").assert_count(1)
+
+
+def test_get_client_sparse_fields(app_engine, client, seeded):
+    client_ids, _ = seeded
+    statements(app_engine, client, f"/api/v1/clients/{client_ids[0]}?fields=name").assert_count(1)
+
+
+def test_get_client_appointments(app_engine, client, seeded):
+    client_ids, _ = seeded
+    # the client's existence, count(*) + page
+    statements(app_engine, client, f"/api/v1/clients/{client_ids[0]}/appointments").assert_count(3)
+
+
+def test_list_clients(app_engine, client, seeded):
+    statements(app_engine, client, "/api/v1/clients/").assert_count(2)
+
+
+def test_cached_count_is_reused(app_engine, client, seeded, monkeypatch):
+    from app.core import cache
+    from app.core.cache import InMemoryCacheBackend
+    from app.services import pagination
+    # a backend for counts only, so the response cache doesn't answer the repeat
+    backend = InMemoryCacheBackend(maxsize=100)
+    monkeypatch.setattr(cache, "get_cache_backend", lambda: backend)
+    monkeypatch.setattr(pagination, "get_cache_backend", lambda: backend)
+    url = "/api/v1/appointments/?count=cached&page_size=5"
+    statements(app_engine, client, url).assert_count(2)
+    statements(app_engine, client, url).assert_count(1)
+    assert client.post("/api/v1/clients/", json={"name": "New", "email": "new@example.com"}).status_code == 200
+    statements(app_engine, client, url).assert_count(2)
+
+
+def test_cached_count_without_backend_counts(app_engine, client, seeded):
+    url = "/api/v1/appointments/?count=cached&page_size=5"
+    statements(app_engine, client, url).assert_count(2)
+    statements(app_engine, client, url).assert_count(2)
@@ -0,0 +1,128 @@
+"""Replica routing against SQLite files standing in for replicas: each "replica"
+is a copy of the primary taken at some point, so which data a listing returns
+shows which database served it."""
+import asyncio
+import os
+import shutil
+import time
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.core import cache
+from app.core.cache import InMemoryCacheBackend
+from app.core.config import get_settings
+from app.db import session
+from app.db.replicas import Replica, ReplicaSet
+
+CLIENTS = "/api/v1/clients/"
+
+
+def names(client, **params):
+    response = client.get(CLIENTS, params={"page_size": 50, **params})
+    assert response.status_code == 200, response.text
+    return [item["name"] for item in response.json()["items"]]
+
+
+def add_client(client, name: str) -> None:
+    response = client.post(CLIENTS, json={"name": name, "email": f"{name.lower()}@example.com"})
+    assert response.status_code == 200, response.text
+
+
+def snapshot(db_engine, workdir: str, name: str) -> Replica:
+    """A replica holding what the primary holds now"""
+    db_engine.dispose()
+    path = os.path.join(workdir, f"{name}.db")
+    shutil.copy(db_engine.url.database, path)
+    return Replica(name, create_engine(f"sqlite:///{path}"), create_async_engine(f"sqlite+aiosqlite:///{path}"))
+
+
+@pytest.fixture
+def write_markers(monkeypatch):
+    """One in-process store standing in for the Redis all workers share"""
+    store = InMemoryCacheBackend(maxsize=100)
+    monkeypatch.setattr(cache, "get_write_marker_store", lambda: store)
+    monkeypatch.setattr(get_settings(), "READ_YOUR_WRITES_SECONDS", 1)
+    return store
+
+
+@pytest.fixture
+def replicas(client, db_engine, workdir, write_markers, monkeypatch):
+    """replica0 has Ann, replica1 Ann and Bob, the primary Ann, Bob and Cat"""
+    add_client(client, "Ann")
+    first = snapshot(db_engine, workdir, "replica0")
+    add_client(client, "Bob")
+    second = snapshot(db_engine, workdir, "replica1")
+    add_client(client, "Cat")
+    replica_set = ReplicaSet([first, second], check_interval=60, max_lag=None)
+    monkeypatch.setattr(session, "replicas", replica_set)
+    time.sleep(1.1)  # let the setup writes' read-your-writes window close
+    return replica_set
+
+
+def test_reads_round_robin_over_replicas(client, replicas):
+    served = [names(client, page=1) for _ in range(4)]
+    assert served == [["Ann"], ["Ann", "Bob"], ["Ann"], ["Ann", "Bob"]]
+
+
+def test_client_detail_reads_from_a_replica(client, replicas):
+    # Cat (id 3) only exists on the primary
+    statuses = {client.get(f"{CLIENTS}3").status_code for _ in range(2)}
+    assert 200 not in statuses
+
+
+def test_reads_stay_on_primary_after_own_write(client, replicas):
+    add_client(client, "Dan")
+    for _ in range(3):
+        assert names(client) == ["Ann", "Bob", "Cat", "Dan"]
+    time.sleep(1.1)
+    assert names(client) in (["Ann"], ["Ann", "Bob"])
+
+
+def test_failed_replica_is_skipped(client, replicas):
+    replicas.replicas[0].engine = create_engine("sqlite:////nonexistent/replica0.db")
+    replicas.replicas[0].async_engine = create_async_engine("sqlite+aiosqlite:////nonexistent/replica0.db")
+    asyncio.run(replicas.check_all())
+    assert [replica.healthy for replica in replicas.replicas] == [False, True]
+    assert [names(client) for _ in range(3)] == [["Ann", "Bob"]] * 3
+
+
+def test_no_healthy_replica_falls_back_to_primary(client, replicas):
+    for replica in replicas.replicas:
+        replica.healthy = False
+    assert names(client) == ["Ann", "Bob", "Cat"]
+
+
+def test_writes_go_to_primary(client, replicas, db_engine):
+    add_client(client, "Dan")
+    with db_engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT count(*) FROM clients").scalar() == 4
+    for replica in replicas.replicas:
+        with replica.engine.connect() as conn:
+            assert conn.exec_driver_sql("SELECT count(*) FROM clients WHERE name = 'Dan'").scalar() == 0
+
+
+def test_replicas_require_a_shared_write_marker_store(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "DATABASE_REPLICA_URLS", ["sqlite:///replica.db"])
+    monkeypatch.setattr(settings, "CACHE_REDIS_URL", None)
+    cache.get_write_marker_store.cache_clear()
+    try:
+        with pytest.raises(RuntimeError, match="CACHE_REDIS_URL"):
+            cache.get_write_marker_store()
+    finally:
+        cache.get_write_marker_store.cache_clear()
+
+
+def test_write_succeeds_when_marker_store_is_down(client, replicas, monkeypatch):
+    class Down:
+        def get(self, key):
+            raise ConnectionError("redis is down")
+
+        def set(self, key, value, ttl):
+            raise ConnectionError("redis is down")
+
+    monkeypatch.setattr(cache, "get_write_marker_store", lambda: Down())
+    response = client.post(CLIENTS, json={"name": "Dan", "email": "dan@example.com"})
+    assert response.status_code == 200, response.text
+    # the marker can't be read either, so reads stay on the primary
+    assert names(client) == ["Ann", "Bob", "Cat", "Dan"]
@@ -0,0 +1,101 @@
+import time
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.core.config import get_settings
+
+A = "/api/v1/appointments"
+WINDOW = {"start_date": "2027-01-01", "end_date": "2027-01-31", "page_size": 50}
+
+
+@pytest.fixture
+def series(client):
+    client_id = client.post("/api/v1/clients/", json={"name": "Ann", "email": "ann@example.com"}).json()["id"]
+    response = client.post(f"{A}/series", json={
+        "client_id": client_id,
+        "start_time": "2027-01-04T09:00:00Z",
+        "rrule": "FREQ=WEEKLY;BYDAY=MO;COUNT=4",
+        "duration_minutes": 50,
+        "notes": "weekly session",
+    })
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def listed(client):
+    return [(item["time"][:16], item["status"], item["id"]) for item in client.get(f"{A}/", params=WINDOW).json()["items"]]
+
+
+def test_partial_updates_of_an_occurrence(client, series):
+    url = f"{A}/series/{series['id']}/occurrences/2027-01-11T09:00:00Z"
+    moved = client.put(url, json={"time": "2027-01-12T09:00:00Z"})
+    assert moved.status_code == 200, moved.text
+    assert moved.json()["notes"] == "weekly session"
+    assert moved.json()["duration_minutes"] == 50
+
+    # The occurrence has its appointment now; this updates it, keeping the move
+    annotated = client.put(url, json={"notes": "bring forms"})
+    assert annotated.status_code == 200, annotated.text
+    assert annotated.json()["notes"] == "bring forms"
+    assert annotated.json()["time"] == moved.json()["time"]
+
+
+def test_deleting_a_moved_occurrence_does_not_bring_it_back(client, series):
+    moved = client.put(
+        f"{A}/series/{series['id']}/occurrences/2027-01-11T09:00:00Z", json={"time": "2027-01-12T09:00:00Z"}
+    ).json()
+
+    response = client.delete(f"{A}/{moved['id']}")
+    assert response.status_code == 200, response.text
+
+    items = listed(client)
+    assert not any(time.startswith("2027-01-11") for time, _, _ in items)
+    assert ("2027-01-12T09:00", "cancelled", moved["id"]) in items
+    assert [time for time, status, _ in items if status == "scheduled"] == [
+        "2027-01-04T09:00", "2027-01-18T09:00", "2027-01-25T09:00"
+    ]
+
+
+def test_stats_count_unchanged_occurrences(client, series):
+    cancelled = client.put(f"{A}/series/{series['id']}/occurrences/2027-01-11T09:00:00Z", json={"status": "cancelled"})
+    assert cancelled.status_code == 200, cancelled.text
+
+    response = client.get(f"{A}/stats", params={"start_date": "2027-01-01", "end_date": "2027-01-31"})
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["by_status"] == {"scheduled": 3, "cancelled": 1}
+    assert [(day["day"], day["by_status"]) for day in body["days"]] == [
+        ("2027-01-04", {"scheduled": 1}),
+        ("2027-01-11", {"cancelled": 1}),
+        ("2027-01-18", {"scheduled": 1}),
+        ("2027-01-25", {"scheduled": 1}),
+    ]
+
+
+def test_stats_count_todays_upcoming_occurrences(client):
+    now = datetime.now(timezone.utc)
+    start = (now + timedelta(minutes=5)).replace(second=0, microsecond=0)
+    if start.date() != now.date():
+        pytest.skip("too close to midnight UTC")
+    client_id = client.post("/api/v1/clients/", json={"name": "Ann", "email": "ann@example.com"}).json()["id"]
+    response = client.post(f"{A}/series", json={
+        "client_id": client_id, "start_time": start.isoformat(), "rrule": "FREQ=DAILY;COUNT=3",
+    })
+    assert response.status_code == 201, response.text
+    today = client.get(f"{A}/stats").json()["today"]
+    assert today["total"] == 1
+    assert today["upcoming"] == 1
+
+
+def test_series_changes(client, series, monkeypatch):
+    monkeypatch.setattr(get_settings(), "CHANGES_SETTLE_SECONDS", 0)
+    time.sleep(1.1)  # SQLite timestamps have whole seconds
+    first = client.get(f"{A}/series/changes")
+    assert first.status_code == 200, first.text
+    assert [item["id"] for item in first.json()["items"]] == [series["id"]]
+    assert first.json()["deleted"] == []
+
+    assert client.delete(f"{A}/series/{series['id']}").status_code == 200
+    time.sleep(1.1)
+    delta = client.get(f"{A}/series/changes", params={"since": first.json()["next_token"]}).json()
+    assert delta["items"] == []
+    assert [tombstone["id"] for tombstone in delta["deleted"]] == [series["id"]]